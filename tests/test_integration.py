@@ -1,8 +1,9 @@
 import pytest
-from unima_projeto_ed.priority_queue import PriorityQueue
+from unima_projeto_ed.priority_queue import PriorityQueue, IndexedPriorityQueue, QUEUE_BACKENDS, make_queue
 from unima_projeto_ed.a_star import heuristic, a_star
 from unima_projeto_ed.weighted_graph import WeightedDirectedGraph
 from unima_projeto_ed.grafo import haversine, build_graph
+from unima_projeto_ed.csr_graph import CSRGraph
 
 
 def test_priority_queue_integration():
@@ -20,6 +21,34 @@ def test_priority_queue_integration():
     assert pq.is_empty()
 
 
+def test_indexed_priority_queue():
+    """Testa decrease_key, contains e priority_of da fila indexada"""
+    pq = IndexedPriorityQueue()
+    for priority, item in [(5.0, 'A'), (3.0, 'B'), (8.0, 'C'), (6.0, 'D')]:
+        pq.push(priority, item)
+
+    assert pq.contains('C')
+    assert 'Z' not in pq
+    assert pq.priority_of('C') == 8.0
+
+    pq.decrease_key('C', 1.0)
+    assert pq.priority_of('C') == 1.0
+    assert pq.peek() == 'C'
+
+    # push de um item existente não duplica a entrada
+    pq.push(0.5, 'D')
+    assert len(pq) == 4
+
+    with pytest.raises(ValueError):
+        pq.decrease_key('A', 10.0)
+    with pytest.raises(KeyError):
+        pq.decrease_key('Z', 1.0)
+
+    assert [pq.pop() for _ in range(4)] == ['D', 'C', 'B', 'A']
+    assert not pq.contains('A')
+    assert pq.is_empty()
+
+
 def test_weighted_graph_with_a_star():
     """Testa integração entre WeightedDirectedGraph e A*"""
     # Cria grafo usando a classe WeightedDirectedGraph
@@ -137,4 +166,1008 @@ def test_error_handling():
     coordinates = {'A': (0, 0), 'B': (1, 1)}
     
     path, cost = a_star(graph, 'A', 'B', coordinates)
-    assert cost == float('inf')  # Sem caminho possível
\ No newline at end of file
+    assert cost == float('inf')  # Sem caminho possível
+
+
+def test_csr_graph_from_weighted_graph():
+    """Testa conversão de WeightedDirectedGraph para CSR e A* sobre o CSR"""
+    wg = WeightedDirectedGraph()
+    wg.add_undirected_edge('A', 'B', 4)
+    wg.add_undirected_edge('A', 'C', 2)
+    wg.add_undirected_edge('B', 'D', 3)
+    wg.add_undirected_edge('C', 'D', 1)
+    wg.add_undirected_edge('D', 'E', 2)
+    wg.add_vertex('F')
+
+    csr = CSRGraph.from_weighted_graph(wg)
+
+    assert csr.vertex_count() == wg.vertex_count()
+    assert csr.edge_count() == wg.edge_count()
+    assert csr.get_weight('C', 'D') == 1
+    assert sorted(csr.get_neighbors('A')) == ['B', 'C']
+    assert csr.get_neighbors('F') == []
+    assert not csr.has_vertex('Z')
+
+    coordinates = {'A': (0, 0), 'B': (1, 1), 'C': (0, 2), 'D': (2, 2), 'E': (3, 3), 'F': (9, 9)}
+    assert a_star(csr, 'A', 'E', coordinates) == a_star(wg.edges, 'A', 'E', coordinates)
+
+    # Vértice isolado: sem caminho
+    path, cost = a_star(csr, 'A', 'F', coordinates)
+    assert cost == float('inf')
+
+
+def test_csr_graph_from_osm_data():
+    """Testa construção do CSR direto dos dados do OSM"""
+    nodes = {
+        10: (-9.6379, -35.7062),
+        20: (-9.6378, -35.7062),
+        30: (-9.6377, -35.7062),
+        40: (-9.6300, -35.7000),
+    }
+    ways = [[10, 20, 30], [20, 30], [30, 99]]
+
+    csr = CSRGraph.from_osm_data(nodes, ways)
+    G = build_graph(nodes, ways)
+
+    assert csr.vertex_count() == len(G.nodes)
+    assert csr.edge_count() == len(G.edges)
+    assert csr.get_weight(10, 20) == G[10][20]['weight']
+    assert csr.coordinates_at(csr.index_of(30)) == nodes[30]
+
+    # Sem coordenadas externas, o A* usa as do próprio grafo
+    path, cost = a_star(csr, 10, 30, None)
+    assert path == [10, 20, 30]
+    assert cost == pytest.approx(haversine(nodes[10], nodes[20]) + haversine(nodes[20], nodes[30]))
+
+
+def test_oneway_weighted_graph_with_a_star():
+    """Testa o A* direto sobre o WeightedDirectedGraph montado com as tags de mão única"""
+    nodes = {
+        1: (-9.6379, -35.7062),
+        2: (-9.6379, -35.7052),
+        3: (-9.6369, -35.7052),
+        4: (-9.6369, -35.7062),
+    }
+    # 1 -> 2 é mão única; a volta 2 -> 1 precisa contornar o quarteirão por 3 e 4
+    ways = [[1, 2], [2, 3, 4, 1]]
+    tags = [{'highway': 'residential', 'oneway': 'yes'}, {'highway': 'residential'}]
+
+    wg = build_graph(nodes, ways, backend='weighted', tags=tags)
+    assert wg.has_edge(1, 2) and not wg.has_edge(2, 1)
+
+    path, cost = a_star(wg, 1, 2, nodes, heuristic='haversine')
+    assert path == [1, 2]
+    path, cost = a_star(wg, 2, 1, nodes, heuristic='haversine')
+    assert path == [2, 3, 4, 1]
+    assert cost == pytest.approx(sum(haversine(nodes[a], nodes[b]) for a, b in zip(path, path[1:])))
+    assert (path, cost) == a_star(wg.edges, 2, 1, nodes, heuristic='haversine')
+
+
+def test_simplified_graph_with_a_star():
+    """Testa o A* sobre o grafo simplificado e a reconstrução do caminho completo"""
+    from unima_projeto_ed.grafo import simplify_graph
+
+    # Duas esquinas (1 e 5) ligadas por uma rua com nós só de desenho, mais um atalho 1 - 6 - 5
+    nodes = {
+        1: (-9.6379, -35.7062),
+        2: (-9.6379, -35.7060),
+        3: (-9.6379, -35.7058),
+        4: (-9.6379, -35.7056),
+        5: (-9.6379, -35.7054),
+        6: (-9.6370, -35.7058),
+        7: (-9.6390, -35.7062),
+        8: (-9.6390, -35.7054),
+    }
+    ways = [[1, 2, 3, 4, 5], [1, 6, 5], [7, 1], [5, 8]]
+    wg = build_graph(nodes, ways, backend='weighted')
+    simple = simplify_graph(wg)
+
+    assert simple.vertex_count() == 4
+    assert set(simple.get_vertices()) == {1, 5, 7, 8}
+    assert simple.geometry[(1, 5)] == [2, 3, 4]
+    assert simple.geometry[(5, 1)] == [4, 3, 2]
+
+    path, cost = a_star(simple, 7, 5, nodes, heuristic='haversine')
+    full_path, full_cost = a_star(wg, 7, 5, nodes, heuristic='haversine')
+    assert path == [7, 1, 5]
+    assert simple.expand_path(path) == full_path == [7, 1, 2, 3, 4, 5]
+    assert cost == pytest.approx(full_cost)
+
+    # Nós em 'keep' continuam no grafo
+    assert simplify_graph(wg, keep=[3]).has_vertex(3)
+
+
+def test_dijkstra_on_csr_graph(capsys):
+    """Testa o Dijkstra executando direto sobre o CSR"""
+    from unima_projeto_ed.Dijkstra import Dijkstra
+
+    wg = WeightedDirectedGraph()
+    wg.add_undirected_edge('A', 'B', 4)
+    wg.add_undirected_edge('A', 'C', 2)
+    wg.add_undirected_edge('C', 'D', 1)
+    wg.add_undirected_edge('B', 'D', 3)
+    capsys.readouterr()
+
+    Dijkstra(CSRGraph.from_weighted_graph(wg), 'A', 'D')
+    out = capsys.readouterr().out
+
+    assert "shortest distance to D:  3" in out
+    assert "['A', 'C', 'D']" in out
+
+
+def test_dijkstra_priority_queue_update():
+    """Testa a atualização de prioridade com remoção preguiçosa na fila do Dijkstra"""
+    from unima_projeto_ed.Dijkstra import PriorityQueue as DijkstraQueue
+
+    queue = DijkstraQueue()
+    for priority, task in [(5, 'A'), (3, 'B'), (8, 'C'), (6, 'D')]:
+        queue.add_task(priority, task)
+
+    # Atualizações não podem quebrar a ordem do heap
+    queue.add_task(1, 'C')
+    queue.add_task(9, 'B')
+    assert len(queue) == 4
+
+    popped = [queue.pop_task() for _ in range(4)]
+    assert popped == [(1, 'C'), (5, 'A'), (6, 'D'), (9, 'B')]
+    assert len(queue) == 0
+    with pytest.raises(KeyError):
+        queue.pop_task()
+
+
+def test_dijkstra_priority_queue_many_updates():
+    """Muitas atualizações seguidas: tamanho lógico correto e heap compactado"""
+    from unima_projeto_ed.Dijkstra import PriorityQueue as DijkstraQueue
+
+    queue = DijkstraQueue()
+    for task in range(10):
+        queue.add_task(100, task)
+    for priority in range(99, 0, -1):
+        queue.add_task(priority, priority % 10)
+
+    assert len(queue) == 10
+    assert len(queue.pq) <= 2 * len(queue) + 1
+
+    priorities = [queue.pop_task()[0] for _ in range(10)]
+    assert priorities == sorted(priorities)
+    assert priorities[0] == 1
+
+
+
+@pytest.mark.parametrize('backend', sorted(QUEUE_BACKENDS))
+def test_queue_backends(backend):
+    """Todas as filas devem ter o mesmo comportamento (push, pop, decrease_key)"""
+    pq = make_queue(backend)
+    for priority, item in [(50, 'A'), (30, 'B'), (80, 'C'), (60, 'D'), (70, 'E')]:
+        pq.push(priority, item)
+
+    pq.decrease_key('C', 40)
+    pq.push(90, 'E')  # aumento de prioridade de item existente
+    assert len(pq) == 5
+    assert pq.contains('C') and 'Z' not in pq
+    assert pq.priority_of('C') == 40
+    assert pq.peek() == 'B'
+
+    assert [pq.pop() for _ in range(5)] == ['B', 'C', 'A', 'D', 'E']
+    assert pq.is_empty()
+    with pytest.raises(IndexError):
+        pq.pop()
+
+
+def test_unknown_queue_backend():
+    """Nome de fila desconhecido gera ValueError"""
+    with pytest.raises(ValueError):
+        make_queue('fibonacci')
+
+
+def test_radix_heap_below_last_key():
+    """Chaves menores que a última removida (heurística inconsistente) saem antes das outras"""
+    pq = make_queue('radix')
+    pq.push(10, 'A')
+    pq.push(20, 'B')
+    pq.push(30, 'C')
+    assert pq.pop() == 'A'
+    pq.push(5, 'D')
+    pq.push(7, 'E')
+    assert pq.peek() == 'D' and pq.priority_of('D') == 5
+    assert [pq.pop() for _ in range(4)] == ['D', 'E', 'B', 'C']
+
+
+@pytest.mark.parametrize('backend', ['heapq'] + sorted(QUEUE_BACKENDS))
+def test_dijkstra_queue_backends(backend, capsys):
+    """O Dijkstra encontra a mesma distância com qualquer fila (pesos inteiros em metros)"""
+    from unima_projeto_ed.Dijkstra import Dijkstra
+
+    wg = WeightedDirectedGraph()
+    for u, v, w in [('A', 'B', 400), ('A', 'C', 200), ('C', 'D', 100), ('B', 'D', 300),
+                    ('D', 'E', 250), ('B', 'E', 500)]:
+        wg.add_undirected_edge(u, v, w)
+    capsys.readouterr()
+
+    Dijkstra(CSRGraph.from_weighted_graph(wg), 'A', 'E', queue=backend)
+    out = capsys.readouterr().out
+    assert "shortest distance to E:  550" in out
+    assert "['A', 'C', 'D', 'E']" in out
+
+
+
+def test_dijkstra_result_api(capsys):
+    """Testa o objeto de resultado do Dijkstra (modo silencioso e um-para-todos)"""
+    from unima_projeto_ed.Dijkstra import Graph, Vertex, Edge, Dijkstra
+
+    A, B, C, D, E = (Vertex(x) for x in "ABCDE")
+    graph = Graph({
+        A: [Edge(4, B), Edge(2, C)],
+        B: [Edge(3, D)],
+        C: [Edge(1, D)],
+        D: [],
+        E: [],
+    })
+
+    result = Dijkstra(graph, A, D, quiet=True)
+    assert capsys.readouterr().out == ""
+    assert result.distance == 3
+    assert result.path == [A, C, D]
+    assert result.previous[D] is C
+    assert result.settled >= 3
+
+    # Sem caminho: distância infinita e caminho vazio
+    result = Dijkstra(graph, A, E, quiet=True)
+    assert result.distance == float('inf')
+    assert result.path == []
+
+    # Um-para-todos: uma única busca atende vários destinos
+    tree = Dijkstra(graph, A)
+    assert capsys.readouterr().out == ""
+    assert tree.settled == 4
+    assert tree.distance_to(B) == 4
+    assert tree.path_to(B) == [A, B]
+    assert tree.path_to(D) == [A, C, D]
+    assert tree.path_to(E) == []
+
+
+def test_dijkstra_result_on_csr_graph():
+    """O resultado sobre o CSR usa os ids originais dos vértices"""
+    from unima_projeto_ed.Dijkstra import Dijkstra
+
+    wg = WeightedDirectedGraph()
+    wg.add_undirected_edge(1, 2, 4)
+    wg.add_undirected_edge(1, 3, 2)
+    wg.add_undirected_edge(3, 4, 1)
+    wg.add_vertex(5)
+    csr = CSRGraph.from_weighted_graph(wg)
+
+    tree = Dijkstra(csr, 1, quiet=True)
+    assert tree.distances == {1: 0, 2: 4, 3: 2, 4: 3}
+    assert tree.previous[4] == 3
+    assert tree.path_to(4) == [1, 3, 4]
+    assert tree.distance_to(5) == float('inf')
+    assert tree.path_to(5) == []
+
+
+def test_dijkstra_result_early_exit():
+    """Quando a busca para cedo, o resultado só tem os vértices com distância definitiva"""
+    from unima_projeto_ed.Dijkstra import Dijkstra
+
+    # X é alcançado direto com 10, mas o menor caminho é S -> T -> Y -> X (3)
+    wg = WeightedDirectedGraph()
+    for u, v, w in [('S', 'T', 1), ('S', 'X', 10), ('T', 'Y', 1), ('Y', 'X', 1)]:
+        wg.add_edge(u, v, w)
+    csr = CSRGraph.from_weighted_graph(wg)
+
+    for graph in (wg, csr):
+        early = [Dijkstra(graph, 'S', 'T', quiet=True), Dijkstra(graph, 'S', targets=['T'], quiet=True)]
+        for result in early:
+            assert result.distance_to('T') == 1 and result.path_to('T') == ['S', 'T']
+            # X ainda estava na fila com a distância provisória 10
+            assert result.distance_to('X') == float('inf')
+            assert result.path_to('X') == []
+            assert set(result.distances) == set(result.previous) == {'S', 'T'}
+        assert Dijkstra(graph, 'S', quiet=True).distance_to('X') == 3
+
+    both = Dijkstra(wg, 'S', 'X', quiet=True, bidirectional=True)
+    assert both.distance == 3 and both.path == ['S', 'T', 'Y', 'X']
+    assert all(both.distance_to(v) == Dijkstra(wg, 'S', v, quiet=True).distance for v in both.distances)
+
+
+def _grid_graph(size):
+    """Grade size x size com pesos levemente diferentes (estilo malha de ruas)"""
+    wg = WeightedDirectedGraph()
+    for x in range(size):
+        for y in range(size):
+            if x + 1 < size:
+                wg.add_undirected_edge((x, y), (x + 1, y), 1 + ((x * 7 + y * 3) % 5) / 10)
+            if y + 1 < size:
+                wg.add_undirected_edge((x, y), (x, y + 1), 1 + ((x * 3 + y * 7) % 5) / 10)
+    return wg
+
+
+def test_weighted_graph_reverse_edges():
+    """A adjacência reversa acompanha add_edge/remove_edge"""
+    wg = WeightedDirectedGraph()
+    wg.add_edge('A', 'B', 2)
+    wg.add_edge('C', 'B', 3)
+
+    assert sorted(wg.get_predecessors_with_weights('B')) == [('A', 2), ('C', 3)]
+    assert wg.get_predecessors_with_weights('A') == []
+
+    wg.remove_edge('A', 'B')
+    assert wg.get_predecessors_with_weights('B') == [('C', 3)]
+
+
+def test_bidirectional_dijkstra():
+    """Dijkstra bidirecional: mesma distância, menos vértices finalizados"""
+    from unima_projeto_ed.Dijkstra import Dijkstra
+
+    wg = _grid_graph(40)
+    source, target = (10, 10), (30, 30)
+
+    forward = Dijkstra(wg, source, target, quiet=True)
+    both = Dijkstra(wg, source, target, quiet=True, bidirectional=True)
+
+    assert both.distance == pytest.approx(forward.distance)
+    assert both.path[0] == source and both.path[-1] == target
+    assert sum(wg.get_weight(a, b) for a, b in zip(both.path, both.path[1:])) == pytest.approx(both.distance)
+    assert both.settled < forward.settled
+
+    # Sem caminho (aresta só de ida)
+    wg.add_edge('X', 'Y', 1)
+    assert Dijkstra(wg, 'Y', 'X', quiet=True, bidirectional=True).path == []
+
+
+def test_bidirectional_rejects_unsupported_input():
+    """A busca bidirecional precisa de um WeightedDirectedGraph e de um destino"""
+    from unima_projeto_ed.Dijkstra import Dijkstra, Graph, Vertex, Edge
+
+    wg = _grid_graph(3)
+    csr = CSRGraph.from_weighted_graph(wg)
+    A, B = Vertex('A'), Vertex('B')
+    for graph, start, end in ((csr, (0, 0), (2, 2)), (wg.edges, (0, 0), (2, 2)),
+                              (Graph({A: [Edge(1, B)], B: []}), A, B)):
+        with pytest.raises(TypeError):
+            Dijkstra(graph, start, end, quiet=True, bidirectional=True)
+    with pytest.raises(TypeError):
+        a_star(csr, (0, 0), (2, 2), {v: v for v in wg.get_vertices()}, bidirectional=True)
+    with pytest.raises(ValueError):
+        Dijkstra(wg, (0, 0), quiet=True, bidirectional=True)
+
+
+def test_bidirectional_a_star():
+    """A* bidirecional encontra o mesmo custo do A* unidirecional"""
+    wg = _grid_graph(30)
+    coordinates = {v: v for v in wg.get_vertices()}
+
+    path, cost = a_star(wg, (3, 4), (25, 20), coordinates, bidirectional=True)
+    expected_path, expected_cost = a_star(wg.edges, (3, 4), (25, 20), coordinates)
+
+    assert cost == pytest.approx(expected_cost)
+    assert path[0] == (3, 4) and path[-1] == (25, 20)
+
+    assert a_star(wg, (3, 4), (3, 4), coordinates, bidirectional=True) == ([(3, 4)], 0)
+
+
+@pytest.mark.parametrize('queue', sorted(QUEUE_BACKENDS))
+def test_bidirectional_a_star_landmarks_directed(queue):
+    """A* bidirecional com ALT em grafos dirigidos (heurística não simétrica, becos sem saída)"""
+    import random
+    from unima_projeto_ed.Dijkstra import Dijkstra
+    from unima_projeto_ed.landmarks import LandmarkHeuristic
+
+    # 'dead' só recebe arestas: não alcança o destino nem é alcançado por ele
+    wg = WeightedDirectedGraph()
+    for u, v, w in [('s', 'dead', 1), ('s', 'a', 5), ('a', 't', 5), ('t', 's', 1), ('a', 'dead', 1)]:
+        wg.add_edge(u, v, w)
+    alt = LandmarkHeuristic.build(wg, k=2, start='t')
+    assert alt.from_source('s', 't') <= 10 and alt('dead', 't') == float('inf')
+    assert a_star(wg, 's', 't', None, queue=queue, heuristic=alt, bidirectional=True) == (['s', 'a', 't'], 10)
+    assert a_star(wg, 's', 'dead', None, queue=queue, heuristic=alt, bidirectional=True)[1] == 1
+    assert a_star(wg, 'dead', 't', None, queue=queue, heuristic=alt, bidirectional=True)[1] == float('inf')
+
+    rng = random.Random(7)
+    for _ in range(40):
+        wg = WeightedDirectedGraph()
+        for _ in range(30):
+            u, v = rng.sample(range(12), 2)
+            wg.add_edge(u, v, rng.randint(1, 10))
+        vertices = sorted(wg.get_vertices())
+        alt = LandmarkHeuristic.build(wg, k=3, start=vertices[0])
+        for _ in range(5):
+            source, target = rng.choice(vertices), rng.choice(vertices)
+            expected = Dijkstra(wg, source, target, quiet=True).distance
+            assert a_star(wg, source, target, None, queue=queue, heuristic=alt,
+                          bidirectional=True)[1] == expected
+
+
+def test_contraction_hierarchy_matches_dijkstra():
+    """Consultas na Contraction Hierarchy dão o mesmo custo do Dijkstra"""
+    import random
+    from unima_projeto_ed.Dijkstra import Dijkstra
+    from unima_projeto_ed.contraction_hierarchies import ContractionHierarchy
+
+    wg = _grid_graph(12)
+    # Algumas ruas de mão única
+    wg.remove_edge((3, 3), (3, 4))
+    wg.remove_edge((7, 2), (6, 2))
+    ch = ContractionHierarchy(wg)
+
+    assert len(ch.rank) == wg.vertex_count()
+    vertices = sorted(wg.get_vertices())
+    for _ in range(30):
+        source, target = random.sample(vertices, 2)
+        path, cost = ch.query(source, target)
+        expected = Dijkstra(wg, source, target, quiet=True)
+
+        assert cost == pytest.approx(expected.distance)
+        # O caminho desempacotado só usa arestas do grafo original
+        assert path[0] == source and path[-1] == target
+        assert sum(wg.get_weight(a, b) for a, b in zip(path, path[1:])) == pytest.approx(cost)
+
+
+def test_contraction_hierarchy_osm_ids():
+    """O caminho volta com os ids originais do OSM; sem caminho retorna infinito"""
+    from unima_projeto_ed.contraction_hierarchies import ContractionHierarchy
+
+    wg = WeightedDirectedGraph()
+    chain = [1001, 1002, 1003, 1004, 1005]
+    for a, b in zip(chain, chain[1:]):
+        wg.add_undirected_edge(a, b, 10)
+    wg.add_undirected_edge(1001, 1005, 100)
+    wg.add_edge(2001, 1001, 5)  # só chega em 1001, não sai
+
+    ch = ContractionHierarchy(wg)
+    assert ch.query(1001, 1005) == (chain, 40)
+    assert ch.query(1005, 1005) == ([1005], 0)
+    assert ch.query(1001, 2001) == ([1001], float('inf'))
+    with pytest.raises(KeyError):
+        ch.query(1001, 9999)
+
+
+def test_contraction_hierarchy_is_deterministic():
+    """O mesmo grafo gera a mesma hierarquia, mesmo com ids (int grandes) em outros objetos"""
+    from unima_projeto_ed.contraction_hierarchies import ContractionHierarchy
+
+    def build():
+        # int(str(...)) cria um objeto novo a cada vez, como ao ler os ids do OSM
+        grid = _grid_graph(10)
+        ids = {v: int(str(4_000_000_000 + 100 * v[0] + v[1])) for v in grid.get_vertices()}
+        wg = WeightedDirectedGraph()
+        for u, neighbors in grid.edges.items():
+            for v, w in neighbors.items():
+                wg.add_edge(ids[u], ids[v], 1)  # pesos iguais: muitos empates
+        return ContractionHierarchy(wg)
+
+    first, second = build(), build()
+    assert first.rank == second.rank
+    assert first.middle == second.middle
+    assert first.query(4_000_000_000, 4_000_000_909) == second.query(4_000_000_000, 4_000_000_909)
+
+
+def test_landmark_heuristic(tmp_path):
+    """Heurística ALT: admissível, usada pelo A* e persistida em disco"""
+    import random
+    from unima_projeto_ed.Dijkstra import Dijkstra
+    from unima_projeto_ed.landmarks import LandmarkHeuristic
+
+    wg = WeightedDirectedGraph()
+    grid = _grid_graph(10)
+    # Ids inteiros, como os do OSM
+    ids = {v: 100 * v[0] + v[1] for v in grid.get_vertices()}
+    for u, neighbors in grid.edges.items():
+        for v, w in neighbors.items():
+            wg.add_edge(ids[u], ids[v], w)
+    wg.remove_edge(ids[(4, 4)], ids[(4, 5)])
+
+    alt = LandmarkHeuristic.build(wg, k=4)
+    assert len(alt.landmarks) == 4
+    assert len(set(alt.landmarks)) == 4
+
+    vertices = sorted(wg.get_vertices())
+    for _ in range(20):
+        source, target = random.sample(vertices, 2)
+        exact = Dijkstra(wg, source, target, quiet=True).distance
+        assert alt(source, target) <= exact + 1e-9
+        path, cost = a_star(wg.edges, source, target, None, heuristic=alt)
+        assert cost == pytest.approx(exact)
+
+    path_file = tmp_path / "landmarks.json"
+    alt.save(path_file)
+    loaded = LandmarkHeuristic.load(path_file)
+    assert loaded.landmarks == alt.landmarks
+    assert loaded(vertices[0], vertices[-1]) == alt(vertices[0], vertices[-1])
+
+
+@pytest.mark.parametrize('queue', sorted(QUEUE_BACKENDS))
+def test_landmark_heuristic_dead_end(queue):
+    """Vértices com h infinito (não alcançam o destino) ficam fora da fila"""
+    from unima_projeto_ed.landmarks import LandmarkHeuristic
+    from unima_projeto_ed.search_stats import SearchStats
+
+    wg = WeightedDirectedGraph()
+    for u, v, w in [(1, 2, 1), (1, 3, 5), (3, 4, 1), (4, 1, 1)]:
+        wg.add_edge(u, v, w)
+    alt = LandmarkHeuristic.build(wg, k=2, start=3)
+    assert alt(2, 3) == float('inf')  # 2 é um beco sem saída
+
+    csr = CSRGraph.from_weighted_graph(wg)
+    for graph in (wg.edges, csr):
+        assert a_star(graph, 1, 3, None, queue=queue, heuristic=alt) == ([1, 3], 5)
+        assert a_star(graph, 2, 3, None, queue=queue, heuristic=alt)[1] == float('inf')
+    assert a_star(wg, 1, 3, None, queue=queue, heuristic=alt, bidirectional=True) == ([1, 3], 5)
+    stats = SearchStats()
+    a_star(wg, 1, 3, None, queue=queue, heuristic=alt, stats=stats)
+    assert stats.pushes == 2  # o vértice 2 nunca entrou na fila
+
+
+def test_goal_heuristic_metrics():
+    """Métricas da heurística em metros e memoização por nó"""
+    from unima_projeto_ed.heuristics import bind_heuristic
+
+    coords = {
+        'SP': (-23.5505, -46.6333),
+        'RJ': (-22.9068, -43.1729),
+        'UNIMA': (-9.6359, -35.7042),
+        'PERTO': (-9.6379, -35.7062),
+    }
+
+    h = bind_heuristic('haversine', 'RJ', coords)
+    assert h['SP'] == pytest.approx(haversine(coords['SP'], coords['RJ']))
+    assert h['RJ'] == 0
+
+    # Em distâncias urbanas a aproximação equiretangular fica logo abaixo do haversine
+    h_eq = bind_heuristic('equirectangular', 'UNIMA', coords)
+    exact = haversine(coords['PERTO'], coords['UNIMA'])
+    assert 0.998 * exact < h_eq['PERTO'] <= exact
+
+    calls = []
+    h_custom = bind_heuristic(lambda n, g, c: calls.append(n) or 1.0, 'RJ', coords)
+    assert h_custom['SP'] == h_custom['SP'] == 1.0
+    assert calls == ['SP']
+
+    with pytest.raises(ValueError):
+        bind_heuristic('manhattan', 'RJ', coords)
+
+
+def test_a_star_haversine_heuristic():
+    """A* com heurística haversine em coordenadas reais do OSM"""
+    nodes = {
+        1: (-9.6379, -35.7062),
+        2: (-9.6378, -35.7062),
+        3: (-9.6377, -35.7061),
+        4: (-9.6376, -35.7062),
+        5: (-9.6377, -35.7063),
+    }
+    ways = [[1, 2, 3, 4], [2, 5, 4]]
+    csr = CSRGraph.from_osm_data(nodes, ways)
+    wg = WeightedDirectedGraph()
+    for way in ways:
+        for a, b in zip(way, way[1:]):
+            wg.add_undirected_edge_with_coords(a, b, nodes[a], nodes[b])
+
+    expected = a_star(wg.edges, 1, 4, nodes, heuristic=lambda n, g, c: 0)
+    assert a_star(wg.edges, 1, 4, nodes, heuristic='haversine') == expected
+    for metric in ('haversine', 'equirectangular'):
+        path, cost = a_star(csr, 1, 4, None, heuristic=metric)
+        assert cost == pytest.approx(expected[1])
+
+
+def test_equirectangular_heuristic_is_consistent():
+    """A aproximação equiretangular nunca passa do haversine nem da aresta + h do vizinho"""
+    import random
+    from unima_projeto_ed.Dijkstra import Dijkstra
+    from unima_projeto_ed.heuristics import bind_heuristic
+
+    rng = random.Random(3)
+    # Pontos espalhados em ~50 km ao redor de Maceió, ligados aos vizinhos mais próximos
+    nodes = {i: (-9.9 + rng.random() * 0.5, -35.95 + rng.random() * 0.5) for i in range(300)}
+    wg = WeightedDirectedGraph()
+    for i in nodes:
+        closest = sorted(nodes, key=lambda j: haversine(nodes[i], nodes[j]))[1:4]
+        for j in closest:
+            wg.add_undirected_edge(i, j, haversine(nodes[i], nodes[j]))
+
+    for goal in rng.sample(sorted(nodes), 10):
+        h = bind_heuristic('equirectangular', goal, nodes)
+        for u in nodes:
+            assert h[u] <= haversine(nodes[u], nodes[goal])
+            for v, w in wg.edges[u].items():
+                assert h[u] <= w + h[v]
+        for source in rng.sample(sorted(nodes), 20):
+            expected = Dijkstra(wg, source, goal, quiet=True).distance
+            assert a_star(wg, source, goal, nodes, queue='radix', heuristic='equirectangular')[1] == \
+                pytest.approx(expected)
+
+
+def test_graph_binary_roundtrip(tmp_path):
+    """Testa gravar o grafo no formato binário e abrir de novo com mmap"""
+    from unima_projeto_ed.graph_io import save_graph, load_graph
+    from unima_projeto_ed.Dijkstra import Dijkstra
+
+    nodes = {
+        10: (-9.6379, -35.7062),
+        20: (-9.6378, -35.7062),
+        30: (-9.6377, -35.7061),
+        40: (-9.6300, -35.7000),
+    }
+    ways = [[10, 20, 30], [30, 40]]
+    csr = CSRGraph.from_osm_data(nodes, ways)
+    path = tmp_path / "grafo.bin"
+    save_graph(csr, path)
+    loaded = load_graph(path)
+
+    assert loaded.get_vertices() == csr.get_vertices()
+    assert loaded.edge_count() == csr.edge_count()
+    assert list(loaded.offsets) == list(csr.offsets)
+    assert list(loaded.targets) == list(csr.targets)
+    # Pesos gravados em float32
+    assert list(loaded.weights) == pytest.approx(list(csr.weights), rel=1e-6)
+    assert loaded.coordinates_at(loaded.index_of(40)) == nodes[40]
+
+    assert a_star(loaded, 10, 40, None, heuristic='haversine')[0] == [10, 20, 30, 40]
+    assert Dijkstra(loaded, 10, 40, quiet=True).distance == pytest.approx(
+        Dijkstra(csr, 10, 40, quiet=True).distance, rel=1e-6)
+
+    # WeightedDirectedGraph é convertido; as coordenadas vêm do dicionário
+    wg = build_graph(nodes, ways, backend='weighted')
+    save_graph(wg, path, coordinates=nodes)
+    loaded = load_graph(path)
+    assert loaded.vertex_count() == wg.vertex_count()
+    assert loaded.get_weight(30, 40) == pytest.approx(wg.get_weight(30, 40), rel=1e-6)
+    assert loaded.coordinates_at(loaded.index_of(10)) == nodes[10]
+
+
+def test_graph_binary_resave_while_loaded(tmp_path):
+    """Gravar de novo o arquivo não afeta quem já abriu a versão anterior com mmap"""
+    import os
+    from unima_projeto_ed.graph_io import save_graph, load_graph
+
+    nodes = {1: (-9.6379, -35.7062), 2: (-9.6378, -35.7062), 3: (-9.6300, -35.7000)}
+    path = tmp_path / "grafo.bin"
+    save_graph(CSRGraph.from_osm_data(nodes, [[1, 2]]), path)
+    mode = os.stat(path).st_mode
+    old = load_graph(path)
+
+    # Grafo menor no mesmo caminho: o arquivo antigo truncado derrubaria o leitor (SIGBUS)
+    save_graph(CSRGraph.from_osm_data({1: nodes[1], 3: nodes[3]}, [[1, 3]]), path)
+    assert old.coordinates[-1] == nodes[2][1]
+    assert old.get_weight(1, 2) == pytest.approx(haversine(nodes[1], nodes[2]), rel=1e-6)
+    assert load_graph(path).get_vertices() == [1, 3]
+    assert os.stat(path).st_mode == mode
+    assert [p.name for p in tmp_path.iterdir()] == ["grafo.bin"]
+
+
+def test_graph_binary_errors(tmp_path):
+    """Testa os erros do formato binário"""
+    from unima_projeto_ed.graph_io import save_graph, load_graph
+
+    wg = WeightedDirectedGraph()
+    wg.add_undirected_edge('A', 'B', 1)
+    with pytest.raises(ValueError):
+        save_graph(wg, tmp_path / "nomes.bin")
+
+    wg = WeightedDirectedGraph()
+    wg.add_undirected_edge(1, 2, 1.5)
+    path = tmp_path / "grafo.bin"
+    save_graph(wg, path)
+    data = path.read_bytes()
+
+    (tmp_path / "magic.bin").write_bytes(b'X' + data[1:])
+    with pytest.raises(ValueError, match="not a graph file"):
+        load_graph(tmp_path / "magic.bin")
+    (tmp_path / "version.bin").write_bytes(data[:8] + (99).to_bytes(4, 'little') + data[12:])
+    with pytest.raises(ValueError, match="version"):
+        load_graph(tmp_path / "version.bin")
+    (tmp_path / "truncated.bin").write_bytes(data[:-8])
+    with pytest.raises(ValueError, match="truncated"):
+        load_graph(tmp_path / "truncated.bin")
+    (tmp_path / "empty.bin").write_bytes(b'')
+    with pytest.raises(ValueError):
+        load_graph(tmp_path / "empty.bin")
+
+
+def test_spatial_index_nearest():
+    """Testa as consultas de vizinho mais próximo contra uma busca exaustiva"""
+    import random
+    from unima_projeto_ed.spatial_index import SpatialIndex
+    from unima_projeto_ed.heuristics import _haversine_to
+
+    nodes = {i: (-9.66 + random.random() * 0.05, -35.76 + random.random() * 0.05) for i in range(300)}
+    index = SpatialIndex(nodes)
+    assert len(index) == 300
+
+    for _ in range(50):
+        lat, lon = -9.67 + random.random() * 0.07, -35.77 + random.random() * 0.07
+        distance_to = _haversine_to((lat, lon))
+        expected = sorted(distance_to(nodes[n]) for n in nodes)
+
+        node, distance = index.nearest(lat, lon)
+        assert distance == pytest.approx(expected[0], rel=1e-3)
+        assert distance_to(nodes[node]) == pytest.approx(expected[0], rel=1e-3)
+        assert [d for _, d in index.k_nearest(lat, lon, 5)] == pytest.approx(expected[:5], rel=1e-3)
+        # A projeção do índice difere do haversine em ~1e-4: só os pontos na borda podem divergir
+        assert sum(1 for d in expected if d <= 499.9) <= len(index.within(lat, lon, 500)) <= \
+            sum(1 for d in expected if d <= 500.1)
+
+    with pytest.raises(IndexError):
+        SpatialIndex({}).nearest(0, 0)
+
+
+def test_spatial_index_nearest_edge():
+    """Testa o ajuste de um ponto à aresta mais próxima"""
+    from unima_projeto_ed.spatial_index import SpatialIndex
+    from unima_projeto_ed.grafo import simplify_graph
+
+    nodes = {
+        1: (-9.6400, -35.7100),
+        2: (-9.6400, -35.7080),
+        3: (-9.6400, -35.7060),
+        4: (-9.6380, -35.7060),
+    }
+    # 1 - 2 - 3 é mão única (1 -> 3); 3 - 4 é mão dupla
+    wg = build_graph(nodes, [[1, 2, 3], [3, 4]], backend='weighted',
+                     tags=[{'oneway': 'yes'}, {}])
+    index = SpatialIndex(nodes, wg)
+
+    # Um pouco ao norte do meio do trecho 1 -> 2
+    snap = index.nearest_edge(-9.6399, -35.7090)
+    assert (snap.source, snap.target) == (1, 2)
+    assert snap.point == pytest.approx((-9.6400, -35.7090))
+    assert snap.distance == pytest.approx(haversine((-9.6399, -35.7090), (-9.6400, -35.7090)), rel=1e-3)
+    assert snap.fraction == pytest.approx(0.5)
+
+    # No grafo simplificado o trecho é parte da aresta 1 -> 3
+    snap = SpatialIndex(nodes, simplify_graph(wg, keep=[1, 4])).nearest_edge(-9.6399, -35.7090)
+    assert (snap.source, snap.target) == (1, 3)
+    assert snap.fraction == pytest.approx(0.25, rel=1e-3)
+
+    # CSR usa as próprias coordenadas; sem grafo não há nearest_edge
+    csr = CSRGraph.from_osm_data(nodes, [[3, 4]])
+    assert SpatialIndex(graph=csr).nearest(-9.6381, -35.7061)[0] == 4
+    with pytest.raises(ValueError):
+        SpatialIndex(nodes).nearest_edge(-9.64, -35.71)
+
+
+def test_dijkstra_targets_early_termination():
+    """Testa o Dijkstra um-para-muitos, que para quando todos os destinos são finalizados"""
+    from unima_projeto_ed.Dijkstra import Dijkstra
+
+    wg = _grid_graph(10)
+    full = Dijkstra(wg, (0, 0), quiet=True)
+    for graph in (wg, CSRGraph.from_weighted_graph(wg)):
+        partial = Dijkstra(graph, (0, 0), quiet=True, targets={(0, 1), (1, 1)})
+        assert partial.settled < full.settled
+        for target in ((0, 1), (1, 1)):
+            assert partial.distance_to(target) == full.distance_to(target)
+            assert partial.path_to(target) == full.path_to(target)
+
+
+def test_shortest_paths_batch():
+    """Testa o roteamento em lote contra o A* par a par"""
+    import random
+    from unima_projeto_ed.routing import shortest_paths_batch
+
+    wg = _grid_graph(8)
+    wg.add_vertex('isolado')
+    coordinates = {v: v for v in wg.get_vertices() if v != 'isolado'}
+    coordinates['isolado'] = (50, 50)
+    vertices = sorted(v for v in wg.get_vertices() if v != 'isolado')
+    sources = random.sample(vertices, 3)
+    pairs = [(random.choice(sources), random.choice(vertices)) for _ in range(40)]
+    pairs += [(sources[0], 'isolado'), (sources[1], sources[1])]
+
+    for graph in (wg, CSRGraph.from_weighted_graph(wg)):
+        results = shortest_paths_batch(graph, pairs)
+        assert len(results) == len(pairs)
+        for (source, target), (path, distance) in zip(pairs[:-2], results):
+            assert distance == pytest.approx(a_star(wg, source, target, coordinates)[1])
+            assert path[0] == source and path[-1] == target
+        assert results[-2] == ([], float('inf'))
+        assert results[-1] == ([sources[1]], 0)
+
+
+def test_route_cache_lru_and_limits():
+    """Testa o cache LRU de rotas: acertos, descarte do menos usado e limite em bytes"""
+    from unima_projeto_ed.route_cache import RouteCache
+
+    cache = RouteCache(max_entries=2)
+    cache.put(('a', 'b', 'a_star'), (('a', 'b'), 1.0))
+    cache.put(('a', 'c', 'a_star'), (('a', 'c'), 2.0))
+    assert cache.get(('a', 'b', 'a_star')) == (('a', 'b'), 1.0)
+    # ('a', 'c') é o menos usado e sai quando entra uma terceira rota
+    cache.put(('b', 'c', 'a_star'), (('b', 'c'), 3.0))
+    assert ('a', 'c', 'a_star') not in cache
+    assert cache.get(('a', 'c', 'a_star')) is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (1, 1, 1, 2)
+    assert stats['hit_rate'] == 0.5
+    assert stats['bytes'] > 0
+
+    calls = []
+    compute = lambda: calls.append(1) or ((1, 2, 3), 4.0)
+    assert cache.get_or_compute((1, 3, 'dijkstra'), compute) == ((1, 2, 3), 4.0)
+    assert cache.get_or_compute((1, 3, 'dijkstra'), compute) == ((1, 2, 3), 4.0)
+    assert len(calls) == 1
+
+    # Limite em bytes: caminhos longos expulsam os antigos, e o total nunca passa do limite
+    small = RouteCache(max_entries=None, max_bytes=2000)
+    for i in range(20):
+        small.put((i, i + 1, 'a_star'), (tuple(range(50)), float(i)))
+        assert small.bytes <= 2000
+    assert 0 < len(small) < 20
+    assert small.stats()['evictions'] == 20 - len(small)
+    small.clear()
+    assert len(small) == 0 and small.bytes == 0
+
+
+def test_route_cache_graph_version():
+    """Testa a invalidação do cache de rotas quando o grafo muda"""
+    from unima_projeto_ed.route_cache import RouteCache
+    from unima_projeto_ed.routing import RoutingService
+
+    wg = _grid_graph(5)
+    version = wg.version
+    wg.add_edges_from([((0, 0), (4, 4), 1000)])
+    assert wg.version > version
+    version = wg.version
+    wg.remove_edge('x', 'y')  # aresta inexistente: nada muda
+    assert wg.version == version
+
+    coordinates = {v: (v[0] * 0.001, v[1] * 0.001) for v in wg.get_vertices()}
+    # Pesos da grade em "quarteirões": a heurística euclidiana é admissível nessa escala
+    service = RoutingService(wg, coordinates, heuristic='planar', route_cache=RouteCache())
+    cache = service.route_cache
+    first = service.route((0, 0), (0.004, 0.004))
+    assert service.route((0, 0), (0.004, 0.004))['path'] == first['path']
+    assert cache.stats()['hits'] == 1
+    batch = service.route_batch([((0, 0), (0.004, 0.004))] * 2 + [((0, 0), (0.001, 0.0))])
+    assert batch[0]['distance'] == pytest.approx(first['distance'])
+    assert service.route_batch([((0, 0), (0.001, 0.0))])[0]['path'] == [(0, 0), (1, 0)]
+    assert service.stats()['route_cache']['hits'] == 2
+
+    # Uma aresta nova muda a melhor rota: o resultado guardado não pode ser reaproveitado
+    wg.add_edge((0, 0), (4, 4), 1.0)
+    assert service.route((0, 0), (0.004, 0.004))['path'] == [(0, 0), (4, 4)]
+    assert cache.stats()['invalidations'] == 3
+    wg.remove_edge((0, 0), (4, 4))
+    assert service.route((0, 0), (0.004, 0.004))['distance'] == pytest.approx(first['distance'])
+
+
+def test_query_pool_shared_memory():
+    """Testa as consultas em processos com o grafo em memória compartilhada"""
+    from unima_projeto_ed.query_pool import QueryPool
+    from unima_projeto_ed.routing import RoutingService, shortest_paths_batch
+
+    nodes = {r * 6 + c: (-9.64 + r * 0.001, -35.71 + c * 0.0012) for r in range(6) for c in range(6)}
+    ways = [[r * 6 + c for c in range(6)] for r in range(6)] + [[r * 6 + c for r in range(6)] for c in range(6)]
+    nodes[99] = (-9.60, -35.60)
+    wg = build_graph(nodes, ways, backend='weighted')
+    wg.add_vertex(99)
+    pairs = [(0, 35), (0, 7), (12, 5), (0, 99), (3, 3), (12, 0)]
+    expected = shortest_paths_batch(wg, pairs)
+    # Comprimento de um caminho no grafo original (a malha tem empates entre caminhos)
+    length = lambda path: sum(wg.get_weight(u, v) for u, v in zip(path, path[1:]))
+
+    with pytest.raises(ValueError):
+        QueryPool(_grid_graph(3), processes=1)
+
+    with QueryPool(wg, nodes, processes=2) as pool:
+        assert pool.nbytes > 0
+        # Os pesos ficam em float32 na memória compartilhada
+        for (path, distance), (expected_path, expected_distance) in zip(pool.route_batch(pairs), expected):
+            assert distance == pytest.approx(expected_distance, rel=1e-6)
+            assert path[:1] + path[-1:] == expected_path[:1] + expected_path[-1:]
+            assert length(path) == pytest.approx(expected_distance if path else 0)
+        assert pool.route(0, 35)[1] == pytest.approx(expected[0][1], rel=1e-6)
+        assert pool.route(0, 99) == ([], float('inf'))
+
+        service = RoutingService(wg, nodes, pool=pool)
+        plain = RoutingService(wg, nodes)
+        route = service.route(nodes[0], nodes[35])
+        assert route['path'][-1] == 35
+        assert route['distance'] == pytest.approx(plain.route(nodes[0], nodes[35])['distance'], rel=1e-6)
+        batch = service.route_batch([(nodes[0], nodes[7]), (nodes[12], nodes[5])])
+        assert [length(r['path']) for r in batch] == pytest.approx([expected[1][1], expected[2][1]])
+        assert service.stats()['workers'] == 2
+
+
+def test_search_stats_counters_and_hooks():
+    """Testa os contadores e ganchos do SearchStats no Dijkstra e no A*"""
+    from unima_projeto_ed.Dijkstra import Dijkstra
+    from unima_projeto_ed.search_stats import SearchStats
+
+    wg = _grid_graph(8)
+    csr = CSRGraph.from_weighted_graph(wg)
+    coordinates = {v: v for v in wg.get_vertices()}
+    expected = Dijkstra(wg, (0, 0), (7, 7), quiet=True)
+
+    for graph in (wg, csr):
+        for queue in ('heapq', 'binary', 'pairing'):
+            settled, relaxed = [], []
+            stats = SearchStats(on_settle=lambda v, d: settled.append((v, d)),
+                                on_relax=lambda u, v, d: relaxed.append((u, v, d)))
+            result = Dijkstra(graph, (0, 0), (7, 7), queue=queue, quiet=True, stats=stats)
+            assert result.distance == pytest.approx(expected.distance)
+            assert stats.searches == 1 and stats.elapsed > 0
+            assert stats.settled == result.settled == len(settled)
+            assert stats.pops == stats.settled + stats.stale_pops
+            assert stats.pushes == stats.relaxations + 1
+            assert 0 < stats.max_heap_size <= stats.pushes
+            # Os ganchos recebem os ids originais e as distâncias finais, em ordem crescente
+            assert settled[0] == ((0, 0), 0) and settled[-1][0] == (7, 7)
+            assert [d for _, d in settled] == sorted(d for _, d in settled)
+            assert all(d == pytest.approx(result.distance_to(v)) for v, d in settled)
+            assert len(relaxed) == stats.relaxations and relaxed[0][0] == (0, 0)
+
+    # A* explora menos que o Dijkstra; os contadores se acumulam entre buscas
+    expected = Dijkstra(wg, (0, 0), (0, 7), quiet=True)
+    stats = SearchStats()
+    path, distance = a_star(wg, (0, 0), (0, 7), coordinates, stats=stats)
+    assert distance == pytest.approx(expected.distance)
+    assert len(path) <= stats.settled < expected.settled
+    first = stats.as_dict()
+    a_star(csr, (0, 0), (0, 7), coordinates, stats=stats)
+    assert stats.searches == 2 and stats.settled == 2 * first['settled']
+    bidirectional = SearchStats()
+    assert a_star(wg, (0, 0), (0, 7), coordinates, bidirectional=True, stats=bidirectional)[1] == \
+        pytest.approx(expected.distance)
+    assert bidirectional.settled > 0
+    stats.reset()
+    assert stats.as_dict() == dict.fromkeys(SearchStats.FIELDS, 0)
+
+
+@pytest.mark.parametrize('queue', sorted(QUEUE_BACKENDS))
+def test_search_stats_reopened_vertex(queue):
+    """Vértice reaberto pelo A* (heurística inconsistente) é uma nova expansão, não uma entrada velha"""
+    from unima_projeto_ed.search_stats import SearchStats
+
+    wg = WeightedDirectedGraph()
+    for u, v, w in [('S', 'A', 5), ('S', 'B', 1), ('B', 'A', 1), ('A', 'G', 20)]:
+        wg.add_edge(u, v, w)
+    # Admissível, mas não consistente: h(B) = 10 > w(B, A) + h(A)
+    inconsistent = lambda node, goal, coordinates: 10 if node == 'B' else 0
+
+    settled, relaxed = [], []
+    stats = SearchStats(on_settle=lambda v, d: settled.append((v, d)),
+                        on_relax=lambda u, v, d: relaxed.append((u, v, d)))
+    path = a_star(wg, 'S', 'G', None, queue=queue, heuristic=inconsistent, stats=stats)
+    assert path == (['S', 'B', 'A', 'G'], 22)
+    # A é finalizado com 5, reaberto por B com 2 e expandido de novo
+    assert settled == [('S', 0), ('A', 5), ('B', 1), ('A', 2), ('G', 22)]
+    assert relaxed == [('S', 'A', 5), ('S', 'B', 1), ('A', 'G', 25), ('B', 'A', 2), ('A', 'G', 22)]
+    assert (stats.pops, stats.settled, stats.stale_pops, stats.relaxations) == (5, 5, 0, 5)
+
+
+def test_metrics_thread_shards():
+    """Testa a soma das métricas de várias threads, inclusive das que já terminaram"""
+    import threading
+    from unima_projeto_ed.metrics import Metrics
+
+    metrics = Metrics(buckets=(0.01, 0.1))
+
+    def work():
+        for seconds in (0.005, 0.05, 0.5):
+            metrics.observe_request('/route', 'GET', 200, seconds)
+        metrics.search_stats().searches += 1
+        metrics.search_stats().max_heap_size = 7
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.observe_request('/route', 'POST', 405, 0.001)
+
+    total = metrics.snapshot()
+    # Os shards das threads encerradas foram recolhidos; sobra só o da thread atual
+    assert len(metrics._shards) == 1
+    assert total.requests == {('/route', 'GET', '200'): 12, ('/route', 'POST', '405'): 1}
+    assert total.latency['/route'][:3] == [5, 4, 4]
+    assert total.latency['/route'][3] == pytest.approx(4 * 0.555 + 0.001)
+    assert total.search.searches == 4 and total.search.max_heap_size == 7
+    # Uma segunda leitura não conta os recolhidos de novo
+    assert metrics.snapshot().requests == total.requests
+
+    text = metrics.render()
+    assert 'unima_http_request_duration_seconds_bucket{route="/route",le="0.1"} 9' in text
+    assert 'unima_http_request_duration_seconds_bucket{route="/route",le="+Inf"} 13' in text
+    assert 'unima_search_total 4' in text
+    assert 'unima_graph_vertices' not in text
@@ -7,6 +7,8 @@ import numpy as np
 import warnings
 from unima_projeto_ed.Dijkstra import Graph, Vertex, Edge, Dijkstra
 from unima_projeto_ed.a_star import a_star
+from unima_projeto_ed.priority_queue import QUEUE_BACKENDS
+from unima_projeto_ed.search_stats import SearchStats
 
 # Suprimir warnings específicos
 warnings.filterwarnings("ignore", category=DeprecationWarning)
@@ -126,7 +128,7 @@ def setup_graphs_different_sizes():
     
     return graphs_data
 
-def test_performance_vs_graph_size(setup_graphs_different_sizes):
+def test_performance_vs_graph_size(setup_graphs_different_sizes, tmp_path):
     """Teste para gerar dados do gráfico: Tempo vs Tamanho do Grafo"""
     print("\n=== COLETANDO DADOS: TEMPO vs TAMANHO DO GRAFO ===")
     
@@ -151,7 +153,8 @@ def test_performance_vs_graph_size(setup_graphs_different_sizes):
                 start_time = time.perf_counter()
                 Dijkstra(graph_data['graph_obj'],
                         next(v for v in vertices if v.value == start),
-                        next(v for v in vertices if v.value == end))
+                        next(v for v in vertices if v.value == end),
+                        quiet=True)
                 dijkstra_time = time.perf_counter() - start_time
                 dijkstra_times_for_size.append(dijkstra_time)
                 
@@ -181,7 +184,7 @@ def test_performance_vs_graph_size(setup_graphs_different_sizes):
         'astar_tempos': astar_times
     }
     
-    with open('dados_tempo_vs_tamanho.json', 'w', encoding='utf-8') as f:
+    with open(tmp_path / 'dados_tempo_vs_tamanho.json', 'w', encoding='utf-8') as f:
         json.dump(tempo_vs_tamanho_data, f, indent=2, ensure_ascii=False)
     
     # Gerar gráfico
@@ -193,14 +196,14 @@ def test_performance_vs_graph_size(setup_graphs_different_sizes):
     plt.title('Tempo de Execução vs. Tamanho do Grafo')
     plt.legend()
     plt.grid(True, alpha=0.3)
-    plt.savefig('grafico_tempo_vs_tamanho.png', dpi=300, bbox_inches='tight')
+    plt.savefig(tmp_path / 'grafico_tempo_vs_tamanho.png', dpi=300, bbox_inches='tight')
     plt.close()
     
-    print("✓ Gráfico salvo: grafico_tempo_vs_tamanho.png")
+    print(f"✓ Gráfico salvo: {tmp_path / 'grafico_tempo_vs_tamanho.png'}")
     
     assert len(size_data) > 0, "Deveria ter coletado dados para pelo menos um tamanho"
 
-def test_nodes_explored_comparison(setup_graph_AZ):
+def test_nodes_explored_comparison(setup_graph_AZ, tmp_path):
     """Teste para comparar número de nós explorados"""
     print("\n=== COLETANDO DADOS: NÓS EXPLORADOS ===")
     
@@ -219,28 +222,37 @@ def test_nodes_explored_comparison(setup_graph_AZ):
     
     for start, end in test_pairs:
         try:
-            # Para Dijkstra - estimativa baseada no tamanho do grafo
-            dijkstra_nodes = len(graph_data['graph_obj'].adjacency_list)
+            # Dijkstra - vértices realmente finalizados, contados pelo SearchStats
+            dijkstra_stats = SearchStats()
+            Dijkstra(graph_data['graph_obj'],
+                     next(v for v in vertices if v.value == start),
+                     next(v for v in vertices if v.value == end),
+                     quiet=True, stats=dijkstra_stats)
+            dijkstra_nodes = dijkstra_stats.settled
             
-            # Para A* - baseado no caminho encontrado
-            path, distance = a_star(graph_data['graph_dict'], start, end, graph_data['coordinates'])
-            astar_nodes = len(path) + len(graph_data['graph_dict']) // 4  # Estimativa realista
+            # A* - idem
+            astar_stats = SearchStats()
+            path, distance = a_star(graph_data['graph_dict'], start, end, graph_data['coordinates'],
+                                    stats=astar_stats)
+            astar_nodes = astar_stats.settled
             
             nodes_data.append({
                 'par': f"{start}-{end}",
                 'dijkstra_nodes': dijkstra_nodes,
                 'astar_nodes': astar_nodes,
+                'dijkstra_stats': dijkstra_stats.as_dict(),
+                'astar_stats': astar_stats.as_dict(),
                 'caminho_tamanho': len(path),
                 'distancia': distance
             })
             
-            print(f"Par {start}-{end}: Dijkstra≈{dijkstra_nodes} nós, A*≈{astar_nodes} nós, Caminho={len(path)} vértices")
+            print(f"Par {start}-{end}: Dijkstra={dijkstra_nodes} nós, A*={astar_nodes} nós, Caminho={len(path)} vértices")
         except Exception as e:
             print(f"Erro no par {start}-{end}: {e}")
             continue
     
     # Salvar dados
-    with open('dados_nos_explorados.json', 'w', encoding='utf-8') as f:
+    with open(tmp_path / 'dados_nos_explorados.json', 'w', encoding='utf-8') as f:
         json.dump(nodes_data, f, indent=2, ensure_ascii=False)
     
     if nodes_data:
@@ -257,7 +269,7 @@ def test_nodes_explored_comparison(setup_graph_AZ):
         bars2 = plt.bar(x + width/2, astar_nodes, width, label='A*', alpha=0.7, color='red')
         
         plt.xlabel('Pares de Vértices')
-        plt.ylabel('Número de Nós Explorados (estimado)')
+        plt.ylabel('Número de Nós Explorados')
         plt.title('Comparação de Nós Explorados: Dijkstra vs A*')
         plt.xticks(x, pares)
         plt.legend()
@@ -271,14 +283,18 @@ def test_nodes_explored_comparison(setup_graph_AZ):
             plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 2, str(value), 
                     ha='center', va='bottom', fontweight='bold')
         
-        plt.savefig('grafico_nos_explorados.png', dpi=300, bbox_inches='tight')
+        plt.savefig(tmp_path / 'grafico_nos_explorados.png', dpi=300, bbox_inches='tight')
         plt.close()
         
-        print("✓ Gráfico salvo: grafico_nos_explorados.png")
+        print(f"✓ Gráfico salvo: {tmp_path / 'grafico_nos_explorados.png'}")
     
     assert len(nodes_data) > 0, "Deveria ter coletado dados para pelo menos um par"
+    for data in nodes_data:
+        # Toda busca finaliza pelo menos os vértices do caminho encontrado
+        assert data['dijkstra_nodes'] >= data['caminho_tamanho']
+        assert data['astar_nodes'] >= data['caminho_tamanho']
 
-def test_performance_analysis_AZ(setup_graph_AZ):
+def test_performance_analysis_AZ(setup_graph_AZ, tmp_path):
     """Análise de performance para grafo A-Z"""
     N = 20  # Reduzido para testes mais rápidos
     random.seed(42)
@@ -297,7 +313,8 @@ def test_performance_analysis_AZ(setup_graph_AZ):
             inicio = time.perf_counter()
             Dijkstra(graph_data['graph_obj'],
                     next(v for v in graph_data['vertices'] if v.value == start),
-                    next(v for v in graph_data['vertices'] if v.value == end))
+                    next(v for v in graph_data['vertices'] if v.value == end),
+                    quiet=True)
             tempo_dijkstra = time.perf_counter() - inicio
             tempos_dijkstra.append(tempo_dijkstra)
             
@@ -330,7 +347,7 @@ def test_performance_analysis_AZ(setup_graph_AZ):
             }
         }
         
-        with open('dados_performance_AZ.json', 'w', encoding='utf-8') as f:
+        with open(tmp_path / 'dados_performance_AZ.json', 'w', encoding='utf-8') as f:
             json.dump(dados_exportacao, f, indent=2, ensure_ascii=False)
         
         print(f"\n✓ Performance A-Z: {successful_pairs} pares válidos")
@@ -355,16 +372,78 @@ def test_algorithm_correctness_AZ(setup_graph_AZ):
             assert caminho[-1] == end, f"A* caminho não termina em {end}"
             assert distancia < float('inf'), f"A* retornou distância infinita para {start}-{end}"
             
-            # Dijkstra deve executar sem erro
-            Dijkstra(graph_data['graph_obj'],
-                    next(v for v in graph_data['vertices'] if v.value == start),
-                    next(v for v in graph_data['vertices'] if v.value == end))
+            # Dijkstra deve encontrar a mesma distância
+            resultado = Dijkstra(graph_data['graph_obj'],
+                                 next(v for v in graph_data['vertices'] if v.value == start),
+                                 next(v for v in graph_data['vertices'] if v.value == end),
+                                 quiet=True)
+            assert resultado.distance == pytest.approx(distancia), f"Distâncias diferentes para {start}-{end}"
+            assert [v.value for v in resultado.path][0] == start
+            assert [v.value for v in resultado.path][-1] == end
             
             print(f"✓ Par {start}-{end}: Ambos algoritmos funcionaram")
             
         except Exception as e:
             pytest.fail(f"Falha no par {start}-{end}: {e}")
 
+def test_queue_backends_AZ(setup_graph_AZ):
+    """Compara o tempo do A* com cada implementação de fila de prioridade"""
+    graph_data = setup_graph_AZ
+    vertices_str = [v.value for v in graph_data['vertices']]
+    random.seed(42)
+    pares = [random.sample(vertices_str, 2) for _ in range(20)]
+
+    resultados = {}
+    for backend in sorted(QUEUE_BACKENDS):
+        inicio = time.perf_counter()
+        distancias = [a_star(graph_data['graph_dict'], s, e, graph_data['coordinates'], queue=backend)[1]
+                      for s, e in pares]
+        resultados[backend] = (time.perf_counter() - inicio, distancias)
+        print(f"{backend}: {resultados[backend][0]:.6f}s")
+
+    referencia = resultados['binary'][1]
+    for backend, (_, distancias) in resultados.items():
+        assert distancias == pytest.approx(referencia), f"{backend} divergiu da fila binária"
+
+def test_benchmark_suite_smoke(tmp_path):
+    """Roda o benchmark com grafos pequenos e confere o JSON gerado"""
+    from unima_projeto_ed import benchmark
+
+    # Mesma semente, mesmo grafo
+    a, b = benchmark.grid_graph(400, seed=7), benchmark.grid_graph(400, seed=7)
+    assert a.coordinates == b.coordinates and a.sources == b.sources
+    assert a.vertex_count() == 400
+    geometric = benchmark.random_geometric_graph(500, seed=7)
+    assert geometric.vertex_count() == 500
+    assert 3 < geometric.edge_count() / 500 < 9  # cerca de 6 vizinhos por ponto
+    assert benchmark.percentile([1, 2, 3, 4], 50) == 2.5
+
+    output = tmp_path / 'benchmark.json'
+    status = benchmark.main(['--sizes', '200', '--queries', '5', '--repeat', '2', '--warmup', '1',
+                             '--algorithms', 'dijkstra', 'a_star', 'bidirectional_a_star', 'ch',
+                             '--queues', 'heapq', 'binary', '4-ary', '--output', str(output)])
+    assert status == 0
+    report = json.loads(output.read_text())
+    assert report['meta']['seed'] == 0
+    results = report['results']
+    assert {r['graph'] for r in results} == {'grid', 'geometric'}
+    assert {(r['algorithm'], r['backend']) for r in results} >= {('dijkstra', 'csr'), ('a_star', 'weighted'), ('ch', 'weighted')}
+    for result in results:
+        assert 'error' not in result
+        assert result['mismatches'] == 0, result
+        assert result['time']['samples'] == 10
+        assert result['time']['min'] <= result['time']['p50'] <= result['time']['p99'] <= result['time']['max']
+
+    # Comparação entre execuções: um resultado 3x mais lento é uma regressão
+    slower = json.loads(output.read_text())
+    slower['results'][0]['time']['p50'] *= 3
+    regressions = benchmark.compare(report, slower)
+    assert len(regressions) == 1 and regressions[0]['ratio'] == pytest.approx(3)
+    assert benchmark.main(['--sizes', '200', '--graphs', 'grid', '--queries', '2', '--repeat', '1',
+                           '--output', str(tmp_path / 'again.json'), '--baseline', str(output),
+                           '--threshold', '1000']) == 0
+
+
 if __name__ == "__main__":
     # Executar todos os testes
     pytest.main([__file__, "-v", "-s", "-W", "ignore::DeprecationWarning"])
\ No newline at end of file
@@ -27,6 +27,67 @@ def test_build_graph():
     assert G.has_edge(2, 3)
     assert G.has_edge(3, 2)
 
+@pytest.mark.parametrize("tags, expected", [
+    ({'oneway': 'yes'}, 1),
+    ({'oneway': 'true'}, 1),
+    ({'oneway': '1'}, 1),
+    ({'oneway': '-1'}, -1),
+    ({'oneway': 'reverse'}, -1),
+    ({'oneway': 'no'}, 0),
+    ({'junction': 'roundabout'}, 1),
+    ({'highway': 'motorway'}, 1),
+    ({'highway': 'motorway', 'oneway': 'no'}, 0),
+    ({'highway': 'residential'}, 0),
+    ({}, 0),
+])
+def test_oneway_direction(tags, expected):
+    assert grafo.oneway_direction(tags) == expected
+
+@pytest.mark.parametrize("backend", ["networkx", "weighted", "csr"])
+def test_build_graph_respects_oneway(backend):
+    nodes = {
+        1: (-9.6379, -35.7062),
+        2: (-9.6378, -35.7062),
+        3: (-9.6377, -35.7062),
+        4: (-9.6376, -35.7062),
+    }
+    ways = [[1, 2], [2, 3], [3, 4]]
+    tags = [{'oneway': 'yes'}, {'oneway': '-1'}, {}]
+
+    G = grafo.build_graph(nodes, ways, backend=backend, tags=tags)
+    has_edge = G.has_edge
+    assert has_edge(1, 2) and not has_edge(2, 1)
+    assert has_edge(3, 2) and not has_edge(2, 3)
+    assert has_edge(3, 4) and has_edge(4, 3)
+
+def test_build_graph_simplify():
+    nodes = {
+        1: (-9.6379, -35.7062),
+        2: (-9.6378, -35.7062),
+        3: (-9.6377, -35.7062),
+        4: (-9.6376, -35.7062),
+    }
+    ways = [[1, 2, 3, 4]]
+
+    G = grafo.build_graph(nodes, ways, backend='weighted', simplify=True)
+    assert G.vertex_count() == 2
+    assert G.edge_count() == 2
+    assert G.get_weight(1, 4) == pytest.approx(sum(grafo.haversine(nodes[a], nodes[a + 1]) for a in (1, 2, 3)))
+    assert G.expand_path([4, 1]) == [4, 3, 2, 1]
+
+    # Mão única também é simplificada, só no sentido permitido
+    G = grafo.build_graph(nodes, ways, backend='weighted', tags=[{'oneway': 'yes'}], simplify=True, keep=[3])
+    assert sorted(G.get_vertices()) == [1, 3, 4]
+    assert G.has_edge(1, 3) and not G.has_edge(3, 1)
+    assert G.expand_path([1, 3, 4]) == [1, 2, 3, 4]
+
+    with pytest.raises(ValueError):
+        grafo.build_graph(nodes, ways, simplify=True)
+
+def test_build_graph_unknown_backend():
+    with pytest.raises(ValueError):
+        grafo.build_graph({}, [], backend='igraph')
+
 @patch('unima_projeto_ed.data.requests.get')
 def test_get_osm_data(mock_get):
     mock_response = MagicMock()
@@ -49,6 +110,202 @@ def test_get_osm_data(mock_get):
     assert 2 in nodes
     assert ways[0] == [1, 2]
 
+    mock_response.json.return_value['elements'][2]['tags'] = {'highway': 'primary', 'oneway': 'yes'}
+    nodes, ways, tags = data.get_osm_data(bbox, with_tags=True)
+    assert tags == [{'highway': 'primary', 'oneway': 'yes'}]
+
+def _overpass_response():
+    mock_response = MagicMock()
+    mock_response.json.return_value = {
+        'elements': [
+            {'type': 'node', 'id': 1, 'lat': -9.6379, 'lon': -35.7062},
+            {'type': 'node', 'id': 2, 'lat': -9.6378, 'lon': -35.7062},
+            {'type': 'way', 'nodes': [1, 2], 'tags': {'highway': 'residential'}}
+        ]
+    }
+    mock_response.raise_for_status.return_value = None
+    return mock_response
+
+@patch('unima_projeto_ed.data.requests.get')
+def test_get_osm_data_cache(mock_get, tmp_path):
+    import os
+    mock_get.return_value = _overpass_response()
+    cache = data.OverpassCache(tmp_path, ttl=60)
+    bbox = [-9.6379, -35.7062, -9.6339, -35.7022]
+
+    first = data.get_osm_data(bbox, cache=cache)
+    # Mesmo bbox escrito de outro jeito: a resposta vem do cache, sem nova consulta
+    second = data.get_osm_data([-9.63790, -35.7062, -9.6339, -35.70220], with_tags=True, cache=cache)
+    assert mock_get.call_count == 1
+    assert first == second[:2] == ({1: (-9.6379, -35.7062), 2: (-9.6378, -35.7062)}, [[1, 2]])
+    assert second[2] == [{'highway': 'residential'}]
+
+    # Resposta expirada: consulta de novo
+    [cached] = list(tmp_path.iterdir())
+    os.utime(cached, (0, 0))
+    data.get_osm_data(bbox, cache=cache)
+    assert mock_get.call_count == 2
+
+@patch('unima_projeto_ed.data.requests.get')
+def test_get_osm_data_offline(mock_get, tmp_path):
+    import os
+    cache = data.OverpassCache(tmp_path, ttl=60)
+    bbox = [-9.6379, -35.7062, -9.6339, -35.7022]
+    with pytest.raises(LookupError):
+        data.get_osm_data(bbox, cache=cache, offline=True)
+
+    mock_get.return_value = _overpass_response()
+    data.get_osm_data(bbox, cache=cache)
+    # No modo offline até uma resposta expirada serve
+    [cached] = list(tmp_path.iterdir())
+    os.utime(cached, (0, 0))
+    nodes, ways = data.get_osm_data(bbox, cache=cache, offline=True)
+    assert ways == [[1, 2]]
+    assert mock_get.call_count == 1
+
+def test_overpass_cache_eviction(tmp_path):
+    import os
+    cache = data.OverpassCache(tmp_path, ttl=None, max_bytes=None)
+    payload = {'elements': [{'type': 'node', 'id': i, 'lat': i / 7, 'lon': i / 3} for i in range(200)]}
+    for i in range(3):
+        cache.put(data.build_query([i, 0, i + 1, 1]), payload)
+        path = tmp_path / (cache.key(data.build_query([i, 0, i + 1, 1])) + '.json.gz')
+        os.utime(path, (1000 + i, 1000 + i))
+    size = os.path.getsize(path)
+
+    # Cabem só duas respostas: a gravada há mais tempo sai
+    cache.max_bytes = 3 * size - 1
+    cache.put(data.build_query([3, 0, 4, 1]), payload)
+    assert cache.get(data.build_query([0, 0, 1, 1])) is None
+    assert cache.get(data.build_query([1, 0, 2, 1])) is None
+    assert cache.get(data.build_query([2, 0, 3, 1])) == payload
+    assert cache.get(data.build_query([3, 0, 4, 1])) == payload
+
+def test_overpass_cache_concurrent_writes(tmp_path):
+    import json, threading
+    cache = data.OverpassCache(tmp_path, ttl=None, max_bytes=None)
+    query = data.build_query([0, 0, 1, 1])
+    payloads = [{'elements': [{'type': 'node', 'id': i, 'lat': j, 'lon': j} for j in range(500)]} for i in range(8)]
+    errors = []
+
+    # Várias threads gravando a mesma consulta ao mesmo tempo, por put e por store
+    def write(i):
+        try:
+            for _ in range(5):
+                if i % 2:
+                    cache.put(query, payloads[i])
+                else:
+                    chunks = [json.dumps(payloads[i]).encode('utf-8')]
+                    assert b''.join(cache.store(query, chunks)) == chunks[0]
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # Fica uma resposta inteira de uma das threads e nenhum arquivo temporário
+    assert cache.get(query) in payloads
+    assert [p.name for p in tmp_path.iterdir()] == [cache.key(query) + '.json.gz']
+
+def test_read_osm_file(tmp_path):
+    import gzip, json
+    payload = _overpass_response().json()
+    plain = tmp_path / "area.osm.json"
+    plain.write_text(json.dumps(payload))
+    compressed = tmp_path / "area.osm.json.gz"
+    with gzip.open(compressed, 'wt') as f:
+        json.dump(payload, f)
+
+    for source in (plain, compressed):
+        nodes, ways, tags = data.get_osm_data(None, with_tags=True, source=source, offline=True)
+        assert ways == [[1, 2]]
+        assert tags == [{'highway': 'residential'}]
+
+def test_iter_elements_chunks():
+    import json
+    payload = {
+        'version': 0.6,
+        'osm3s': {'copyright': 'The data included in this document is from www.openstreetmap.org.'},
+        'elements': [
+            {'type': 'node', 'id': 1, 'lat': -9.6379, 'lon': -35.7062},
+            {'type': 'way', 'id': 7, 'nodes': [1, 2], 'tags': {'name': 'Avenida Comendador Leão'}},
+        ],
+    }
+    raw = json.dumps(payload, ensure_ascii=False, indent=1).encode('utf-8')
+    # Blocos pequenos cortam números, strings e caracteres UTF-8 no meio
+    for size in (1, 3, 16, len(raw)):
+        chunks = [raw[i:i + size] for i in range(0, len(raw), size)]
+        assert list(data.iter_elements(chunks)) == payload['elements']
+    assert list(data.iter_elements([raw.decode('utf-8')])) == payload['elements']
+
+    with pytest.raises(ValueError):
+        list(data.iter_elements([raw[:-30]]))
+    with pytest.raises(ValueError):
+        list(data.iter_elements([b'{"remark": "runtime error"}']))
+
+@patch('unima_projeto_ed.data.requests.get')
+def test_get_osm_data_stream(mock_get, tmp_path):
+    import json
+    raw = json.dumps(_overpass_response().json()).encode('utf-8')
+    mock_response = MagicMock()
+    mock_response.iter_content.return_value = [raw[i:i + 10] for i in range(0, len(raw), 10)]
+    mock_get.return_value = mock_response
+    cache = data.OverpassCache(tmp_path)
+    bbox = [-9.6379, -35.7062, -9.6339, -35.7022]
+
+    nodes, ways, tags = data.get_osm_data(bbox, with_tags=True, cache=cache, stream=True)
+    assert mock_get.call_args.kwargs['stream'] is True
+    assert ways == [[1, 2]] and tags == [{'highway': 'residential'}]
+    mock_response.close.assert_called_once()
+
+    # A resposta lida em blocos foi gravada no cache e serve para as duas formas de leitura
+    assert data.get_osm_data(bbox, cache=cache, offline=True) == (nodes, ways)
+    assert data.get_osm_data(bbox, cache=cache, offline=True, stream=True) == (nodes, ways)
+    assert mock_get.call_count == 1
+
+@patch('unima_projeto_ed.data.requests.get')
+def test_get_osm_data_stream_corrupted_cache(mock_get, tmp_path):
+    import json
+    raw = json.dumps(_overpass_response().json()).encode('utf-8')
+    mock_response = MagicMock()
+    mock_response.iter_content.side_effect = lambda *a, **k: [raw[i:i + 10] for i in range(0, len(raw), 10)]
+    mock_get.return_value = mock_response
+    cache = data.OverpassCache(tmp_path)
+    bbox = [-9.6379, -35.7062, -9.6339, -35.7022]
+    expected = data.get_osm_data(bbox, cache=cache, stream=True)
+    path, = tmp_path.glob('*.json.gz')
+
+    # Entrada truncada: no modo offline conta como ausente (e sai do cache), sem gerar nada pela metade
+    gz = path.read_bytes()
+    path.write_bytes(gz[:len(gz) // 2])
+    with pytest.raises(LookupError):
+        data.get_osm_data(bbox, cache=cache, offline=True, stream=True)
+    assert not path.exists()
+
+    # Entrada com bytes trocados: buscada de novo na API e regravada
+    path.write_bytes(gz[:-12] + bytes(b ^ 0xFF for b in gz[-12:-8]) + gz[-8:])
+    assert data.get_osm_data(bbox, cache=cache, stream=True) == expected
+    assert mock_get.call_count == 2
+    assert data.get_osm_data(bbox, cache=cache, offline=True, stream=True) == expected
+
+def test_build_graph_from_elements():
+    elements = [
+        {'type': 'way', 'id': 9, 'nodes': [3, 1]},
+        {'type': 'node', 'id': 1, 'lat': -9.6379, 'lon': -35.7062},
+        {'type': 'node', 'id': 2, 'lat': -9.6378, 'lon': -35.7062},
+        {'type': 'node', 'id': 3, 'lat': -9.6377, 'lon': -35.7062},
+        {'type': 'way', 'id': 8, 'nodes': [1, 2, 99], 'tags': {'oneway': 'yes'}},
+    ]
+    G, nodes = grafo.build_graph_from_elements(iter(elements))
+    assert sorted(nodes) == [1, 2, 3]
+    assert G.has_edge(1, 2) and not G.has_edge(2, 1)
+    assert G.has_edge(3, 1) and G.has_edge(1, 3)
+    assert G.get_weight(1, 2) == pytest.approx(grafo.haversine(nodes[1], nodes[2]))
+
 def test_flask_home_route():
     with main.app.test_client() as client:
         response = client.get('/')
@@ -80,7 +337,8 @@ def test_edge_weights():
     G = grafo.build_graph(nodes, ways)
     
     weight = G[1][2]['weight']
-    assert 100 < weight < 120
+    # 0.0001 grau de latitude ≈ 11,1 metros
+    assert 11 < weight < 11.2
 
 @patch('unima_projeto_ed.data.requests.get')
 def test_osm_api_error(mock_get):
@@ -90,3 +348,261 @@ def test_osm_api_error(mock_get):
     
     with pytest.raises(Exception):
         data.get_osm_data([-9.6379, -35.7062, -9.6339, -35.7022])
+
+
+def test_package_import_is_lightweight():
+    """Importar o pacote não deve rodar o exemplo do Dijkstra nem carregar networkx/requests/flask/numpy"""
+    import subprocess
+    import sys
+
+    code = (
+        "import sys\n"
+        "import unima_projeto_ed.Dijkstra, unima_projeto_ed.a_star\n"
+        "import unima_projeto_ed.data, unima_projeto_ed.grafo, unima_projeto_ed.weighted_graph\n"
+        "print(sorted(m for m in ('networkx', 'requests', 'flask', 'numpy') if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+def test_haversine_array_matches_scalar():
+    pytest.importorskip("numpy")
+    coords = [((-9.6379, -35.7062), (-9.6339, -35.7022)),
+              ((-9.6379, -35.7062), (-9.6379, -35.7062)),
+              ((0.0, 0.0), (1.0, 1.0))]
+    lat1, lon1 = zip(*(a for a, _ in coords))
+    lat2, lon2 = zip(*(b for _, b in coords))
+    distances = grafo.haversine_array(lat1, lon1, lat2, lon2)
+    for (a, b), d in zip(coords, distances):
+        assert d == pytest.approx(grafo.haversine(a, b))
+
+@pytest.mark.parametrize("output", ["weighted", "csr"])
+def test_build_graph_bulk_matches_build_graph(output):
+    pytest.importorskip("numpy")
+    nodes = {
+        1: (-9.6379, -35.7062),
+        2: (-9.6378, -35.7062),
+        3: (-9.6377, -35.7061),
+        4: (-9.6376, -35.7060),
+    }
+    # Trecho repetido, way de um nó só e nó desconhecido (99) são tratados como no build_graph
+    ways = [[1, 2, 3], [3, 2], [4], [3, 99, 4], [3, 4]]
+
+    G = grafo.build_graph(nodes, ways)
+    bulk = grafo.build_graph_bulk(nodes, ways, output=output)
+
+    assert bulk.vertex_count() == len(G.nodes)
+    assert bulk.edge_count() == len(G.edges)
+    for u, v, attrs in G.edges(data=True):
+        assert bulk.get_weight(u, v) == pytest.approx(attrs['weight'])
+
+def test_build_graph_bulk_rejects_unknown_output():
+    with pytest.raises(ValueError):
+        grafo.build_graph_bulk({}, [], output='networkx')
+
+@pytest.fixture
+def overpass_server():
+    """Servidor HTTP local que imita a Overpass: devolve os ways de uma malha que tocam o bbox"""
+    import json
+    import re
+    import threading
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from urllib.parse import urlparse, parse_qs
+
+    # Malha 20 x 20 de nós a cada 0.01 grau; cada rua horizontal/vertical é um way
+    size, step = 20, 0.01
+    nodes = {r * size + c + 1: (round(r * step, 6), round(c * step, 6)) for r in range(size) for c in range(size)}
+    ways = {}
+    for r in range(size):
+        ways[1000 + r] = [r * size + c + 1 for c in range(size)]
+    for c in range(size):
+        ways[2000 + c] = [r * size + c + 1 for r in range(size)]
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)['data'][0]
+            south, west, north, east = map(float, re.search(r'\(([^)]*)\);', query).group(1).split(','))
+            requests_seen.append((south, west, north, east))
+            inside = lambda n: south <= nodes[n][0] <= north and west <= nodes[n][1] <= east
+            selected = {i: w for i, w in ways.items() if any(inside(n) for n in w)}
+            used = sorted({n for w in selected.values() for n in w})
+            elements = [{'type': 'node', 'id': n, 'lat': nodes[n][0], 'lon': nodes[n][1]} for n in used]
+            elements += [{'type': 'way', 'id': i, 'nodes': w, 'tags': {'highway': 'residential'}}
+                         for i, w in sorted(selected.items())]
+            body = json.dumps({'version': 0.6, 'elements': elements}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/interpreter", requests_seen
+    server.shutdown()
+    server.server_close()
+
+def test_split_bbox():
+    tiles = data.split_bbox([0, 0, 0.1, 0.25], tile_size=0.05)
+    assert len(tiles) == 2 * 5
+    assert tiles[0][:2] == [0, 0] and tiles[-1][2:] == [0.1, 0.25]
+    # Os blocos cobrem o bbox sem buracos: cada borda norte/leste é a sul/oeste do vizinho
+    assert all(a[3] == b[1] for a, b in zip(tiles, tiles[1:]) if a[0] == b[0])
+    assert data.split_bbox([0, 0, 0.01, 0.01], tile_size=0.05) == [[0, 0, 0.01, 0.01]]
+    with pytest.raises(ValueError):
+        data.split_bbox([0, 0, 1, 1], tile_size=0)
+
+def test_get_osm_data_tiled(overpass_server, tmp_path):
+    url, requests_seen = overpass_server
+    bbox = [0.0, 0.0, 0.19, 0.19]
+
+    single = data.get_osm_data_tiled(bbox, tile_size=1, with_tags=True, url=url)
+    assert len(requests_seen) == 1
+    tiled = data.get_osm_data_tiled(bbox, tile_size=0.05, max_workers=4, with_tags=True, url=url)
+    assert len(requests_seen) == 1 + 16
+
+    # Os ways que cruzam blocos aparecem uma vez só, e o resultado é o mesmo da consulta única
+    nodes, ways, tags = tiled
+    assert len(ways) == 40
+    assert nodes == single[0]
+    assert sorted(ways) == sorted(single[1])
+    assert tags == [{'highway': 'residential'}] * 40
+
+    # Com cache, a segunda leitura em blocos não acessa o servidor
+    cache = data.OverpassCache(tmp_path)
+    data.get_osm_data_tiled(bbox, tile_size=0.1, cache=cache, url=url)
+    count = len(requests_seen)
+    assert data.get_osm_data_tiled(bbox, tile_size=0.1, cache=cache, offline=True)[1] == \
+        data.get_osm_data_tiled(bbox, tile_size=0.1, cache=cache, url=url)[1]
+    assert len(requests_seen) == count
+
+@pytest.fixture
+def routing_service():
+    """Serviço de rotas com uma malha pequena, instalado na aplicação durante o teste"""
+    from unima_projeto_ed.routing import RoutingService
+
+    # Malha 4 x 4 (ruas a cada ~110 m) com a rua de baixo em mão única para o leste
+    nodes = {r * 4 + c + 1: (-9.6400 + r * 0.001, -35.7100 + c * 0.001) for r in range(4) for c in range(4)}
+    ways = [[r * 4 + c + 1 for c in range(4)] for r in range(4)]
+    ways += [[r * 4 + c + 1 for r in range(4)] for c in range(4)]
+    tags = [{'oneway': 'yes'}] + [{}] * 7
+    graph = grafo.build_graph(nodes, ways, backend='weighted', tags=tags, simplify=True)
+    service = RoutingService(graph, nodes)
+    main.app.config['ROUTING_SERVICE'] = service
+    yield service
+    main.app.config.pop('ROUTING_SERVICE', None)
+
+def test_route_endpoint(routing_service):
+    with main.app.test_client() as client:
+        response = client.get('/route?origin=-9.64001,-35.71001&destination=-9.6400,-35.7070')
+        assert response.status_code == 200
+        assert float(response.headers['X-Response-Time-Ms']) >= 0
+        assert response.headers['Server-Timing'].startswith('route;dur=')
+        body = response.json
+        assert body['path'] == [1, 2, 3, 4]
+        assert body['origin']['node'] == 1
+        assert body['distance'] == pytest.approx(3 * grafo.haversine((-9.64, -35.71), (-9.64, -35.709)), rel=1e-6)
+        assert body['coordinates'][0] == list(routing_service.coordinates[1])
+
+        # Na volta a rua de baixo é contramão: a rota sobe um quarteirão
+        body = client.get('/route?origin=-9.6400,-35.7070&destination=-9.6400,-35.7100').json
+        assert body['path'][0] == 4 and body['path'][-1] == 1
+        assert len(body['path']) > 4
+
+        for query in ('', '?origin=-9.64,-35.71', '?origin=abc&destination=-9.64,-35.71',
+                      '?origin=-99,-35.71&destination=-9.64,-35.71'):
+            assert client.get('/route' + query).status_code == 400
+
+def test_route_endpoint_graph_file(tmp_path, monkeypatch):
+    from unima_projeto_ed.graph_io import save_graph
+
+    nodes = {1: (-9.6400, -35.7100), 2: (-9.6400, -35.7090), 3: (-9.6300, -35.7000), 4: (-9.6301, -35.7000)}
+    save_graph(grafo.build_graph(nodes, [[1, 2], [3, 4]], backend='csr'), tmp_path / 'grafo.bin')
+    monkeypatch.setenv('UNIMA_GRAPH_FILE', str(tmp_path / 'grafo.bin'))
+    main.app.config.pop('ROUTING_SERVICE', None)
+    try:
+        with main.app.test_client() as client:
+            body = client.get('/route?origin=-9.64,-35.71&destination=-9.64,-35.709').json
+            assert body['path'] == [1, 2]
+            # O grafo é carregado uma única vez e reaproveitado
+            service = main.app.config['ROUTING_SERVICE']
+            response = client.get('/route?origin=-9.64,-35.71&destination=-9.63,-35.70')
+            assert response.status_code == 404
+            assert response.json['distance'] is None
+            assert main.app.config['ROUTING_SERVICE'] is service
+    finally:
+        main.app.config.pop('ROUTING_SERVICE', None)
+
+def test_route_batch_endpoint(routing_service):
+    corner = [-9.6400, -35.7100]
+    pairs = [
+        {'origin': corner, 'destination': [-9.6400, -35.7070]},
+        {'origin': [-9.6390, -35.7080], 'destination': corner},
+        {'origin': corner, 'destination': corner},
+        {'origin': corner, 'destination': [-9.6390, -35.7080]},
+    ]
+    with main.app.test_client() as client:
+        response = client.post('/route/batch', json={'pairs': pairs, 'geometry': True})
+        assert response.status_code == 200
+        assert 'X-Response-Time-Ms' in response.headers
+        routes = response.json['routes']
+
+        # Mesma ordem da entrada, mesmos resultados do /route
+        assert [r['origin']['node'] for r in routes] == [1, 7, 1, 1]
+        assert [r['destination']['node'] for r in routes] == [4, 1, 1, 7]
+        for pair, batch_route in zip(pairs, routes):
+            single = client.get('/route?origin={},{}&destination={},{}'.format(
+                *pair['origin'], *pair['destination'])).json
+            assert batch_route['distance'] == pytest.approx(single['distance'])
+            assert batch_route['coordinates'] == single['coordinates']
+        assert routes[2]['distance'] == 0
+
+        assert 'coordinates' not in client.post('/route/batch', json={'pairs': pairs[:1]}).json['routes'][0]
+        assert client.post('/route/batch', json={'pairs': []}).json == {'routes': []}
+        for body in ({}, {'pairs': [{'origin': corner}]}, {'pairs': [{'origin': 'x', 'destination': corner}]},
+                     {'pairs': [pairs[0]] * (main.MAX_BATCH_SIZE + 1)}):
+            assert client.post('/route/batch', json=body).status_code == 400
+        assert client.post('/route/batch', data='not json').status_code == 400
+
+def test_metrics_endpoint(routing_service, monkeypatch):
+    from unima_projeto_ed.metrics import Metrics
+    from unima_projeto_ed.route_cache import RouteCache
+
+    monkeypatch.setattr(main, 'metrics', Metrics())
+    routing_service.route_cache = RouteCache()
+    routing_service.search_stats = main.metrics.search_stats
+    with main.app.test_client() as client:
+        for _ in range(2):
+            assert client.get('/route?origin=-9.6400,-35.7100&destination=-9.6400,-35.7070').status_code == 200
+        pairs = [{'origin': [-9.6400, -35.7100], 'destination': [-9.6390, -35.7080]}]
+        assert client.post('/route/batch', json={'pairs': pairs}).status_code == 200
+        assert client.get('/route').status_code == 400
+
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+        lines = response.get_data(as_text=True).splitlines()
+        samples = dict(line.rsplit(' ', 1) for line in lines if not line.startswith('#'))
+
+    # Contadores por rota (o padrão da URL), método e status
+    assert samples['unima_http_requests_total{route="/route",method="GET",status="200"}'] == '2'
+    assert samples['unima_http_requests_total{route="/route",method="GET",status="400"}'] == '1'
+    assert samples['unima_http_requests_total{route="/route/batch",method="POST",status="200"}'] == '1'
+    assert samples['unima_http_request_duration_seconds_bucket{route="/route",le="+Inf"}'] == '3'
+    assert samples['unima_http_request_duration_seconds_count{route="/route"}'] == '3'
+    assert float(samples['unima_http_request_duration_seconds_sum{route="/route"}']) > 0
+    assert '# TYPE unima_http_request_duration_seconds histogram' in lines
+
+    assert samples['unima_graph_vertices{format="weighted"}'] == str(routing_service.graph.vertex_count())
+    assert samples['unima_graph_edges{format="weighted"}'] == str(routing_service.graph.edge_count())
+    # A segunda consulta igual vem do cache e não faz busca
+    assert samples['unima_route_cache_hits_total'] == '1'
+    assert float(samples['unima_route_cache_hit_ratio']) == pytest.approx(1 / 3)
+    assert samples['unima_search_total'] == '2'
+    assert int(samples['unima_search_settled_total']) > 0
@@ -1,5 +1,8 @@
 import itertools
-from heapq import heappush, heappop
+from heapq import heappush, heappop, heapify
+from .csr_graph import CSRGraph
+from .priority_queue import make_queue
+from .weighted_graph import WeightedDirectedGraph
 
 # ---------------------------------------------
 # Dijkstra (pré-requisitos e ideia geral)
@@ -34,88 +37,352 @@ class Edge:
         self.vertex = vertex
 
 
+# ---------------------------------------------
+# Resultado de uma busca
+# ---------------------------------------------
+
+# Quando a busca para cedo (no 'end' ou quando todos os 'targets' foram finalizados), os
+# vértices que estavam só na fila têm distâncias provisórias. O resultado guarda apenas os
+# vértices com distância definitiva: para os demais, distance_to é infinito e path_to é [].
+class ShortestPathResult:
+    def __init__(self, source, target, distances, previous, settled, final=None):
+        # source/target: vértices de origem e destino (target é None no modo um-para-todos)
+        self.source = source
+        self.target = target
+        # final: vértices com distância definitiva (None = todos os de 'distances')
+        if final is not None and len(final) < len(distances):
+            distances = {v: d for v, d in distances.items() if v in final}
+            previous = {v: p for v, p in previous.items() if v in final}
+        # distances: menor distância até cada vértice (só os com distância definitiva)
+        self.distances = distances
+        # previous: "pai" de cada vértice na árvore de caminhos mínimos
+        self.previous = previous
+        # settled: quantos vértices foram finalizados (retirados da fila) durante a busca
+        self.settled = settled
+
+    # Distância até o destino da busca (infinito se não houver caminho)
+    @property
+    def distance(self):
+        return self.distance_to(self.target)
+
+    # Caminho até o destino da busca (lista vazia se não houver caminho)
+    @property
+    def path(self):
+        return self.path_to(self.target)
+
+    # Distância até qualquer vértice alcançado pela busca
+    def distance_to(self, vertex):
+        return self.distances.get(vertex, float("inf"))
+
+    # Reconstrói o caminho até qualquer vértice, subindo pelos "pais"
+    def path_to(self, vertex):
+        if self.distance_to(vertex) == float("inf"):
+            return []
+        path = [vertex]
+        while vertex != self.source:
+            vertex = self.previous[vertex]
+            path.append(vertex)
+        return path[::-1]
+
+
+# Resultado de uma busca no CSRGraph: guarda as listas por índice denso e só converte
+# para dicionários com os ids originais se distances/previous forem acessados
+class _CSRShortestPathResult(ShortestPathResult):
+    def __init__(self, graph, source, target, distances, previous, settled, final):
+        self.graph = graph
+        self.source = source
+        self.target = target
+        self.settled = settled
+        self._distances = distances
+        self._previous = previous
+        # final[i] = 1 se o vértice i foi finalizado (distância definitiva)
+        self._final = final
+        self._distances_dict = None
+        self._previous_dict = None
+
+    @property
+    def distances(self):
+        if self._distances_dict is None:
+            node_ids = self.graph.node_ids
+            final = self._final
+            self._distances_dict = {node_ids[i]: d for i, d in enumerate(self._distances) if final[i]}
+        return self._distances_dict
+
+    @property
+    def previous(self):
+        if self._previous_dict is None:
+            node_ids = self.graph.node_ids
+            self._previous_dict = {node_ids[i]: (node_ids[p] if p != -1 else None)
+                                   for i, p in enumerate(self._previous) if self._final[i]}
+        return self._previous_dict
+
+    def distance_to(self, vertex):
+        if vertex is None or not self.graph.has_vertex(vertex):
+            return float("inf")
+        i = self.graph.index_of(vertex)
+        return self._distances[i] if self._final[i] else float("inf")
+
+    def path_to(self, vertex):
+        if self.distance_to(vertex) == float("inf"):
+            return []
+        node_ids, previous = self.graph.node_ids, self._previous
+        i = self.graph.index_of(vertex)
+        path = []
+        while i != -1:
+            path.append(node_ids[i])
+            i = previous[i]
+        return path[::-1]
+
+
+# Mostra distância e caminho até o destino (comportamento original do Dijkstra)
+def _print_result(result):
+    label = getattr(result.target, "value", result.target)
+    # Imprime a distância mínima encontrada até 'end'
+    print(f"shortest distance to {label}: ", result.distance)
+    # Caminho do início ao fim, usando os rótulos dos vértices
+    print(f"path to {label}: ", [getattr(v, "value", v) for v in result.path])
+
+
 # ---------------------------------------------
 # Implementação do Dijkstra
 # ---------------------------------------------
 
-def Dijkstra(graph, start, end):
+def Dijkstra(graph, start, end=None, queue="heapq", quiet=False, bidirectional=False, targets=None,
+             stats=None):
+    # graph: Graph (Vertex/Edge), CSRGraph, WeightedDirectedGraph ou dict {origem: {destino: peso}}
+    # end: destino. Se for None, roda no modo um-para-todos e devolve a árvore
+    #      de caminhos mínimos completa (use result.path_to/distance_to para cada destino).
+    # queue: nome da fila de prioridade. "heapq" usa a PriorityQueue deste módulo;
+    #        os demais nomes ("binary", "4-ary", "pairing", "radix") vêm de priority_queue.make_queue.
+    # quiet: se True, não imprime a distância e o caminho encontrados.
+    # bidirectional: busca ao mesmo tempo a partir de start e de end (só WeightedDirectedGraph,
+    #                senão TypeError; exige 'end', senão ValueError).
+    # targets: no modo sem 'end', para assim que todos esses vértices forem finalizados
+    #          (um-para-muitos); as distâncias deles já são as finais nesse momento.
+    # stats: SearchStats opcional que recebe os contadores e o tempo da busca.
+    # Retorna um ShortestPathResult (distance, path, settled, previous, distances).
+    # Com 'end' ou 'targets' a busca para cedo e o resultado só tem os vértices finalizados.
+
+    if bidirectional and end is None:
+        raise ValueError("bidirectional search needs an 'end' vertex")
+    started = stats.start() if stats is not None else None
+    if bidirectional:
+        from .bidirectional import bidirectional_dijkstra
+        result = bidirectional_dijkstra(graph, start, end, queue, stats)
+    # Grafos CSR usam a versão com índices densos (sem objetos Vertex/Edge)
+    elif isinstance(graph, CSRGraph):
+        result = _dijkstra_csr(graph, start, end, queue, targets, stats)
+    elif isinstance(graph, WeightedDirectedGraph):
+        result = _dijkstra_dict(graph.edges, start, end, queue, targets, stats)
+    elif isinstance(graph, dict):
+        result = _dijkstra_dict(graph, start, end, queue, targets, stats)
+    else:
+        result = _dijkstra(graph, start, end, queue, targets, stats)
+    if stats is not None:
+        stats.finish(started)
+
+    # Só imprime quando há destino e ele foi alcançado (como antes)
+    if not quiet and end is not None and result.distance != float("inf"):
+        _print_result(result)
+    return result
+
+
+def _dijkstra(graph, start, end, queue, targets=None, stats=None):
     # previous: guarda o "pai" no caminho ótimo (para reconstruir o caminho no final)
-    previous = {v: None for v in graph.adjacency_list.keys()}
+    previous = {start: None}
 
     # visited: marca quais vértices já foram "finalizados" (não precisam mais ser relaxados)
-    visited = {v: False for v in graph.adjacency_list.keys()}
+    visited = set()
 
-    # distances: distância mínima conhecida até cada vértice (inicialmente infinito)
-    distances = {v: float("inf") for v in graph.adjacency_list.keys()}
-    distances[start] = 0  # distância do início até ele mesmo é 0
+    # distances: distância mínima conhecida até cada vértice (ausente = infinito)
+    distances = {start: 0}  # distância do início até ele mesmo é 0
+    inf = float("inf")
 
-    # Fila de prioridade (min-heap). Armazena pares (distância, vértice).
-    queue = PriorityQueue()
-    queue.add_task(0, start)
+    # remaining: destinos (targets) que ainda não foram finalizados
+    remaining = set(targets) if targets is not None else None
 
-    # 'path' será usado para reconstruir/imprimir o caminho
-    path = []
+    # Fila de prioridade (min-heap). Armazena pares (distância, vértice).
+    queue = _make_queue(queue)
+    push, pop = queue.push, queue.pop
+    # Com stats, push/pop passam a contar as operações (sem custo quando stats é None)
+    if stats is not None:
+        push, pop = stats.instrument(push, pop, queue.__len__, distances.get)
+    push(0, start)
 
     # Enquanto houver itens na fila
     while queue:
         # Remove o vértice com a MENOR distância atual (menor prioridade)
-        removed_distance, removed = queue.pop_task()
+        removed = pop()
+        removed_distance = distances[removed]
         # Marca como visitado/finalizado
-        visited[removed] = True
+        visited.add(removed)
 
-        # Se chegamos ao destino, reconstruímos o caminho e encerramos
+        # Se chegamos ao destino, encerramos: o caminho sai de 'previous'
         # ATENÇÃO: aqui é usado "is" (identidade de objeto). Como start/end/A/B/... são os MESMOS objetos,
         # isso funciona. Se você recriasse objetos iguais porém diferentes, preferiria "==" com __eq__ definido.
         if removed is end:
-            # Sobe encadeando 'previous' até o início
-            while previous[removed]:
-                path.append(removed.value)       # adiciona o rótulo do vértice atual
-                removed = previous[removed]      # vai para o pai no caminho ótimo
-            path.append(start.value)             # por fim, coloca o início
-            # Imprime a distância mínima encontrada até 'end'
-            print(f"shortest distance to {end.value}: ", distances[end])
-            # O 'path' foi construído de trás pra frente, então invertimos para exibir do início ao fim
-            print(f"path to {end.value}: ", path[::-1])
-            return
+            break
+        # Modo um-para-muitos: todos os destinos pedidos já têm a distância final
+        if remaining is not None:
+            remaining.discard(removed)
+            if not remaining:
+                break
 
         # Relaxamento das arestas que saem de 'removed'
         for edge in graph.adjacency_list[removed]:
             # Se o destino já foi finalizado, ignoramos
-            if visited[edge.vertex]:
+            if edge.vertex in visited:
                 continue
 
             # Custo de chegar ao vizinho (edge.vertex) passando por 'removed'
             new_distance = removed_distance + edge.distance
 
             # Se encontramos um caminho melhor, atualiza dist e previous
-            if new_distance < distances[edge.vertex]:
+            if new_distance < distances.get(edge.vertex, inf):
                 distances[edge.vertex] = new_distance
                 previous[edge.vertex] = removed
                 # Empurra para a fila a nova melhor distância conhecida desse vizinho
-                queue.add_task(new_distance, edge.vertex)
+                # (se ele já estiver na fila, a entrada antiga é invalidada: cada vértice
+                # tem no máximo uma entrada ativa e só é finalizado uma vez)
+                push(new_distance, edge.vertex)
+
+    # Se a fila esvaziar sem encontrar 'end', não há caminho (distance será infinito)
+    return ShortestPathResult(start, end, distances, previous, len(visited), visited)
+
+
+def _dijkstra_dict(adjacency, start, end, queue, targets=None, stats=None):
+    # Mesma busca do _dijkstra, mas com a adjacência no formato {origem: {destino: peso}}
+    # (WeightedDirectedGraph.edges ou o dicionário usado pelo a_star)
+    previous = {start: None}
+    visited = set()
+    distances = {start: 0}
+    inf = float("inf")
+    remaining = set(targets) if targets is not None else None
+
+    queue = _make_queue(queue)
+    push, pop = queue.push, queue.pop
+    if stats is not None:
+        push, pop = stats.instrument(push, pop, queue.__len__, distances.get)
+    push(0, start)
+
+    while queue:
+        removed = pop()
+        removed_distance = distances[removed]
+        visited.add(removed)
+
+        if removed == end:
+            break
+        if remaining is not None:
+            remaining.discard(removed)
+            if not remaining:
+                break
+
+        for neighbor, weight in adjacency.get(removed, {}).items():
+            if neighbor in visited:
+                continue
+            new_distance = removed_distance + weight
+            if new_distance < distances.get(neighbor, inf):
+                distances[neighbor] = new_distance
+                previous[neighbor] = removed
+                push(new_distance, neighbor)
+
+    return ShortestPathResult(start, end, distances, previous, len(visited), visited)
+
+
+def _make_queue(name):
+    # Cria a fila usada pelo Dijkstra a partir do nome
+    if name == "heapq":
+        return PriorityQueue()
+    return make_queue(name)
+
+
+def _dijkstra_csr(graph, start, end, queue="heapq", targets=None, stats=None):
+    # Mesma ideia do Dijkstra acima, mas sobre os arrays do CSRGraph:
+    # vértices são inteiros 0..n-1 e as listas dist/previous são indexadas diretamente.
+    offsets, heads, weights = graph.offsets, graph.targets, graph.weights
+    s = graph.index_of(start)
+    t = -1 if end is None else graph.index_of(end)
+
+    n = len(graph.node_ids)
+    distances = [float("inf")] * n
+    distances[s] = 0
+    previous = [-1] * n
+    visited = bytearray(n)
+    settled = 0
+    # Destinos ainda não finalizados, em índices densos (vértices fora do grafo são ignorados)
+    remaining = None
+    if targets is not None:
+        remaining = {graph.index_of(v) for v in targets if graph.has_vertex(v)}
+
+    if queue == "heapq":
+        # Aqui o heapq é usado direto com tuplas (distância, índice):
+        # índices inteiros já desempatam sem precisar de contador.
+        heap = []
+
+        def push(priority, v):
+            heappush(heap, (priority, v))
+
+        def pop():
+            return heappop(heap)[1]
+    else:
+        heap = make_queue(queue)
+        push, pop = heap.push, heap.pop
+    if stats is not None:
+        push, pop = stats.instrument(push, pop, heap.__len__, distances.__getitem__,
+                                     graph.node_ids.__getitem__)
+
+    push(0, s)
+    while heap:
+        removed = pop()
+        if visited[removed]:
+            continue  # entrada antiga de um vértice já finalizado
+        removed_distance = distances[removed]
+        visited[removed] = 1
+        settled += 1
+
+        if removed == t:
+            break
+        if remaining is not None:
+            remaining.discard(removed)
+            if not remaining:
+                break
+
+        for e in range(offsets[removed], offsets[removed + 1]):
+            v = heads[e]
+            if visited[v]:
+                continue
+            new_distance = removed_distance + weights[e]
+            if new_distance < distances[v]:
+                distances[v] = new_distance
+                previous[v] = removed
+                push(new_distance, v)
 
-    # Se a fila esvaziar sem encontrar 'end', não há caminho (ou não foi alcançado)
-    return
+    return _CSRShortestPathResult(graph, start, end, distances, previous, settled, visited)
 
 
 # ---------------------------------------------
 # Fila de Prioridade (Priority Queue) com heapq
 # ---------------------------------------------
 
+# Marcador colocado no lugar da task em entradas invalidadas (remoção preguiçosa)
+REMOVED = object()
+
+
 class PriorityQueue:
     def __init__(self):
         self.pq = []                # lista que o heapq usa como heap (min-heap)
         self.entry_finder = {}      # mapeia task -> entry (para localizar a entrada da task)
         self.counter = itertools.count()  # contador incremental (para desempate estável)
+        self.removed = 0            # quantas entradas no heap estão marcadas como REMOVED
 
     def __len__(self):
-        # retorna o número de entradas físicas no heap (não é o "tamanho lógico" se houvesse entradas inválidas)
-        return len(self.pq)
+        # retorna o tamanho lógico: só as tasks ativas, ignorando entradas invalidadas
+        return len(self.entry_finder)
 
     def add_task(self, priority, task):
-        # Se a task já está no heap, tenta atualizar a prioridade
+        # Se a task já está no heap, atualiza a prioridade (invalida a entrada antiga)
         if task in self.entry_finder:   # já existe?
-            self.update_priority(priority, task)  # ATENÇÃO: ver comentário do update_priority
+            self.update_priority(priority, task)
             return self
 
         # Gera um número único para desempate
@@ -128,20 +395,30 @@ class PriorityQueue:
         heappush(self.pq, entry)
 
     def update_priority(self, priority, task):
-        # Pega a entrada atual da task
-        entry = self.entry_finder[task]
-        # Novo carimbo de desempate (para não empatar com a versão anterior)
-        count = next(self.counter)
-        # *** CUIDADO ***
-        # Aqui estamos MUDANDO a entrada por dentro (in-place).
-        # O heapq não sabe que isso aconteceu; em geral, isso pode DESORGANIZAR o heap.
-        entry[0], entry[1] = priority, count
+        # Em vez de mexer na entrada dentro do heap (o que quebraria a propriedade de heap),
+        # a entrada antiga é marcada como REMOVED e uma nova entrada é inserida.
+        self.remove_task(task)
+        self.add_task(priority, task)
+
+    def remove_task(self, task):
+        # Invalida a entrada da task; ela será descartada quando chegar ao topo do heap
+        entry = self.entry_finder.pop(task)
+        entry[-1] = REMOVED
+        self.removed += 1
+        # Se mais da metade do heap for lixo, reconstrói só com as entradas ativas
+        if self.removed > len(self.entry_finder):
+            self.pq = [e for e in self.pq if e[-1] is not REMOVED]
+            heapify(self.pq)
+            self.removed = 0
 
     def pop_task(self):
-        # Remove e retorna a entrada com menor [priority, count]
-        # (heappop retira a raiz do heap)
+        # Remove e retorna a entrada ativa com menor [priority, count]
+        # (heappop retira a raiz do heap; entradas REMOVED são descartadas)
         while self.pq:
             priority, count, task = heappop(self.pq)
+            if task is REMOVED:
+                self.removed -= 1
+                continue
             # Remove do dicionário de "entradas ativas"
             del self.entry_finder[task]
             # Retorna par (prioridade, tarefa)
@@ -149,32 +426,67 @@ class PriorityQueue:
         # Se tentar tirar de um heap vazio, levanta erro
         raise KeyError("pop from an empty priority queue")
 
+    # Mesma interface das filas de priority_queue (push/pop/contains/priority_of),
+    # para que o Dijkstra possa trocar de implementação pelo nome
+    def push(self, priority, task):
+        self.add_task(priority, task)
+
+    def pop(self):
+        return self.pop_task()[1]
+
+    def peek(self):
+        # Descarta entradas invalidadas que estejam no topo e retorna a task ativa de menor prioridade
+        while self.pq and self.pq[0][-1] is REMOVED:
+            heappop(self.pq)
+            self.removed -= 1
+        if not self.pq:
+            raise KeyError("peek from an empty priority queue")
+        return self.pq[0][-1]
+
+    def is_empty(self):
+        return not self.entry_finder
+
+    def contains(self, task):
+        return task in self.entry_finder
+
+    def __contains__(self, task):
+        return task in self.entry_finder
+
+    def priority_of(self, task):
+        return self.entry_finder[task][0]
+
 
 # ---------------------------------------------
 # Montagem do grafo de exemplo
 # ---------------------------------------------
 
-# Cria 8 vértices com rótulos "A"..."H"
-vertices = [Vertex("A"), Vertex("B"), Vertex("C"), Vertex("D"),
-            Vertex("E"), Vertex("F"), Vertex("G"), Vertex("H")]
-A, B, C, D, E, F, G, H = vertices  # apenas açucar para nomear
-
-# Lista de adjacência:
-# Para cada vértice, lista de arestas (peso, destino).
-# Aqui o grafo é essencialmente "não direcionado" porque você colocou a aresta nos dois sentidos (A<->B, A<->C, ...).
-adj_list = {
-    A: [Edge(1.8, B), Edge(1.5, C), Edge(1.4, D)],
-    B: [Edge(1.8, A), Edge(1.6, E)],
-    C: [Edge(1.5, A), Edge(1.8, E), Edge(2.1, F)],
-    D: [Edge(1.4, A), Edge(2.7, F), Edge(2.4, G)],
-    E: [Edge(1.6, B), Edge(1.8, C), Edge(1.4, F), Edge(1.6, H)],
-    F: [Edge(2.1, C), Edge(2.7, D), Edge(1.4, E), Edge(1.3, G), Edge(1.2, H)],
-    G: [Edge(2.4, D), Edge(1.3, F), Edge(1.5, H)],
-    H: [Edge(1.6, E), Edge(1.2, F), Edge(1.5, G)],
-}
-
-# Instancia o grafo
-my_graph = Graph(adj_list)
-
-# Executa Dijkstra do A até H
-Dijkstra(my_graph, start=A, end=H)
+def build_example_graph():
+    # Cria 8 vértices com rótulos "A"..."H"
+    vertices = [Vertex("A"), Vertex("B"), Vertex("C"), Vertex("D"),
+                Vertex("E"), Vertex("F"), Vertex("G"), Vertex("H")]
+    A, B, C, D, E, F, G, H = vertices  # apenas açucar para nomear
+
+    # Lista de adjacência:
+    # Para cada vértice, lista de arestas (peso, destino).
+    # Aqui o grafo é essencialmente "não direcionado" porque você colocou a aresta nos dois sentidos (A<->B, A<->C, ...).
+    adj_list = {
+        A: [Edge(1.8, B), Edge(1.5, C), Edge(1.4, D)],
+        B: [Edge(1.8, A), Edge(1.6, E)],
+        C: [Edge(1.5, A), Edge(1.8, E), Edge(2.1, F)],
+        D: [Edge(1.4, A), Edge(2.7, F), Edge(2.4, G)],
+        E: [Edge(1.6, B), Edge(1.8, C), Edge(1.4, F), Edge(1.6, H)],
+        F: [Edge(2.1, C), Edge(2.7, D), Edge(1.4, E), Edge(1.3, G), Edge(1.2, H)],
+        G: [Edge(2.4, D), Edge(1.3, F), Edge(1.5, H)],
+        H: [Edge(1.6, E), Edge(1.2, F), Edge(1.5, G)],
+    }
+
+    # Instancia o grafo
+    return Graph(adj_list), vertices
+
+
+# Exemplo: python -m unima_projeto_ed.Dijkstra
+# (não roda na importação do módulo, só quando executado diretamente)
+if __name__ == "__main__":
+    my_graph, vertices = build_example_graph()
+    # Executa Dijkstra do A até H
+    Dijkstra(my_graph, start=vertices[0], end=vertices[-1])
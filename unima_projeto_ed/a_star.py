@@ -1,5 +1,8 @@
 import math
-from .priority_queue import PriorityQueue
+from .priority_queue import make_queue
+from .csr_graph import CSRGraph
+from .weighted_graph import WeightedDirectedGraph
+from .heuristics import bind_heuristic, bind_heuristic_csr
 
 def heuristic(node1, node2, coordinates):
     # Calcula a distância euclidiana entre dois pontos.
@@ -7,20 +10,65 @@ def heuristic(node1, node2, coordinates):
     x2, y2 = coordinates[node2]
     return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
 
-def a_star(graph, start, goal, coordinates):
+# Referência à heurística padrão (o parâmetro 'heuristic' do a_star esconde o nome global)
+_euclidean = heuristic
+
+# A heurística padrão é trocada pela métrica 'planar' equivalente, que pré-calcula o destino
+def _resolve(heuristic):
+    return 'planar' if heuristic is _euclidean else heuristic
+
+def a_star(graph, start, goal, coordinates, queue='binary', bidirectional=False, heuristic=heuristic,
+           stats=None):
     """
     Algoritmo A* - Dijkstra otimizado com heurística.
     f(n) = g(n) + h(n)
+    graph: dicionário de adjacência {nó: {vizinho: peso}}, WeightedDirectedGraph ou CSRGraph.
+    queue: nome da fila de prioridade ('binary', '4-ary', 'pairing' ou 'radix').
+    bidirectional: busca também a partir do destino (só WeightedDirectedGraph; TypeError nos outros).
+    heuristic: função h(nó, destino, coordinates) ou nome de métrica de heuristics.METRICS
+               ('planar', 'equirectangular', 'haversine'); o padrão é a distância euclidiana nas
+               coordenadas como estão, que só vale para (x, y) já projetados em metros.
+               Para coordenadas (lat, lon) do OSM use 'haversine' (ou 'equirectangular'),
+               ou um landmarks.LandmarkHeuristic.
+    Os valores de h são calculados uma vez por nó em cada consulta (heuristics.GoalHeuristic).
+    stats: SearchStats opcional que recebe os contadores e o tempo da busca.
     """
-    pq = PriorityQueue()
-    distances = {node: float('inf') for node in graph}
-    distances[start] = 0
+    started = stats.start() if stats is not None else None
+    if bidirectional:
+        from .bidirectional import bidirectional_a_star
+        result = bidirectional_a_star(graph, start, goal, coordinates, queue, heuristic, stats)
+    elif isinstance(graph, CSRGraph):
+        result = _a_star_csr(graph, start, goal, coordinates, queue, heuristic, stats)
+    # O WeightedDirectedGraph já guarda a adjacência como dicionário: usa direto, sem conversão
+    elif isinstance(graph, WeightedDirectedGraph):
+        result = _a_star_dict(graph.edges, start, goal, coordinates, queue, heuristic, stats)
+    else:
+        result = _a_star_dict(graph, start, goal, coordinates, queue, heuristic, stats)
+    if stats is not None:
+        stats.finish(started)
+    return result
+
+def _a_star_dict(graph, start, goal, coordinates, queue='binary', heuristic=heuristic, stats=None):
+    """A* sobre a adjacência em dicionário {nó: {vizinho: peso}}."""
+    # Fila indexada: vizinhos melhorados têm a prioridade atualizada (decrease-key)
+    # em vez de ganharem uma nova entrada duplicada
+    pq = make_queue(queue)
+    inf = float('inf')
+    # Só os nós alcançados entram no dicionário (ausente = infinito)
+    distances = {start: 0}
     previous = {}
+    h = bind_heuristic(_resolve(heuristic), goal, coordinates)
+    push, pop = pq.push, pq.pop
+    # Com stats, push/pop passam a contar as operações (sem custo quando stats é None)
+    if stats is not None:
+        push, pop = stats.instrument(push, pop, pq.__len__, distances.get)
     
-    pq.push(heuristic(start, goal, coordinates), start)
+    # h infinito: o nó não alcança o destino (ex.: beco sem saída no ALT) e não entra na fila
+    if h[start] < inf:
+        push(h[start], start)
     
     while not pq.is_empty():
-        current = pq.pop()
+        current = pop()
         
         if current == goal:
             break
@@ -28,11 +76,13 @@ def a_star(graph, start, goal, coordinates):
         for neighbor, weight in graph[current].items():
             new_distance = distances[current] + weight
             
-            if new_distance < distances[neighbor]:
+            if new_distance < distances.get(neighbor, inf):
+                f_score = new_distance + h[neighbor]
+                if f_score == inf:
+                    continue
                 distances[neighbor] = new_distance
                 previous[neighbor] = current
-                f_score = new_distance + heuristic(neighbor, goal, coordinates)
-                pq.push(f_score, neighbor)
+                push(f_score, neighbor)
     
     # Reconstrói o caminho
     path = []
@@ -43,4 +93,59 @@ def a_star(graph, start, goal, coordinates):
     path.append(start)
     path.reverse()
     
-    return path, distances[goal]
\ No newline at end of file
+    return path, distances.get(goal, inf)
+
+def _a_star_csr(graph, start, goal, coordinates=None, queue='binary', heuristic=heuristic, stats=None):
+    """
+    A* direto sobre um CSRGraph, trabalhando com os índices densos.
+    Se coordinates for None, usa as coordenadas armazenadas no próprio grafo.
+    """
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    node_ids = graph.node_ids
+    s = graph.index_of(start)
+    g = graph.index_of(goal)
+    h = bind_heuristic_csr(_resolve(heuristic), goal, graph, coordinates)
+
+    n = len(node_ids)
+    inf = float('inf')
+    distances = [inf] * n
+    distances[s] = 0
+    previous = [-1] * n
+
+    pq = make_queue(queue)
+    push, pop = pq.push, pq.pop
+    if stats is not None:
+        push, pop = stats.instrument(push, pop, pq.__len__, distances.__getitem__, node_ids.__getitem__)
+    # Nós com h infinito não alcançam o destino e ficam fora da fila
+    if h[s] < inf:
+        push(h[s], s)
+
+    while not pq.is_empty():
+        current = pop()
+
+        if current == g:
+            break
+
+        d = distances[current]
+        for e in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[e]
+            new_distance = d + weights[e]
+
+            if new_distance < distances[neighbor]:
+                f_score = new_distance + h[neighbor]
+                if f_score == inf:
+                    continue
+                distances[neighbor] = new_distance
+                previous[neighbor] = current
+                push(f_score, neighbor)
+
+    # Reconstrói o caminho (já convertido para os ids originais)
+    path = []
+    current = g
+    while previous[current] != -1:
+        path.append(node_ids[current])
+        current = previous[current]
+    path.append(start)
+    path.reverse()
+
+    return path, distances[g]
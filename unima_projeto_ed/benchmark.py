@@ -0,0 +1,456 @@
+import argparse
+import gc
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+from array import array
+from .Dijkstra import Dijkstra
+from .a_star import a_star
+from .csr_graph import CSRGraph
+from .grafo import haversine
+from .weighted_graph import WeightedDirectedGraph
+
+# ---------------------------------------------
+# Benchmarks de caminho mínimo em grafos sintéticos parecidos com malhas de ruas
+# ---------------------------------------------
+# - Os grafos são gerados a partir de uma semente (mesma semente = mesmo grafo e mesmas
+#   consultas), de 10^3 a 10^6 vértices:
+#     grid:      malha com coordenadas perturbadas e alguns quarteirões sem rua
+#     geometric: pontos aleatórios ligados aos vizinhos a até um raio (grafo geométrico aleatório)
+# - Cada combinação algoritmo / formato do grafo / fila de prioridade responde as mesmas
+#   consultas: algumas rodadas de aquecimento fora da medição e depois 'repeat' rodadas
+#   medidas consulta a consulta, com o coletor de lixo desligado (como no timeit).
+# - O resultado é um JSON com os percentis dos tempos, para comparar um commit com outro:
+#     python -m unima_projeto_ed.benchmark --sizes 1000 10000 --output atual.json
+#     python -m unima_projeto_ed.benchmark --sizes 1000 10000 --baseline anterior.json
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_ALGORITHMS = ('dijkstra', 'a_star', 'bidirectional_a_star')
+PERCENTILES = (50, 90, 99)
+
+# Origem das coordenadas sintéticas (Maceió) e distância entre ruas vizinhas, em graus (~110 m)
+ORIGIN = (-9.66, -35.74)
+SPACING = 0.001
+
+
+class SyntheticGraph:
+    """
+    Grafo de ruas sintético: vértices 0..n-1 com coordenadas e arestas não-direcionadas.
+    As arestas ficam em dois arrays (sources[i] <-> targets[i]) para caber na memória com
+    milhões de vértices; build() gera o grafo em cada formato, com pesos em metros.
+    """
+
+    def __init__(self, kind, size, seed, coordinates, sources, targets):
+        self.kind = kind
+        # size: tamanho pedido (o gerador pode arredondar, ex.: lado da malha)
+        self.size = size
+        self.seed = seed
+        # coordinates: lista de (lat, lon), indexada pelo vértice
+        self.coordinates = coordinates
+        self.sources = sources
+        self.targets = targets
+
+    def vertex_count(self):
+        return len(self.coordinates)
+
+    # Quantidade de arestas direcionadas (cada rua vale nos dois sentidos)
+    def edge_count(self):
+        return 2 * len(self.sources)
+
+    # Comprimento (metros) de cada aresta, vetorizado com numpy quando disponível
+    def weights(self):
+        coordinates = self.coordinates
+        try:
+            import numpy as np
+        except ImportError:
+            return array('d', (haversine(coordinates[u], coordinates[v])
+                               for u, v in zip(self.sources, self.targets)))
+        from .grafo import haversine_array
+
+        points = np.array(coordinates, dtype=float).reshape(-1, 2)
+        u = np.frombuffer(self.sources, dtype=np.int64)
+        v = np.frombuffer(self.targets, dtype=np.int64)
+        weights = array('d')
+        weights.frombytes(haversine_array(points[u, 0], points[u, 1], points[v, 0], points[v, 1]).tobytes())
+        return weights
+
+    def build(self, backend):
+        """Grafo no formato 'weighted' (WeightedDirectedGraph) ou 'csr' (CSRGraph com coordenadas)."""
+        weights = self.weights()
+        if backend == 'weighted':
+            graph = WeightedDirectedGraph()
+            for v in range(self.vertex_count()):
+                graph.add_vertex(v)
+            graph.add_edges_from(zip(self.sources, self.targets, weights))
+            graph.add_edges_from(zip(self.targets, self.sources, weights))
+            return graph
+        if backend == 'csr':
+            coords = array('d')
+            for lat, lon in self.coordinates:
+                coords.append(lat)
+                coords.append(lon)
+            return CSRGraph._from_edge_lists(
+                array('q', range(self.vertex_count())), self.sources + self.targets,
+                self.targets + self.sources, weights + weights, coords)
+        raise ValueError(f"unknown graph backend: {backend!r}")
+
+
+def grid_graph(size, seed=0, jitter=0.35, drop=0.1):
+    """
+    Malha de ruas com cerca de 'size' vértices (lado = raiz de size, arredondado).
+    jitter: deslocamento máximo de cada cruzamento, em frações do quarteirão.
+    drop: fração dos trechos de rua removidos (quarteirões maiores, becos sem saída).
+    """
+    rng = random.Random(seed)
+    side = max(2, round(math.sqrt(size)))
+    lat0, lon0 = ORIGIN
+    coordinates = [(lat0 + (r + rng.uniform(-jitter, jitter)) * SPACING,
+                    lon0 + (c + rng.uniform(-jitter, jitter)) * SPACING)
+                   for r in range(side) for c in range(side)]
+    sources, targets = array('q'), array('q')
+    for r in range(side):
+        for c in range(side):
+            v = r * side + c
+            if c + 1 < side and rng.random() >= drop:
+                sources.append(v)
+                targets.append(v + 1)
+            if r + 1 < side and rng.random() >= drop:
+                sources.append(v)
+                targets.append(v + side)
+    return SyntheticGraph('grid', size, seed, coordinates, sources, targets)
+
+
+def random_geometric_graph(size, seed=0, degree=6):
+    """
+    Grafo geométrico aleatório: 'size' pontos uniformes numa área com a mesma densidade da
+    malha, cada um ligado aos pontos a até um raio escolhido para dar 'degree' vizinhos em média.
+    """
+    rng = random.Random(seed)
+    side = math.sqrt(size) * SPACING
+    radius = side * math.sqrt(degree / (math.pi * size))
+    lat0, lon0 = ORIGIN
+    coordinates = [(lat0 + rng.random() * side, lon0 + rng.random() * side) for _ in range(size)]
+
+    # Células de lado 'radius': vizinhos só podem estar na mesma célula ou nas adjacentes
+    cells = {}
+    for v, (lat, lon) in enumerate(coordinates):
+        cells.setdefault((int((lat - lat0) / radius), int((lon - lon0) / radius)), []).append(v)
+    sources, targets = array('q'), array('q')
+    limit = radius * radius
+    for (cx, cy), members in cells.items():
+        # Metade das células vizinhas: cada par de células é visitado uma vez só
+        for dx, dy in ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1)):
+            others = cells.get((cx + dx, cy + dy))
+            if others is None:
+                continue
+            for i, u in enumerate(members):
+                ulat, ulon = coordinates[u]
+                for v in (others[i + 1:] if dx == dy == 0 else others):
+                    vlat, vlon = coordinates[v]
+                    if (ulat - vlat)**2 + (ulon - vlon)**2 <= limit:
+                        sources.append(u)
+                        targets.append(v)
+    return SyntheticGraph('geometric', size, seed, coordinates, sources, targets)
+
+
+GENERATORS = {
+    'grid': grid_graph,
+    'geometric': random_geometric_graph,
+}
+
+
+# ---------------------------------------------
+# Algoritmos comparados
+# ---------------------------------------------
+# Cada função de preparo recebe (grafo, coordenadas, fila) e devolve consulta(origem, destino)
+# -> distância. O que ela faz antes de devolver (ex.: a hierarquia do CH) é o pré-processamento,
+# medido à parte das consultas.
+
+def _prepare_dijkstra(graph, coordinates, queue):
+    return lambda source, target: Dijkstra(graph, source, target, queue=queue, quiet=True).distance
+
+
+def _prepare_bidirectional_dijkstra(graph, coordinates, queue):
+    return lambda source, target: Dijkstra(graph, source, target, queue=queue, quiet=True,
+                                           bidirectional=True).distance
+
+
+def _prepare_a_star(graph, coordinates, queue):
+    # Um CSRGraph usa as coordenadas guardadas nele mesmo
+    if isinstance(graph, CSRGraph):
+        coordinates = None
+    return lambda source, target: a_star(graph, source, target, coordinates, queue=queue,
+                                         heuristic='haversine')[1]
+
+
+def _prepare_bidirectional_a_star(graph, coordinates, queue):
+    return lambda source, target: a_star(graph, source, target, coordinates, queue=queue,
+                                         bidirectional=True, heuristic='haversine')[1]
+
+
+def _prepare_alt(graph, coordinates, queue):
+    from .landmarks import LandmarkHeuristic
+    landmarks = LandmarkHeuristic.build(graph)
+    return lambda source, target: a_star(graph, source, target, coordinates, queue=queue,
+                                         heuristic=landmarks)[1]
+
+
+def _prepare_ch(graph, coordinates, queue):
+    from .contraction_hierarchies import ContractionHierarchy
+    hierarchy = ContractionHierarchy(graph)
+    return lambda source, target: hierarchy.query(source, target)[1]
+
+
+# nome -> (formatos de grafo aceitos, fila padrão ou None se não usa fila, função de preparo)
+ALGORITHMS = {
+    'dijkstra': (('weighted', 'csr'), 'heapq', _prepare_dijkstra),
+    'a_star': (('weighted', 'csr'), 'binary', _prepare_a_star),
+    'bidirectional_dijkstra': (('weighted',), 'heapq', _prepare_bidirectional_dijkstra),
+    'bidirectional_a_star': (('weighted',), 'binary', _prepare_bidirectional_a_star),
+    'alt': (('weighted',), 'binary', _prepare_alt),
+    'ch': (('weighted',), None, _prepare_ch),
+}
+
+
+# ---------------------------------------------
+# Medição
+# ---------------------------------------------
+
+def percentile(values, p):
+    """Percentil p (0 a 100) de uma lista, com interpolação linear entre as posições vizinhas."""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * p / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(times):
+    """Estatísticas (segundos) de uma lista de tempos: mínimo, média, percentis e máximo."""
+    summary = {
+        'samples': len(times),
+        'min': min(times) if times else float('nan'),
+        'mean': sum(times) / len(times) if times else float('nan'),
+    }
+    for p in PERCENTILES:
+        summary[f'p{p}'] = percentile(times, p)
+    summary['max'] = max(times) if times else float('nan')
+    return summary
+
+
+def time_queries(query, pairs, warmup=1, repeat=3):
+    """
+    Mede query(origem, destino) para cada par: 'warmup' rodadas sem medir e depois 'repeat'
+    rodadas medidas uma consulta por vez. Retorna (tempos, distâncias da última rodada).
+    """
+    for _ in range(warmup):
+        for source, target in pairs:
+            query(source, target)
+
+    times, distances = [], []
+    clock = time.perf_counter
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            distances = []
+            for source, target in pairs:
+                started = clock()
+                distance = query(source, target)
+                times.append(clock() - started)
+                distances.append(distance)
+    finally:
+        if enabled:
+            gc.enable()
+    return times, distances
+
+
+def query_pairs(graph, count, seed=0):
+    """'count' pares (origem, destino) de vértices sorteados a partir da semente."""
+    rng = random.Random(seed)
+    n = graph.vertex_count()
+    return [(rng.randrange(n), rng.randrange(n)) for _ in range(count)]
+
+
+def _same_distance(a, b):
+    if math.isinf(a) or math.isinf(b):
+        return a == b
+    return abs(a - b) <= 1e-6 * max(1.0, abs(a))
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, generators=tuple(GENERATORS), algorithms=DEFAULT_ALGORITHMS,
+                   backends=('weighted', 'csr'), queues=None, queries=100, warmup=1, repeat=3, seed=0,
+                   log=None):
+    """
+    Roda todas as combinações e devolve um dicionário pronto para JSON:
+    {'meta': {...}, 'results': [uma entrada por grafo/algoritmo/formato/fila]}.
+    queues: filas a comparar (nomes de priority_queue.QUEUE_BACKENDS ou 'heapq');
+            None usa só a fila padrão de cada algoritmo.
+    log: função chamada com uma linha de texto por resultado (ex.: print).
+    As distâncias de todas as combinações são conferidas contra a primeira de cada grafo
+    ('mismatches' conta as divergências).
+    """
+    for name in algorithms:
+        if name not in ALGORITHMS:
+            raise ValueError(f"unknown algorithm: {name!r}")
+    results = []
+    for kind in generators:
+        for size in sizes:
+            started = time.perf_counter()
+            synthetic = GENERATORS[kind](size, seed=seed)
+            generate_seconds = time.perf_counter() - started
+            pairs = query_pairs(synthetic, queries, seed)
+            reference = None
+
+            for backend in backends:
+                started = time.perf_counter()
+                graph = synthetic.build(backend)
+                build_seconds = time.perf_counter() - started
+
+                for name in algorithms:
+                    supported, default_queue, prepare = ALGORITHMS[name]
+                    if backend not in supported:
+                        continue
+                    for queue in ([default_queue] if queues is None or default_queue is None else queues):
+                        # 'heapq' é a fila própria do Dijkstra; o A* só usa as de priority_queue
+                        if queue == 'heapq' and default_queue != 'heapq':
+                            continue
+                        result = {
+                            'graph': kind,
+                            'size': size,
+                            'vertices': synthetic.vertex_count(),
+                            'edges': synthetic.edge_count(),
+                            'algorithm': name,
+                            'backend': backend,
+                            'queue': queue,
+                            'queries': len(pairs),
+                            'warmup': warmup,
+                            'repeat': repeat,
+                            'generate_seconds': generate_seconds,
+                            'build_seconds': build_seconds,
+                        }
+                        try:
+                            started = time.perf_counter()
+                            query = prepare(graph, synthetic.coordinates, queue)
+                            result['preprocess_seconds'] = time.perf_counter() - started
+                            times, distances = time_queries(query, pairs, warmup, repeat)
+                        except Exception as exc:
+                            # Combinação que não funciona neste grafo (ex.: falta de memória
+                            # no pré-processamento): fica registrada e as outras continuam
+                            result['error'] = f"{type(exc).__name__}: {exc}"
+                            results.append(result)
+                            if log is not None:
+                                log(f"{kind:>9} {synthetic.vertex_count():>8} {name:>22} {backend:>8} "
+                                    f"{str(queue):>7}  error: {result['error']}")
+                            continue
+
+                        if reference is None:
+                            reference = distances
+                        result['reachable'] = sum(1 for d in distances if not math.isinf(d))
+                        result['mismatches'] = sum(1 for a, b in zip(distances, reference)
+                                                   if not _same_distance(a, b))
+                        result['time'] = summarize(times)
+                        results.append(result)
+                        if log is not None:
+                            log(_format_result(result))
+            del graph
+    return {'meta': _metadata(seed), 'results': results}
+
+
+# Informações do ambiente, para saber de onde cada JSON veio
+def _metadata(seed):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'commit': commit,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'seed': seed,
+    }
+
+
+def _key(result):
+    return (result['graph'], result['size'], result['algorithm'], result['backend'], result['queue'])
+
+
+def _format_result(result):
+    t = result['time']
+    return (f"{result['graph']:>9} {result['vertices']:>8} {result['algorithm']:>22} "
+            f"{result['backend']:>8} {str(result['queue']):>7}  "
+            f"p50={t['p50'] * 1000:9.3f} ms  p90={t['p90'] * 1000:9.3f} ms  p99={t['p99'] * 1000:9.3f} ms")
+
+
+def compare(baseline, current, threshold=0.10, statistic='p50'):
+    """
+    Compara dois resultados de run_benchmarks (ex.: commit anterior e atual).
+    Retorna as combinações medidas nos dois em que 'statistic' piorou mais que 'threshold'
+    (0.10 = 10% mais lento): lista de dicionários com a chave, os dois tempos e a razão.
+    """
+    previous = {_key(result): result['time'][statistic] for result in baseline['results'] if 'time' in result}
+    regressions = []
+    for result in current['results']:
+        if 'time' not in result:
+            continue
+        before = previous.get(_key(result))
+        after = result['time'][statistic]
+        if before and after > before * (1 + threshold):
+            graph, size, algorithm, backend, queue = _key(result)
+            regressions.append({
+                'graph': graph, 'size': size, 'algorithm': algorithm, 'backend': backend, 'queue': queue,
+                'baseline': before, 'current': after, 'ratio': after / before,
+            })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shortest path benchmarks on synthetic road-like graphs.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--graphs', nargs='+', choices=sorted(GENERATORS), default=list(GENERATORS))
+    parser.add_argument('--algorithms', nargs='+', choices=sorted(ALGORITHMS), default=list(DEFAULT_ALGORITHMS))
+    parser.add_argument('--backends', nargs='+', choices=['weighted', 'csr'], default=['weighted', 'csr'])
+    parser.add_argument('--queues', nargs='+', default=None,
+                        help="priority queues to compare (default: each algorithm's own)")
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON results to this file (default: stdout)")
+    parser.add_argument('--baseline', help="JSON from a previous run; exit with status 1 on regressions")
+    parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.graphs, args.algorithms, args.backends, args.queues,
+                            args.queries, args.warmup, args.repeat, args.seed,
+                            log=lambda line: print(line, file=sys.stderr))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        for r in regressions:
+            print(f"regression: {r['graph']} {r['size']} {r['algorithm']} {r['backend']} {r['queue']}: "
+                  f"{r['baseline'] * 1000:.3f} ms -> {r['current'] * 1000:.3f} ms ({r['ratio']:.2f}x)",
+                  file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+from .Dijkstra import ShortestPathResult, _make_queue
+from .a_star import heuristic, _resolve
+from .heuristics import bind_heuristic, bind_heuristic_from
+
+# ---------------------------------------------
+# Busca bidirecional
+# ---------------------------------------------
+# - Uma busca anda para frente a partir da origem (graph.edges) e outra anda para trás
+#   a partir do destino (graph.reverse_edges). Cada uma explora uma "bola" de raio ~d/2,
+#   em vez de uma única bola de raio d.
+# - mu guarda o melhor caminho completo já visto (df[u] + w + db[v] em alguma aresta que
+#   liga as duas buscas). Paramos quando topo_frente + topo_trás >= mu: nenhum caminho
+#   ainda não visto pode ser menor que mu.
+# - No A* bidirecional usamos o potencial médio p(v) = (hf(v) - hb(v)) / 2 na busca para
+#   frente e -p(v) na busca para trás, onde hf(v) <= d(v, destino) e hb(v) <= d(origem, v);
+#   assim as duas buscas usam custos reduzidos compatíveis e o mesmo critério de parada
+#   continua valendo. hb não é h(v, origem): heurísticas como o ALT não são simétricas em
+#   grafos dirigidos.
+# - Um limite infinito quer dizer que o vértice não está em nenhum caminho origem -> destino
+#   (ex.: um beco sem saída no ALT); ele não entra na fila daquele lado.
+
+
+# A busca para trás precisa da adjacência reversa (WeightedDirectedGraph)
+def _check_graph(graph):
+    if not hasattr(graph, 'reverse_edges'):
+        raise TypeError(f"bidirectional search needs a WeightedDirectedGraph, not {type(graph).__name__}")
+
+
+def _bidirectional_search(graph, source, target, potential, queue, stats=None):
+    # potential: função p(v) usada nas chaves da fila (zero para o Dijkstra)
+    # stats: SearchStats opcional (conta as operações das duas filas)
+    # Retorna (mu, vértice de encontro, dist/pais das duas buscas, vértices finalizados de cada lado)
+    inf = float("inf")
+    forward, backward = graph.edges, graph.reverse_edges
+
+    dist = ({source: 0}, {target: 0})
+    previous = ({source: None}, {target: None})
+    settled = (set(), set())
+    queues = (_make_queue(queue), _make_queue(queue))
+    # push/pop de cada lado (instrumentados quando há stats)
+    operations = [(pq.push, pq.pop) for pq in queues]
+    if stats is not None:
+        operations = [stats.instrument(push, pop, pq.__len__, d.get)
+                      for (push, pop), pq, d in zip(operations, queues, dist)]
+    # Chaves infinitas (ou NaN) não entram na fila: o vértice não leva ao outro extremo
+    if potential(source) < inf:
+        operations[0][0](potential(source), source)
+    if -potential(target) < inf:
+        operations[1][0](-potential(target), target)
+
+    mu = 0 if source == target else inf
+    meeting = source if source == target else None
+
+    while queues[0] and queues[1]:
+        top_forward = queues[0].priority_of(queues[0].peek())
+        top_backward = queues[1].priority_of(queues[1].peek())
+        if top_forward + top_backward >= mu:
+            break
+
+        # Expande o lado com a fronteira menor (menos trabalho por passo)
+        side = 0 if len(queues[0]) <= len(queues[1]) else 1
+        adjacency = forward if side == 0 else backward
+        sign = 1 if side == 0 else -1
+        d, prev, done = dist[side], previous[side], settled[side]
+        push, pop = operations[side]
+        other_dist = dist[1 - side]
+
+        u = pop()
+        done.add(u)
+        du = d[u]
+
+        for v, weight in adjacency.get(u, {}).items():
+            if v in done:
+                continue
+            new_distance = du + weight
+            if new_distance < d.get(v, inf):
+                key = new_distance + sign * potential(v)
+                if not key < inf:
+                    continue
+                d[v] = new_distance
+                prev[v] = u
+                push(key, v)
+            # Aresta que liga as duas buscas: candidato a caminho completo
+            if v in other_dist and new_distance + other_dist[v] < mu:
+                mu = new_distance + other_dist[v]
+                meeting = v
+
+    return mu, meeting, dist, previous, settled
+
+
+# Junta as duas meias-árvores em um único mapa de pais ao longo do caminho encontrado.
+# Retorna também os vértices com distância definitiva: os finalizados pela busca para frente
+# e os do caminho encontrado (trechos de um caminho mínimo também são mínimos).
+def _join_paths(meeting, dist, previous, mu, settled):
+    distances = dict(dist[0])
+    parents = dict(previous[0])
+    final = set(settled[0])
+    if meeting is None:
+        return distances, parents, final
+    current = meeting
+    while current is not None:
+        final.add(current)
+        current = parents[current]
+    # Do encontro até o destino, seguindo os "pais" da busca para trás
+    current = meeting
+    while previous[1][current] is not None:
+        following = previous[1][current]
+        parents[following] = current
+        distances[following] = mu - dist[1][following]
+        final.add(following)
+        current = following
+    return distances, parents, final
+
+
+def bidirectional_dijkstra(graph, source, target, queue="heapq", stats=None):
+    """
+    Dijkstra bidirecional sobre um WeightedDirectedGraph.
+    Retorna um ShortestPathResult, como o Dijkstra unidirecional.
+    """
+    _check_graph(graph)
+    mu, meeting, dist, previous, settled = _bidirectional_search(
+        graph, source, target, lambda v: 0, queue, stats)
+    distances, parents, final = _join_paths(meeting, dist, previous, mu, settled)
+    return ShortestPathResult(source, target, distances, parents, len(settled[0]) + len(settled[1]),
+                              final)
+
+
+def bidirectional_a_star(graph, source, target, coordinates, queue="binary", heuristic=heuristic, stats=None):
+    """
+    A* bidirecional sobre um WeightedDirectedGraph.
+    heuristic: h(nó, destino, coordinates) ou nome de métrica; para a busca para trás, d(origem, nó)
+               é estimada por heuristics.bind_heuristic_from (ex.: LandmarkHeuristic.from_source).
+    Retorna (caminho, distância), como o a_star unidirecional.
+    """
+    _check_graph(graph)
+    to_target = bind_heuristic(_resolve(heuristic), target, coordinates)
+    from_source = bind_heuristic_from(_resolve(heuristic), source, coordinates)
+
+    def potential(v):
+        return (to_target[v] - from_source[v]) / 2
+
+    mu, meeting, dist, previous, settled = _bidirectional_search(
+        graph, source, target, potential, queue, stats)
+    distances, parents, final = _join_paths(meeting, dist, previous, mu, settled)
+    result = ShortestPathResult(source, target, distances, parents, len(settled[0]) + len(settled[1]),
+                                final)
+    path = result.path
+    return (path if path else [source]), mu
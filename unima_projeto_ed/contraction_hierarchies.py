@@ -0,0 +1,245 @@
+from heapq import heappush, heappop
+from itertools import count
+
+# ---------------------------------------------
+# Contraction Hierarchies (CH)
+# ---------------------------------------------
+# Pré-processamento (feito uma vez por grafo):
+# - Os vértices são "contraídos" um a um, do menos importante para o mais importante.
+#   A importância é a diferença de arestas: atalhos que a contração criaria menos as
+#   arestas que ela remove (mais vizinhos já contraídos e nível, para espalhar a ordem).
+# - Ao contrair v, para cada par u -> v -> x verificamos com uma busca de testemunha
+#   (Dijkstra local que ignora v) se existe outro caminho u -> x tão curto quanto.
+#   Se não existir, inserimos o atalho u -> x com peso w(u, v) + w(v, x) e lembramos que
+#   o vértice do meio é v (para desempacotar o caminho depois).
+# Consulta:
+# - Busca bidirecional que só "sobe" na hierarquia: para frente pelas arestas que vão para
+#   vértices de ordem maior, para trás pelas arestas que chegam de vértices de ordem maior.
+#   O menor df[v] + db[v] entre os vértices alcançados pelas duas buscas é a resposta.
+# Empates nas filas são desfeitos pela ordem dos vértices no grafo (ou pela ordem de inserção
+# na fila), nunca por id(): assim o mesmo grafo gera sempre a mesma hierarquia.
+
+
+class ContractionHierarchy:
+    def __init__(self, graph, witness_limit=50):
+        # graph: WeightedDirectedGraph (os vértices continuam sendo os ids originais do OSM)
+        # witness_limit: máximo de vértices finalizados em cada busca de testemunha.
+        #                Limites menores deixam o pré-processamento mais rápido, mas podem
+        #                criar atalhos desnecessários (a resposta continua correta).
+        self.witness_limit = witness_limit
+        # rank[v]: posição de v na ordem de contração (maior = mais importante)
+        self.rank = {}
+        # up[u] = {v: peso} para arestas u -> v com rank[v] > rank[u] (busca para frente)
+        self.up = {}
+        # down[v] = {u: peso} para arestas u -> v com rank[u] > rank[v] (busca para trás)
+        self.down = {}
+        # middle[(u, x)] = v quando a aresta u -> x é um atalho que passa por v
+        self.middle = {}
+        self._contract(graph)
+
+    # Quantidade de atalhos criados no pré-processamento
+    def shortcut_count(self):
+        return len(self.middle)
+
+    # ---------------------------------------------
+    # Pré-processamento
+    # ---------------------------------------------
+
+    def _contract(self, graph):
+        # Cópias de trabalho do grafo: arestas que saem e que chegam de cada vértice
+        out_edges = {v: dict(neighbors) for v, neighbors in graph.edges.items()}
+        in_edges = {v: {} for v in out_edges}
+        for v in graph.vertices:
+            out_edges.setdefault(v, {})
+            in_edges.setdefault(v, {})
+        for u, neighbors in out_edges.items():
+            for v, w in neighbors.items():
+                in_edges[v][u] = w
+        # Laços (u -> u) nunca fazem parte de caminhos mínimos
+        for v in out_edges:
+            out_edges[v].pop(v, None)
+            in_edges[v].pop(v, None)
+
+        # deleted_neighbors: vizinhos já contraídos; level: profundidade na hierarquia.
+        # Os dois termos espalham a contração pelo grafo e deixam as buscas de subida curtas.
+        deleted_neighbors = dict.fromkeys(out_edges, 0)
+        level = dict.fromkeys(out_edges, 0)
+        # Posição de cada vértice no grafo, para desempatar prioridades iguais
+        position = {v: i for i, v in enumerate(out_edges)}
+
+        # Para estimar a prioridade basta uma busca de testemunha mais curta
+        estimate_limit = max(1, self.witness_limit // 5)
+
+        def priority(v):
+            shortcuts = len(self._shortcuts_for(v, out_edges, in_edges, estimate_limit))
+            edge_difference = shortcuts - len(in_edges[v]) - len(out_edges[v])
+            return edge_difference + deleted_neighbors[v] + level[v]
+
+        # current[v]: prioridade mais recente de v (entradas da fila com outro valor estão velhas)
+        current = {}
+        heap = []
+        for v in out_edges:
+            current[v] = priority(v)
+            heappush(heap, (current[v], position[v], v))
+
+        order = 0
+        while heap:
+            p, _, v = heappop(heap)
+            if v in self.rank or p != current[v]:
+                continue
+            # Atualização preguiçosa: se a prioridade piorou, volta para a fila
+            p = priority(v)
+            if heap and p > heap[0][0]:
+                current[v] = p
+                heappush(heap, (p, position[v], v))
+                continue
+
+            for u, x, weight in self._shortcuts_for(v, out_edges, in_edges):
+                out_edges[u][x] = weight
+                in_edges[x][u] = weight
+                self.middle[(u, x)] = v
+
+            # Todas as arestas restantes de v ligam v a vértices mais importantes
+            self.rank[v] = order
+            order += 1
+            self.up[v] = out_edges.pop(v)
+            self.down[v] = in_edges.pop(v)
+            neighbors = set(self.up[v]) | set(self.down[v])
+            for x in self.up[v]:
+                del in_edges[x][v]
+            for u in self.down[v]:
+                del out_edges[u][v]
+
+            # A contração muda a vizinhança: recalcula a prioridade dos vizinhos
+            for u in neighbors:
+                deleted_neighbors[u] += 1
+                level[u] = max(level[u], level[v] + 1)
+                current[u] = priority(u)
+                heappush(heap, (current[u], position[u], u))
+
+    # Atalhos (u, x, peso) necessários para contrair v
+    def _shortcuts_for(self, v, out_edges, in_edges, limit=None):
+        shortcuts = []
+        outgoing = out_edges[v]
+        if not outgoing:
+            return shortcuts
+        max_out = max(outgoing.values())
+        for u, w_in in in_edges[v].items():
+            # Uma busca de testemunha por vizinho de entrada cobre todos os x
+            targets = {x for x in outgoing if x != u}
+            if not targets:
+                continue
+            witness = self._witness_search(u, v, w_in + max_out, targets, out_edges,
+                                           limit or self.witness_limit)
+            for x in targets:
+                via_v = w_in + outgoing[x]
+                if witness.get(x, float('inf')) > via_v:
+                    shortcuts.append((u, x, via_v))
+        return shortcuts
+
+    # Dijkstra local a partir de 'source' que ignora 'excluded'.
+    # Para quando passa de max_cost, quando todos os 'targets' foram finalizados
+    # ou quando atinge o limite de vértices finalizados.
+    def _witness_search(self, source, excluded, max_cost, targets, out_edges, limit):
+        distances = {source: 0}
+        tie = count(1)
+        heap = [(0, 0, source)]
+        settled = 0
+        remaining = len(targets)
+        while heap:
+            d, _, u = heappop(heap)
+            if d > distances[u]:
+                continue
+            if d > max_cost:
+                break
+            if u in targets:
+                remaining -= 1
+                if remaining == 0:
+                    break
+            settled += 1
+            if settled > limit:
+                break
+            for v, w in out_edges[u].items():
+                if v == excluded:
+                    continue
+                nd = d + w
+                if nd < distances.get(v, float('inf')):
+                    distances[v] = nd
+                    heappush(heap, (nd, next(tie), v))
+        return distances
+
+    # ---------------------------------------------
+    # Consulta
+    # ---------------------------------------------
+
+    # Busca que só sobe na hierarquia, a partir de 'start', usando 'adjacency' (up ou down)
+    @staticmethod
+    def _upward_search(start, adjacency):
+        distances = {start: 0}
+        previous = {start: None}
+        tie = count(1)
+        heap = [(0, 0, start)]
+        while heap:
+            d, _, u = heappop(heap)
+            if d > distances[u]:
+                continue
+            for v, w in adjacency[u].items():
+                nd = d + w
+                if nd < distances.get(v, float('inf')):
+                    distances[v] = nd
+                    previous[v] = u
+                    heappush(heap, (nd, next(tie), v))
+        return distances, previous
+
+    def query(self, source, target):
+        """
+        Caminho mínimo de source até target usando a hierarquia.
+        Retorna (caminho, distância), como o a_star; sem caminho: ([source], infinito).
+        """
+        if source not in self.rank or target not in self.rank:
+            raise KeyError("source and target must be vertices of the graph")
+        if source == target:
+            return [source], 0
+
+        forward, forward_prev = self._upward_search(source, self.up)
+        backward, backward_prev = self._upward_search(target, self.down)
+
+        # Vértice mais alto do caminho: menor df[v] + db[v]
+        best, meeting = float('inf'), None
+        smaller, larger = (forward, backward) if len(forward) <= len(backward) else (backward, forward)
+        for v, d in smaller.items():
+            if v in larger and d + larger[v] < best:
+                best, meeting = d + larger[v], v
+
+        if meeting is None:
+            return [source], float('inf')
+
+        # Caminho na hierarquia (com atalhos): source ... meeting ... target
+        upward = []
+        v = meeting
+        while v is not None:
+            upward.append(v)
+            v = forward_prev[v]
+        upward.reverse()
+        v = backward_prev[meeting]
+        while v is not None:
+            upward.append(v)
+            v = backward_prev[v]
+
+        return self._unpack(upward), best
+
+    # Substitui cada atalho pelos vértices originais que ele representa
+    def _unpack(self, path):
+        unpacked = [path[0]]
+        for a, b in zip(path, path[1:]):
+            stack = [(a, b)]
+            while stack:
+                u, x = stack.pop()
+                v = self.middle.get((u, x))
+                if v is None:
+                    unpacked.append(x)
+                else:
+                    # Empilha a segunda metade primeiro para processar u -> v antes
+                    stack.append((v, x))
+                    stack.append((u, v))
+        return unpacked
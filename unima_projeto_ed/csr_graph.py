@@ -0,0 +1,179 @@
+from array import array
+from .grafo import haversine
+
+# Grafo direcionado compacto no formato CSR (Compressed Sparse Row).
+# Os ids originais (ex.: ids de nós do OSM) são remapeados para inteiros densos 0..n-1.
+# As arestas que saem do vértice i ficam em targets/weights[offsets[i]:offsets[i + 1]].
+# O grafo é imutável: não há métodos para adicionar ou remover arestas.
+class CSRGraph:
+    __slots__ = ('node_ids', 'offsets', 'targets', 'weights', 'coordinates', '_index')
+
+    def __init__(self, node_ids, offsets, targets, weights, coordinates=None):
+        # node_ids: sequência índice -> id original do vértice
+        self.node_ids = node_ids
+        # offsets: n + 1 posições de início das listas de adjacência
+        self.offsets = offsets
+        # targets: índice denso do destino de cada aresta
+        self.targets = targets
+        # weights: peso de cada aresta (mesma ordem de targets)
+        self.weights = weights
+        # coordinates: (opcional) lat/lon intercalados, 2 * n valores
+        self.coordinates = coordinates
+        # Mapa id original -> índice, construído só quando for necessário
+        self._index = None
+
+    # Cria o CSR a partir de listas de arestas (origem, destino, peso) já em índices densos
+    @classmethod
+    def _from_edge_lists(cls, node_ids, sources, targets, weights, coordinates=None):
+        n = len(node_ids)
+        # Conta quantas arestas saem de cada vértice
+        offsets = array('q', bytes(8 * (n + 1)))
+        for u in sources:
+            offsets[u + 1] += 1
+        # Soma acumulada: offsets[i] passa a ser o início da linha i
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+
+        # Distribui as arestas nas suas linhas (counting sort pela origem)
+        m = len(sources)
+        csr_targets = array('i', bytes(4 * m))
+        csr_weights = array('d', bytes(8 * m))
+        cursor = array('q', offsets[:-1])
+        for u, v, w in zip(sources, targets, weights):
+            pos = cursor[u]
+            csr_targets[pos] = v
+            csr_weights[pos] = w
+            cursor[u] = pos + 1
+
+        return cls(node_ids, offsets, csr_targets, csr_weights, coordinates)
+
+    # Constrói o CSR a partir de um WeightedDirectedGraph
+    @classmethod
+    def from_weighted_graph(cls, graph, coordinates=None):
+        node_ids = list(graph.edges)
+        # Inclui vértices que só existem no conjunto (sem lista de arestas)
+        known = set(node_ids)
+        node_ids.extend(v for v in graph.vertices if v not in known)
+        index = {node: i for i, node in enumerate(node_ids)}
+
+        sources = array('i')
+        targets = array('i')
+        weights = array('d')
+        for source, neighbors in graph.edges.items():
+            u = index[source]
+            for target, weight in neighbors.items():
+                sources.append(u)
+                targets.append(index[target])
+                weights.append(weight)
+
+        coords = None
+        if coordinates is not None:
+            coords = array('d')
+            for node in node_ids:
+                lat, lon = coordinates[node]
+                coords.append(lat)
+                coords.append(lon)
+
+        csr = cls._from_edge_lists(node_ids, sources, targets, weights, coords)
+        csr._index = index
+        return csr
+
+    # Constrói o CSR direto da saída de data.get_osm_data (mesmas regras de grafo.build_graph)
+    @classmethod
+    def from_osm_data(cls, nodes, ways):
+        index = {}
+        node_ids = array('q')
+        coords = array('d')
+        sources = array('i')
+        targets = array('i')
+        weights = array('d')
+        # Evita arestas repetidas quando dois ways compartilham o mesmo trecho
+        seen = set()
+
+        for way in ways:
+            for i in range(len(way) - 1):
+                n1, n2 = way[i], way[i + 1]
+                if n1 not in nodes or n2 not in nodes:
+                    continue
+                for node in (n1, n2):
+                    if node not in index:
+                        index[node] = len(node_ids)
+                        node_ids.append(node)
+                        lat, lon = nodes[node]
+                        coords.append(lat)
+                        coords.append(lon)
+                u, v = index[n1], index[n2]
+                dist = haversine(nodes[n1], nodes[n2])
+                for a, b in ((u, v), (v, u)):
+                    key = (a << 32) | b
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    sources.append(a)
+                    targets.append(b)
+                    weights.append(dist)
+
+        csr = cls._from_edge_lists(node_ids, sources, targets, weights, coords)
+        csr._index = index
+        return csr
+
+    # Retorna o índice denso de um vértice (KeyError se não existir)
+    def index_of(self, vertex):
+        if self._index is None:
+            self._index = {node: i for i, node in enumerate(self.node_ids)}
+        return self._index[vertex]
+
+    # Retorna as coordenadas (lat, lon) de um vértice pelo índice denso
+    def coordinates_at(self, i):
+        return self.coordinates[2 * i], self.coordinates[2 * i + 1]
+
+    # Retorna vizinhos com seus respectivos pesos
+    def get_neighbors_with_weights(self, vertex):
+        if not self.has_vertex(vertex):
+            return []
+        u = self.index_of(vertex)
+        node_ids, targets, weights = self.node_ids, self.targets, self.weights
+        return [(node_ids[targets[e]], weights[e])
+                for e in range(self.offsets[u], self.offsets[u + 1])]
+
+    # Retorna lista dos vizinhos de um vértice
+    def get_neighbors(self, vertex):
+        return [target for target, _ in self.get_neighbors_with_weights(vertex)]
+
+    # Retorna o peso de uma aresta específica
+    def get_weight(self, source, target):
+        for neighbor, weight in self.get_neighbors_with_weights(source):
+            if neighbor == target:
+                return weight
+        return None
+
+    # Verifica se um vértice existe no grafo
+    def has_vertex(self, vertex):
+        try:
+            self.index_of(vertex)
+        except KeyError:
+            return False
+        return True
+
+    # Verifica se existe uma aresta entre dois vértices
+    def has_edge(self, source, target):
+        return self.get_weight(source, target) is not None
+
+    # Retorna lista de todos os vértices
+    def get_vertices(self):
+        return list(self.node_ids)
+
+    # Conta o número total de vértices
+    def vertex_count(self):
+        return len(self.node_ids)
+
+    # Conta o número total de arestas
+    def edge_count(self):
+        return len(self.targets)
+
+    # Bytes ocupados pelos buffers de adjacência (offsets, targets, weights)
+    def nbytes(self):
+        total = 0
+        for buf in (self.offsets, self.targets, self.weights):
+            total += len(buf) * buf.itemsize
+        return total
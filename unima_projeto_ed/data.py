@@ -1,33 +1,425 @@
-import requests
+import codecs
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from functools import partial
 
-def get_osm_data(bbox):
-    """
-    Consulta a Overpass API para buscar ruas e cruzamentos dentro de um bounding box.
-    bbox: [sul, oeste, norte, leste]
-    Retorna: lista de nós e lista de caminhos
-    """
-    
-    overpass_url = "http://overpass-api.de/api/interpreter"
-    
-    query = f"""
+# O requests só é carregado quando uma consulta é feita (ou quando data.requests é acessado),
+# para não pesar na importação do pacote
+def __getattr__(name):
+    if name == 'requests':
+        import requests
+        return requests
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+OVERPASS_URL = "http://overpass-api.de/api/interpreter"
+# Tamanho dos blocos lidos da resposta (ou do arquivo) no modo streaming
+CHUNK_SIZE = 64 * 1024
+
+
+# Monta a consulta Overpass de um bbox; as coordenadas são arredondadas para 7 casas
+# (precisão do OSM), então bboxes equivalentes geram exatamente a mesma consulta
+def build_query(bbox):
+    south, west, north, east = (round(float(c), 7) for c in bbox)
+    return f"""
     [out:json][timeout:25];
-    way["highway"]({bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]});
+    way["highway"]({south},{west},{north},{east});
     (._;>;);
     out body;
     """
-    
-    response = requests.get(overpass_url, params={'data': query})
-    response.raise_for_status()
-    data = response.json()
-    
-    # Separar nós e ways
+
+
+class OverpassCache:
+    """
+    Cache em disco das respostas da Overpass API.
+    Cada resposta fica em '<sha256 da consulta>.json.gz' dentro de 'directory'.
+    ttl: segundos até uma resposta ser considerada velha (None = nunca expira).
+    max_bytes: tamanho máximo do diretório; as respostas gravadas há mais tempo saem primeiro.
+    """
+
+    def __init__(self, directory, ttl=7 * 24 * 3600, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    # Chave da consulta: espaços são normalizados antes do hash
+    @staticmethod
+    def key(query):
+        normalized = ' '.join(query.split())
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def _path(self, query):
+        return os.path.join(self.directory, self.key(query) + '.json.gz')
+
+    # Arquivo (binário, já descompactado) da resposta guardada, ou None se ausente/expirada.
+    # verify: lê o arquivo inteiro antes (ver _intact); um arquivo truncado ou corrompido é
+    # apagado e conta como ausente. Serve para quem processa a resposta enquanto lê.
+    def open(self, query, allow_stale=False, verify=False):
+        path = self._path(query)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if not allow_stale and self.ttl is not None and age > self.ttl:
+                return None
+            if verify and not _intact(path):
+                self.discard(query)
+                return None
+            return gzip.open(path, 'rb')
+        except OSError:
+            return None
+
+    # Resposta guardada para a consulta, ou None (ausente ou expirada, a não ser com allow_stale)
+    def get(self, query, allow_stale=False):
+        f = self.open(query, allow_stale)
+        if f is None:
+            return None
+        try:
+            with f:
+                return json.load(f)
+        except (OSError, EOFError, zlib.error, ValueError):
+            # Arquivo removido no meio da leitura ou corrompido (que sai do cache)
+            self.discard(query)
+            return None
+
+    # Apaga a resposta guardada para a consulta (se houver)
+    def discard(self, query):
+        try:
+            os.remove(self._path(query))
+        except FileNotFoundError:
+            pass
+
+    # Arquivo temporário com nome único no diretório do cache: threads e processos gravando
+    # a mesma consulta ao mesmo tempo nunca escrevem no mesmo arquivo
+    def _temporary(self):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        return tmp
+
+    # Grava a resposta (arquivo temporário + os.replace, para nunca deixar um arquivo pela metade)
+    def put(self, query, data):
+        path = self._path(query)
+        tmp = self._temporary()
+        try:
+            with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._evict()
+
+    # Repassa os blocos de uma resposta enquanto grava no cache; a entrada só passa a existir
+    # quando a resposta termina (se a leitura for interrompida, nada é gravado)
+    def store(self, query, chunks):
+        path = self._path(query)
+        tmp = self._temporary()
+        try:
+            with gzip.open(tmp, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        os.replace(tmp, path)
+        self._evict()
+
+    # Remove as respostas mais antigas até o diretório caber em max_bytes
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json.gz'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    # Apaga todas as respostas guardadas
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json.gz'):
+                os.remove(entry.path)
+
+
+# Confere se um arquivo do cache está inteiro sem interpretar o JSON: o gzip verifica o CRC e o
+# tamanho ao chegar no fim (arquivo truncado ou com bytes trocados falha), e a resposta termina em '}'
+def _intact(path):
+    last = b''
+    try:
+        with gzip.open(path, 'rb') as f:
+            for block in iter(partial(f.read, CHUNK_SIZE), b''):
+                block = block.rstrip()
+                if block:
+                    last = block
+    except (OSError, EOFError, zlib.error):
+        return False
+    return last.endswith(b'}')
+
+
+# Início do array "elements" de uma resposta da Overpass
+_ELEMENTS_START = re.compile(r'"elements"\s*:\s*\[')
+
+
+def iter_elements(chunks):
+    """
+    Lê incrementalmente o array "elements" de uma resposta JSON da Overpass.
+    chunks: iterável de blocos (bytes em UTF-8 ou str), ex.: response.iter_content().
+    Gera um dicionário por elemento; só o bloco atual e o elemento sendo lido ficam em memória.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer = ''
+
+    # Acrescenta o próximo bloco ao buffer; False quando a resposta acabou
+    def read_more():
+        nonlocal buffer
+        for chunk in chunks:
+            if isinstance(chunk, bytes):
+                chunk = utf8.decode(chunk)
+            if chunk:
+                buffer += chunk
+                return True
+        buffer += utf8.decode(b'', final=True)
+        return False
+
+    while True:
+        match = _ELEMENTS_START.search(buffer)
+        if match:
+            position = match.end()
+            break
+        if not read_more():
+            raise ValueError("no 'elements' array in Overpass response")
+
+    while True:
+        # Pula espaços e vírgulas entre os elementos
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position == len(buffer):
+            buffer, position = '', 0
+            if not read_more():
+                raise ValueError("truncated Overpass response")
+            continue
+        if buffer[position] == ']':
+            return
+
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # Elemento incompleto: descarta o que já foi lido e espera o próximo bloco
+            buffer, position = buffer[position:], 0
+            if not read_more():
+                raise ValueError("invalid or truncated Overpass response") from None
+            continue
+        yield element
+        position = end
+        if position > CHUNK_SIZE:
+            buffer, position = buffer[position:], 0
+
+
+# Blocos de um arquivo local, descompactando os '.gz'
+def _file_chunks(path):
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        yield from iter(partial(f.read, CHUNK_SIZE), b'')
+
+
+def iter_osm_elements(bbox, cache=None, offline=False, source=None, session=None, url=OVERPASS_URL):
+    """
+    Mesmas fontes de get_osm_data (API, cache ou arquivo local), mas gera os elementos um a um
+    enquanto a resposta é lida, sem montar o JSON inteiro em memória.
+    As respostas vindas da API são gravadas no cache durante a leitura.
+    session: requests.Session para reaproveitar a conexão entre consultas
+    url: endereço da Overpass API (ex.: uma instância própria)
+    """
+    if source is not None:
+        yield from iter_elements(_file_chunks(source))
+        return
+
+    query = build_query(bbox)
+    if cache is not None:
+        # Verificado antes: um erro no meio da leitura viria depois de elementos já gerados
+        f = cache.open(query, allow_stale=offline, verify=True)
+        if f is not None:
+            with f:
+                yield from iter_elements(iter(partial(f.read, CHUNK_SIZE), b''))
+            return
+    if offline:
+        raise LookupError(f"no cached Overpass response for bbox {list(bbox)} (offline mode)")
+
+    if session is None:
+        import requests
+        session = requests
+
+    response = session.get(url, params={'data': query}, stream=True)
+    try:
+        response.raise_for_status()
+        chunks = response.iter_content(CHUNK_SIZE)
+        if cache is not None:
+            chunks = iter(cache.store(query, chunks))
+            yield from iter_elements(chunks)
+            # Lê o resto da resposta (depois do array) para o cache gravar a resposta completa
+            for _ in chunks:
+                pass
+        else:
+            yield from iter_elements(chunks)
+    finally:
+        response.close()
+
+
+# Separa nós, ways e tags dos elementos de uma resposta da Overpass
+def _parse_elements(elements, with_tags):
     nodes = {}
     ways = []
+    tags = []
     
-    for el in data['elements']:
+    for el in elements:
         if el['type'] == 'node':
             nodes[el['id']] = (el['lat'], el['lon'])
         elif el['type'] == 'way':
             ways.append(el['nodes'])
+            tags.append(el.get('tags', {}))
+    
+    if with_tags:
+        return nodes, ways, tags
+    return nodes, ways
+
+
+def read_osm_file(path, with_tags=False):
+    """
+    Lê um arquivo local no formato JSON da Overpass ('.osm.json', ou '.osm.json.gz' compactado).
+    O arquivo é lido em blocos (iter_elements). Retorna o mesmo que get_osm_data.
+    """
+    return _parse_elements(iter_elements(_file_chunks(path)), with_tags)
+
+
+def get_osm_data(bbox, with_tags=False, cache=None, offline=False, source=None, stream=False):
+    """
+    Consulta a Overpass API para buscar ruas e cruzamentos dentro de um bounding box.
+    bbox: [sul, oeste, norte, leste]
+    with_tags: também retorna as tags de cada caminho (oneway, highway, junction...)
+    cache: OverpassCache; respostas guardadas e ainda válidas evitam a consulta
+    offline: nunca acessa a rede, só usa o cache (mesmo expirado); LookupError se não houver resposta
+    source: caminho de um arquivo '.osm.json' usado no lugar da API (o bbox é ignorado)
+    stream: lê a resposta em blocos (iter_osm_elements) em vez de carregar o JSON inteiro
+    Retorna: lista de nós e lista de caminhos (e lista de tags, alinhada com os caminhos)
+    """
+    if source is not None:
+        return read_osm_file(source, with_tags)
+    if stream:
+        return _parse_elements(iter_osm_elements(bbox, cache, offline), with_tags)
+
+    query = build_query(bbox)
+
+    if cache is not None:
+        data = cache.get(query, allow_stale=offline)
+        if data is not None:
+            return _parse_elements(data['elements'], with_tags)
+    if offline:
+        raise LookupError(f"no cached Overpass response for bbox {list(bbox)} (offline mode)")
+    
+    import requests
+
+    response = requests.get(OVERPASS_URL, params={'data': query})
+    response.raise_for_status()
+    data = response.json()
+
+    if cache is not None:
+        cache.put(query, data)
     
+    return _parse_elements(data['elements'], with_tags)
+
+
+def split_bbox(bbox, tile_size=0.05):
+    """
+    Divide o bbox [sul, oeste, norte, leste] em blocos de no máximo tile_size graus de lado.
+    Retorna a lista de bboxes, linha por linha, de sul para norte e de oeste para leste.
+    """
+    if tile_size <= 0:
+        raise ValueError("tile_size must be positive")
+    south, west, north, east = bbox
+
+    def edges(start, end):
+        count = max(1, math.ceil((end - start) / tile_size - 1e-9))
+        step = (end - start) / count
+        # A última borda é exatamente a do bbox, sem erro de arredondamento acumulado
+        return [start + i * step for i in range(count)] + [end]
+
+    lats, lons = edges(south, north), edges(west, east)
+    return [[lats[i], lons[j], lats[i + 1], lons[j + 1]]
+            for i in range(len(lats) - 1) for j in range(len(lons) - 1)]
+
+
+def get_osm_data_tiled(bbox, tile_size=0.05, max_workers=2, with_tags=False, cache=None,
+                       offline=False, url=OVERPASS_URL):
+    """
+    Igual ao get_osm_data, mas divide o bbox em blocos (split_bbox) consultados em paralelo.
+    Cada thread reaproveita a própria conexão (requests.Session), e cada bloco passa pelo cache.
+    Ways que cruzam a borda entre blocos vêm nas duas respostas e entram uma vez só.
+    max_workers: consultas simultâneas (a Overpass pública aceita poucas por IP).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    local = threading.local()
+    sessions = []
+
+    # Uma sessão por thread: o requests.Session não deve ser compartilhado entre threads
+    def session():
+        if not hasattr(local, 'session'):
+            import requests
+            local.session = requests.Session()
+            sessions.append(local.session)
+        return local.session
+
+    # Lê um bloco e já separa nós e ways, para não guardar os elementos completos
+    def fetch(tile):
+        nodes, ways = {}, []
+        elements = iter_osm_elements(tile, cache, offline, session=None if offline else session(), url=url)
+        for el in elements:
+            if el['type'] == 'node':
+                nodes[el['id']] = (el['lat'], el['lon'])
+            elif el['type'] == 'way':
+                ways.append((el.get('id'), el['nodes'], el.get('tags', {})))
+        return nodes, ways
+
+    nodes, ways, tags = {}, [], []
+    seen = set()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Os resultados são juntados na ordem dos blocos, então a saída é determinística
+            for tile_nodes, tile_ways in executor.map(fetch, split_bbox(bbox, tile_size)):
+                nodes.update(tile_nodes)
+                for way_id, way, way_tags in tile_ways:
+                    key = way_id if way_id is not None else tuple(way)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    ways.append(way)
+                    tags.append(way_tags)
+    finally:
+        for s in sessions:
+            s.close()
+
+    if with_tags:
+        return nodes, ways, tags
     return nodes, ways
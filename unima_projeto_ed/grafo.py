@@ -1,5 +1,4 @@
 from math import radians, cos, sin, asin, sqrt
-import networkx as nx
 
 # Função para calcular a distância haversine entre dois pontos geográficos
 def haversine(coord1, coord2): 
@@ -13,13 +12,291 @@ def haversine(coord1, coord2):
     c = 2 * asin(sqrt(a))
     return R * c
 
-def build_graph(nodes, ways):
+# Valores da tag oneway do OSM
+_ONEWAY_FORWARD = {'yes', 'true', '1'}
+_ONEWAY_REVERSE = {'-1', 'reverse'}
+_ONEWAY_NO = {'no', 'false', '0'}
+# Vias que são mão única mesmo sem a tag oneway
+_IMPLIED_ONEWAY_JUNCTIONS = {'roundabout', 'circular'}
+_IMPLIED_ONEWAY_HIGHWAYS = {'motorway', 'motorway_link'}
+
+def oneway_direction(tags):
+    """
+    Sentido de circulação de um way a partir das suas tags do OSM.
+    Retorna 1 (só no sentido dos nós), -1 (só no sentido contrário) ou 0 (mão dupla).
+    """
+    if not tags:
+        return 0
+    oneway = str(tags.get('oneway', '')).strip().lower()
+    if oneway in _ONEWAY_FORWARD:
+        return 1
+    if oneway in _ONEWAY_REVERSE:
+        return -1
+    if oneway in _ONEWAY_NO:
+        return 0
+    # Rotatórias e autoestradas são mão única implícita
+    if tags.get('junction') in _IMPLIED_ONEWAY_JUNCTIONS or tags.get('highway') in _IMPLIED_ONEWAY_HIGHWAYS:
+        return 1
+    return 0
+
+# Sentidos de todos os ways (mão dupla para todos quando não há tags)
+def _directions(ways, tags):
+    if tags is None:
+        return [0] * len(ways)
+    if len(tags) != len(ways):
+        raise ValueError("tags must have one entry per way")
+    return [oneway_direction(t) for t in tags]
+
+def build_graph(nodes, ways, backend='networkx', tags=None, simplify=False, keep=()):
+    """
+    Monta o grafo de ruas.
+    backend: 'networkx' -> networkx.DiGraph, 'weighted' -> WeightedDirectedGraph (sem networkx),
+             'csr' -> CSRGraph
+    tags: lista com as tags de cada way (get_osm_data(bbox, with_tags=True)); quando dada,
+          ways de mão única (oneway_direction) só ganham a aresta no sentido permitido.
+    simplify: junta as cadeias de nós de grau 2 (simplify_graph); só com backend='weighted'.
+    keep: nós que não podem ser removidos pela simplificação (ex.: origens e destinos).
+    """
+    if simplify:
+        if backend != 'weighted':
+            raise ValueError("simplify is only supported with backend='weighted'")
+        return simplify_graph(build_graph_bulk(nodes, ways, tags=tags), keep)
+    if backend in ('weighted', 'csr'):
+        return build_graph_bulk(nodes, ways, output=backend, tags=tags)
+    if backend != 'networkx':
+        raise ValueError(f"unknown graph backend: {backend!r}")
+
+    # networkx só é importado aqui, para não pesar na importação do pacote
+    import networkx as nx
+
     G = nx.DiGraph()
-    for way in ways:
+    for way, direction in zip(ways, _directions(ways, tags)):
         for i in range(len(way) - 1):
             n1, n2 = way[i], way[i+1]
             if n1 in nodes and n2 in nodes:
                 dist = haversine(nodes[n1], nodes[n2])
-                G.add_edge(n1, n2, weight=dist)
-                G.add_edge(n2, n1, weight=dist)  
+                if direction >= 0:
+                    G.add_edge(n1, n2, weight=dist)
+                if direction <= 0:
+                    G.add_edge(n2, n1, weight=dist)
     return G
+
+
+def build_graph_from_elements(elements):
+    """
+    Monta um WeightedDirectedGraph direto dos elementos da Overpass (ex.: data.iter_osm_elements),
+    à medida que eles chegam, sem guardar a lista de ways. Respeita as tags de mão única.
+    Retorna (grafo, nodes), com nodes = {id: (lat, lon)} para usar como coordenadas.
+    """
+    from .weighted_graph import WeightedDirectedGraph
+
+    graph = WeightedDirectedGraph()
+    nodes = {}
+    # Ways que chegam antes dos seus nós (a Overpass manda os nós primeiro com 'out body')
+    pending = []
+
+    def add_way(way, direction):
+        for i in range(len(way) - 1):
+            n1, n2 = way[i], way[i + 1]
+            if n1 in nodes and n2 in nodes:
+                dist = haversine(nodes[n1], nodes[n2])
+                if direction >= 0:
+                    graph.add_edge(n1, n2, dist)
+                if direction <= 0:
+                    graph.add_edge(n2, n1, dist)
+
+    for el in elements:
+        if el['type'] == 'node':
+            nodes[el['id']] = (el['lat'], el['lon'])
+        elif el['type'] == 'way':
+            way, direction = el['nodes'], oneway_direction(el.get('tags'))
+            if all(node in nodes for node in way):
+                add_way(way, direction)
+            else:
+                pending.append((way, direction))
+
+    for way, direction in pending:
+        add_way(way, direction)
+    return graph, nodes
+
+
+def simplify_graph(graph, keep=()):
+    """
+    Junta as cadeias de nós de grau 2 (nós que só servem para desenhar a rua) em uma única
+    aresta, com peso igual à soma dos trechos.
+    graph: WeightedDirectedGraph; keep: nós que devem continuar no grafo.
+    Retorna um novo WeightedDirectedGraph com os mesmos ids; os nós removidos de cada aresta
+    ficam em geometry[(origem, destino)], e expand_path(caminho) devolve o caminho completo.
+    """
+    from .weighted_graph import WeightedDirectedGraph
+
+    out_edges, in_edges, geometry = graph.edges, graph.reverse_edges, graph.geometry
+    keep = set(keep)
+
+    # Nó de passagem: mão dupla entre exatamente dois vizinhos, ou mão única a -> v -> b
+    def removable(v):
+        if v in keep or v in out_edges[v]:
+            return False
+        out, inc = out_edges[v], in_edges[v]
+        if len(out.keys() | inc.keys()) != 2:
+            return False
+        if len(out) == 1 and len(inc) == 1:
+            return out.keys() != inc.keys()
+        return len(out) == 2 and len(inc) == 2
+
+    endpoints = {v for v in out_edges if not removable(v)}
+    visited = set()
+    simple = WeightedDirectedGraph()
+
+    # Segue a cadeia que começa na aresta u -> first até o próximo nó que fica no grafo
+    def walk(u, first):
+        inner = list(geometry.get((u, first), ()))
+        weight = out_edges[u][first]
+        previous, v = u, first
+        while v not in endpoints:
+            visited.add(v)
+            inner.append(v)
+            following = next(x for x in out_edges[v] if x != previous)
+            inner.extend(geometry.get((v, following), ()))
+            weight += out_edges[v][following]
+            previous, v = v, following
+        return v, weight, inner
+
+    # Entre dois nós fica só a cadeia mais curta; voltas que terminam no próprio nó são descartadas
+    def connect(u):
+        simple.add_vertex(u)
+        for first in out_edges[u]:
+            v, weight, inner = walk(u, first)
+            if v == u:
+                continue
+            current = simple.get_weight(u, v)
+            if current is None or weight < current:
+                simple.add_edge(u, v, weight)
+                if inner:
+                    simple.geometry[(u, v)] = inner
+
+    for u in list(endpoints):
+        connect(u)
+
+    # Ciclos isolados só têm nós de passagem: um nó de cada ciclo vira extremo
+    for v in out_edges:
+        if v not in endpoints and v not in visited:
+            endpoints.add(v)
+            connect(v)
+
+    return simple
+
+
+# Versão vetorizada do haversine: recebe arrays (ou listas) de latitudes/longitudes em graus
+# e calcula todas as distâncias, em metros, de uma vez com NumPy
+def haversine_array(lat1, lon1, lat2, lon2):
+    import numpy as np
+
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2))
+    R = 6371000  # raio da Terra em metros
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    return 2 * R * np.arcsin(np.sqrt(a))
+
+
+def build_graph_bulk(nodes, ways, output='weighted', tags=None):
+    """
+    Constrói o grafo de ruas em bloco, sem networkx.
+    Junta os extremos de todos os trechos em arrays, calcula todas as distâncias numa única
+    passada vetorizada do haversine e remove arestas repetidas (mesmas regras do build_graph:
+    cada trecho vira aresta nos dois sentidos, ou só no sentido permitido pelas tags).
+    output: 'weighted' -> WeightedDirectedGraph, 'csr' -> CSRGraph
+    tags: lista com as tags de cada way, como no build_graph
+    Sem NumPy instalado, usa a construção trecho a trecho em Python puro.
+    """
+    if output not in ('weighted', 'csr'):
+        raise ValueError(f"unknown graph output: {output!r}")
+    try:
+        import numpy as np
+    except ImportError:
+        return _build_graph_python(nodes, ways, output, tags)
+
+    from array import array
+    from itertools import chain
+    from .csr_graph import CSRGraph
+    from .weighted_graph import WeightedDirectedGraph
+
+    # Ids dos nós conhecidos (ordenados, para busca binária) e suas coordenadas
+    ids = np.fromiter(nodes.keys(), dtype=np.int64, count=len(nodes))
+    coords = np.array(list(nodes.values()), dtype=float).reshape(-1, 2)
+    order = np.argsort(ids)
+    ids, coords = ids[order], coords[order]
+
+    # Todos os ways concatenados; o trecho i liga flat[i] a flat[i + 1]
+    lengths = np.fromiter((len(way) for way in ways), dtype=np.int64, count=len(ways))
+    flat = np.fromiter(chain.from_iterable(ways), dtype=np.int64, count=int(lengths.sum()))
+    same_way = np.ones(max(flat.size - 1, 0), dtype=bool)
+    # Trechos que atravessam a fronteira entre dois ways não existem
+    boundaries = np.cumsum(lengths)[:-1]
+    boundaries = boundaries[(boundaries > 0) & (boundaries < flat.size)]
+    same_way[boundaries - 1] = False
+    src, dst = flat[:-1][same_way], flat[1:][same_way]
+    # Sentido de cada trecho (o mesmo do way a que ele pertence)
+    direction = np.repeat(np.array(_directions(ways, tags), dtype=np.int8), np.maximum(lengths - 1, 0))
+
+    # Mantém só trechos com os dois nós presentes em 'nodes'
+    if ids.size:
+        src_pos = np.minimum(np.searchsorted(ids, src), ids.size - 1)
+        dst_pos = np.minimum(np.searchsorted(ids, dst), ids.size - 1)
+        valid = (ids[src_pos] == src) & (ids[dst_pos] == dst)
+        src_pos, dst_pos, direction = src_pos[valid], dst_pos[valid], direction[valid]
+    else:
+        src_pos = dst_pos = np.empty(0, dtype=np.int64)
+        direction = np.empty(0, dtype=np.int8)
+
+    # Arestas nos sentidos permitidos, sem repetição (ordenadas por origem, depois destino)
+    n = max(ids.size, 1)
+    forward, backward = direction >= 0, direction <= 0
+    keys = np.unique(np.concatenate((src_pos[forward] * n + dst_pos[forward],
+                                     dst_pos[backward] * n + src_pos[backward])))
+    a, b = keys // n, keys % n
+    weights = haversine_array(coords[a, 0], coords[a, 1], coords[b, 0], coords[b, 1])
+
+    if output == 'weighted':
+        graph = WeightedDirectedGraph()
+        graph.add_edges_from(zip(ids[a].tolist(), ids[b].tolist(), weights.tolist()))
+        return graph
+
+    # CSR: só os nós usados em alguma aresta, renumerados de 0 a m-1
+    used = np.unique(np.concatenate((a, b)))
+    dense_a, dense_b = np.searchsorted(used, a), np.searchsorted(used, b)
+    offsets = np.zeros(used.size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(dense_a, minlength=used.size), out=offsets[1:])
+
+    def to_array(typecode, values):
+        buf = array(typecode)
+        buf.frombytes(np.ascontiguousarray(values).tobytes())
+        return buf
+
+    csr = CSRGraph(to_array('q', ids[used]),
+                   to_array('q', offsets),
+                   to_array('i', dense_b.astype(np.int32)),
+                   to_array('d', weights),
+                   to_array('d', coords[used].ravel()))
+    return csr
+
+
+# Construção trecho a trecho (usada quando o NumPy não está disponível)
+def _build_graph_python(nodes, ways, output, tags=None):
+    from .csr_graph import CSRGraph
+    from .weighted_graph import WeightedDirectedGraph
+
+    if output == 'csr' and tags is None:
+        return CSRGraph.from_osm_data(nodes, ways)
+    graph = WeightedDirectedGraph()
+    for way, direction in zip(ways, _directions(ways, tags)):
+        for i in range(len(way) - 1):
+            n1, n2 = way[i], way[i + 1]
+            if n1 in nodes and n2 in nodes:
+                dist = haversine(nodes[n1], nodes[n2])
+                if direction >= 0:
+                    graph.add_edge(n1, n2, dist)
+                if direction <= 0:
+                    graph.add_edge(n2, n1, dist)
+    if output == 'csr':
+        return CSRGraph.from_weighted_graph(graph, nodes)
+    return graph
@@ -0,0 +1,153 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from .csr_graph import CSRGraph
+
+# ---------------------------------------------
+# Formato binário do grafo (CSR), versão 1
+# ---------------------------------------------
+# Cabeçalho (little-endian, 32 bytes):
+#   magic 'UNIMAGRF' | versão (uint32) | flags (uint32) | n vértices (uint64) | m arestas (uint64)
+# Seções, cada uma começando em posição múltipla de 8 bytes:
+#   node_ids     int64[n]       ids originais dos vértices (ex.: ids do OSM)
+#   offsets      int64[n + 1]   início da lista de adjacência de cada vértice
+#   targets      int32[m]       índice denso do destino de cada aresta
+#   weights      float32[m]     peso de cada aresta (metros)
+#   coordinates  float64[2n]    lat/lon intercalados (só com a flag HAS_COORDINATES)
+# Na leitura o arquivo é mapeado com mmap e as seções viram memoryviews sobre o mapeamento:
+# nada é copiado nem interpretado, e vários processos (ex.: workers do gunicorn) que abrem
+# o mesmo arquivo compartilham as mesmas páginas do cache do sistema operacional.
+
+MAGIC = b'UNIMAGRF'
+VERSION = 1
+HAS_COORDINATES = 1
+
+_HEADER = struct.Struct('<8sIIQQ')
+
+
+def _padded(size):
+    # Tamanho arredondado para o próximo múltiplo de 8
+    return (size + 7) & ~7
+
+
+# Tamanhos (em bytes) de cada seção, na ordem em que aparecem no arquivo
+def _layout(n, m, has_coordinates):
+    sections = [('node_ids', 'q', n), ('offsets', 'q', n + 1), ('targets', 'i', m), ('weights', 'f', m)]
+    if has_coordinates:
+        sections.append(('coordinates', 'd', 2 * n))
+    return sections
+
+
+def save_graph(graph, path, coordinates=None):
+    """
+    Grava o grafo no formato binário.
+    graph: CSRGraph ou WeightedDirectedGraph (convertido para CSR; a geometria das arestas
+           simplificadas não é gravada). Os ids dos vértices precisam ser inteiros.
+    coordinates: dicionário nó -> (lat, lon), usado quando o grafo não tem coordenadas próprias.
+    O arquivo é gravado ao lado e trocado com os.replace: quem já abriu o arquivo anterior com
+    load_graph (mmap) continua lendo a versão antiga, em vez de ver o arquivo ser truncado.
+    """
+    blocks = encode_graph(graph, coordinates)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for block in blocks:
+                f.write(block)
+        # mkstemp cria o arquivo só para o dono; mantém as permissões do arquivo anterior
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+# Blocos de bytes do formato binário (cabeçalho, seções e alinhamentos), na ordem do arquivo
+def encode_graph(graph, coordinates=None):
+    if not isinstance(graph, CSRGraph):
+        graph = CSRGraph.from_weighted_graph(graph, coordinates)
+    elif graph.coordinates is None and coordinates is not None:
+        coords = array('d')
+        for node in graph.node_ids:
+            coords.extend(coordinates[node])
+        graph = CSRGraph(graph.node_ids, graph.offsets, graph.targets, graph.weights, coords)
+
+    try:
+        node_ids = array('q', graph.node_ids)
+    except TypeError:
+        raise ValueError("node ids must be integers to be saved in the binary format") from None
+
+    n, m = len(graph.node_ids), len(graph.targets)
+    has_coordinates = graph.coordinates is not None
+    buffers = {
+        'node_ids': node_ids,
+        'offsets': array('q', graph.offsets),
+        'targets': array('i', graph.targets),
+        'weights': array('f', graph.weights),
+    }
+    if has_coordinates:
+        buffers['coordinates'] = array('d', graph.coordinates)
+
+    blocks = [_HEADER.pack(MAGIC, VERSION, HAS_COORDINATES if has_coordinates else 0, n, m)]
+    for name, _, _ in _layout(n, m, has_coordinates):
+        buf = buffers[name]
+        if sys.byteorder != 'little':
+            buf.byteswap()
+        data = buf.tobytes()
+        blocks.append(data)
+        blocks.append(bytes(_padded(len(data)) - len(data)))
+    return blocks
+
+
+def load_graph(path):
+    """
+    Abre um grafo gravado por save_graph, mapeado em memória (somente leitura).
+    Retorna um CSRGraph cujos buffers são memoryviews sobre o arquivo; os pesos vêm em float32.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < _HEADER.size:
+            raise ValueError(f"{path}: file too small to be a graph file")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return decode_graph(mapped, path)
+
+
+def decode_graph(buffer, name='<buffer>'):
+    """
+    CSRGraph sobre um buffer no formato binário (mmap, shared_memory, bytes...), sem cópia:
+    as seções são memoryviews do próprio buffer. name só aparece nas mensagens de erro.
+    """
+    if len(buffer) < _HEADER.size:
+        raise ValueError(f"{name}: file too small to be a graph file")
+    magic, version, flags, n, m = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{name}: not a graph file")
+    if version != VERSION:
+        raise ValueError(f"{name}: unsupported graph file version: {version}")
+
+    has_coordinates = bool(flags & HAS_COORDINATES)
+    view = memoryview(buffer)
+    position = _HEADER.size
+    sections = {}
+    for section, typecode, count in _layout(n, m, has_coordinates):
+        size = count * struct.calcsize(typecode)
+        if position + size > len(buffer):
+            raise ValueError(f"{name}: truncated graph file")
+        if sys.byteorder == 'little':
+            sections[section] = view[position:position + size].cast(typecode)
+        else:
+            # Máquinas big-endian precisam de uma cópia convertida
+            buf = array(typecode)
+            buf.frombytes(view[position:position + size])
+            buf.byteswap()
+            sections[section] = buf
+        position += _padded(size)
+
+    return CSRGraph(sections['node_ids'], sections['offsets'], sections['targets'],
+                    sections['weights'], sections.get('coordinates'))
@@ -0,0 +1,123 @@
+from math import radians, cos, sin, sqrt, asin
+
+# Raio da Terra em metros (o mesmo usado em grafo.haversine)
+EARTH_RADIUS = 6371000
+
+# Fator aplicado à aproximação equiretangular para que ela nunca passe do haversine
+EQUIRECTANGULAR_SAFETY = 0.999
+
+
+# ---------------------------------------------
+# Métricas: cada fábrica recebe as coordenadas do destino e devolve f(ponto) -> estimativa
+# ---------------------------------------------
+
+def _planar_to(goal):
+    # Distância euclidiana direta nas coordenadas, sem projeção: o chamador passa (x, y) já
+    # projetados em metros. Em (lat, lon) o resultado sai em graus e não combina com os pesos.
+    gx, gy = goal
+
+    def estimate(point):
+        return sqrt((gx - point[0])**2 + (gy - point[1])**2)
+    return estimate
+
+
+def _equirectangular_to(goal):
+    # Aproximação equiretangular para (lat, lon) em graus, em metros, com a longitude escalada
+    # pelo cosseno da latitude média entre o ponto e o destino. Mais barata que o haversine.
+    # O erro relativo cresce com a distância (~3e-5 em 100 km) e pode ser para mais; o fator
+    # EQUIRECTANGULAR_SAFETY mantém a estimativa abaixo do haversine (admissível e consistente
+    # com os pesos) em distâncias de até ~200 km. Acima disso, use 'haversine'.
+    glat, glon = goal
+    half_glat = radians(glat) / 2
+    ky = radians(1) * EARTH_RADIUS * EQUIRECTANGULAR_SAFETY
+
+    def estimate(point):
+        kx = ky * cos(radians(point[0]) / 2 + half_glat)
+        return sqrt((kx * (point[1] - glon))**2 + (ky * (point[0] - glat))**2)
+    return estimate
+
+
+def _haversine_to(goal):
+    # Distância haversine (grande círculo) para (lat, lon) em graus, em metros.
+    # Mesma métrica dos pesos de grafo.build_graph, então a heurística é consistente com eles.
+    glat, glon = radians(goal[0]), radians(goal[1])
+    cos_glat = cos(glat)
+
+    def estimate(point):
+        lat, lon = radians(point[0]), radians(point[1])
+        a = sin((lat - glat) / 2)**2 + cos(lat) * cos_glat * sin((lon - glon) / 2)**2
+        return 2 * EARTH_RADIUS * asin(sqrt(a))
+    return estimate
+
+
+# Métricas disponíveis, selecionáveis pelo nome
+METRICS = {
+    'planar': _planar_to,
+    'equirectangular': _equirectangular_to,
+    'haversine': _haversine_to,
+}
+
+
+# Valores de h(n) para um destino fixo, calculados uma única vez por nó (uso: h[nó]).
+# Como é um dict, cada consulta repetida custa só uma busca no dicionário.
+class GoalHeuristic(dict):
+    def __init__(self, estimate):
+        super().__init__()
+        # estimate: função nó -> estimativa da distância até o destino
+        self.estimate = estimate
+
+    def __missing__(self, node):
+        value = self.estimate(node)
+        self[node] = value
+        return value
+
+
+def bind_heuristic(heuristic, goal, coordinates):
+    """
+    Cria o GoalHeuristic de um destino.
+    heuristic: nome de métrica ('planar', 'equirectangular', 'haversine')
+               ou função h(nó, destino, coordinates), como a_star.heuristic ou um LandmarkHeuristic.
+    coordinates: dicionário nó -> coordenadas.
+    """
+    if isinstance(heuristic, str):
+        distance_to_goal = _metric(heuristic)(coordinates[goal])
+        return GoalHeuristic(lambda node: distance_to_goal(coordinates[node]))
+    return GoalHeuristic(lambda node: heuristic(node, goal, coordinates))
+
+
+def bind_heuristic_from(heuristic, source, coordinates):
+    """
+    Limites inferiores de d(origem, nó), no sentido contrário ao de bind_heuristic (usado pela
+    busca para trás do A* bidirecional).
+    As métricas são simétricas; uma função h(nó, destino, coordinates) é chamada como
+    h(origem, nó, coordinates), e objetos com from_source(origem, nó) (ex.: LandmarkHeuristic) o usam.
+    """
+    if isinstance(heuristic, str):
+        return bind_heuristic(heuristic, source, coordinates)
+    from_source = getattr(heuristic, 'from_source', None)
+    if from_source is not None:
+        return GoalHeuristic(lambda node: from_source(source, node))
+    return GoalHeuristic(lambda node: heuristic(source, node, coordinates))
+
+
+def bind_heuristic_csr(heuristic, goal, graph, coordinates=None):
+    """
+    Mesmo que bind_heuristic, mas indexado pelos índices densos de um CSRGraph.
+    Com uma métrica e coordinates=None, usa as coordenadas guardadas no próprio grafo.
+    """
+    node_ids = graph.node_ids
+    if not isinstance(heuristic, str):
+        return GoalHeuristic(lambda i: heuristic(node_ids[i], goal, coordinates))
+    if coordinates is not None:
+        distance_to_goal = _metric(heuristic)(coordinates[goal])
+        return GoalHeuristic(lambda i: distance_to_goal(coordinates[node_ids[i]]))
+    coords = graph.coordinates
+    distance_to_goal = _metric(heuristic)(graph.coordinates_at(graph.index_of(goal)))
+    return GoalHeuristic(lambda i: distance_to_goal((coords[2 * i], coords[2 * i + 1])))
+
+
+def _metric(name):
+    try:
+        return METRICS[name]
+    except KeyError:
+        raise ValueError(f"unknown heuristic metric: {name!r}") from None
@@ -0,0 +1,109 @@
+import json
+from array import array
+from .Dijkstra import Dijkstra
+
+# ---------------------------------------------
+# Heurística ALT (A*, Landmarks, desigualdade Triangular)
+# ---------------------------------------------
+# - Escolhemos k vértices "marco" (landmarks) espalhados pelo grafo e guardamos, para cada
+#   marco L, as distâncias d(L, v) (Dijkstra um-para-todos) e d(v, L) (Dijkstra no grafo reverso).
+# - Pela desigualdade triangular, para qualquer vértice v e destino t:
+#       d(v, t) >= d(L, t) - d(L, v)   e   d(v, t) >= d(v, L) - d(t, L)
+#   O maior desses limites entre todos os marcos é uma heurística admissível (e consistente),
+#   medida nas mesmas unidades dos pesos das arestas (metros, no caso do haversine).
+
+
+class LandmarkHeuristic:
+    def __init__(self, landmarks, vertices, from_landmark, to_landmark):
+        # landmarks: lista dos vértices marco
+        self.landmarks = landmarks
+        # vertices: ordem dos vértices nas tabelas
+        self.vertices = vertices
+        self.index = {v: i for i, v in enumerate(vertices)}
+        # from_landmark[i][j] = d(landmarks[i], vertices[j]); to_landmark[i][j] = d(vertices[j], landmarks[i])
+        self.from_landmark = from_landmark
+        self.to_landmark = to_landmark
+
+    @classmethod
+    def build(cls, graph, k=8, start=None):
+        """
+        Escolhe k marcos por seleção do ponto mais distante e calcula as tabelas.
+        graph: WeightedDirectedGraph
+        start: vértice usado para encontrar o primeiro marco (padrão: qualquer vértice)
+        """
+        vertices = graph.get_vertices()
+        if not vertices:
+            return cls([], [], [], [])
+        index = {v: i for i, v in enumerate(vertices)}
+        inf = float('inf')
+
+        def table(adjacency, landmark):
+            distances = Dijkstra(adjacency, landmark, quiet=True).distances
+            row = array('d', [inf]) * len(vertices)
+            for v, d in distances.items():
+                row[index[v]] = d
+            return row
+
+        # O primeiro marco é o vértice mais distante de 'start'
+        current = start if start is not None else vertices[0]
+        closest = table(graph.edges, current)
+        landmarks, from_landmark, to_landmark = [], [], []
+        while len(landmarks) < min(k, len(vertices)):
+            # Próximo marco: o vértice alcançável mais longe de todos os marcos já escolhidos
+            best = max((j for j in range(len(vertices)) if closest[j] < inf and vertices[j] not in landmarks),
+                       key=closest.__getitem__, default=None)
+            if best is None:
+                break
+            landmark = vertices[best]
+            landmarks.append(landmark)
+            from_landmark.append(table(graph.edges, landmark))
+            to_landmark.append(table(graph.reverse_edges, landmark))
+            if len(landmarks) == 1:
+                closest = array('d', from_landmark[0])
+            else:
+                closest = array('d', map(min, closest, from_landmark[-1]))
+
+        return cls(landmarks, vertices, from_landmark, to_landmark)
+
+    # Limite inferior para d(node, goal); mesma assinatura da heurística euclidiana do a_star
+    def __call__(self, node, goal, coordinates=None):
+        v = self.index[node]
+        t = self.index[goal]
+        best = 0.0
+        for from_l, to_l in zip(self.from_landmark, self.to_landmark):
+            # NaN (infinito - infinito) nunca passa nas comparações e é ignorado
+            bound = from_l[t] - from_l[v]
+            if bound > best:
+                best = bound
+            bound = to_l[v] - to_l[t]
+            if bound > best:
+                best = bound
+        return best
+
+    # Limite inferior para d(source, node), no sentido contrário ao de __call__
+    # (o ALT não é simétrico em grafos dirigidos, então h(node, source) não serve)
+    def from_source(self, source, node):
+        return self(source, node)
+
+    # Grava os marcos e as tabelas em JSON (os ids dos vértices precisam ser int ou str)
+    def save(self, path):
+        data = {
+            'version': 1,
+            'landmarks': self.landmarks,
+            'vertices': self.vertices,
+            'from_landmark': [list(row) for row in self.from_landmark],
+            'to_landmark': [list(row) for row in self.to_landmark],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    # Lê as tabelas gravadas por save(), sem refazer o pré-processamento
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != 1:
+            raise ValueError(f"unsupported landmark file version: {data.get('version')!r}")
+        return cls(data['landmarks'], data['vertices'],
+                   [array('d', row) for row in data['from_landmark']],
+                   [array('d', row) for row in data['to_landmark']])
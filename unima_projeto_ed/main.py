@@ -1,25 +1,166 @@
 # flask_api_example/main.py
-from grafo import build_graph
-from data import get_osm_data
-from flask import Flask, jsonify
+import atexit
+import os
+import threading
+import time
+from flask import Flask, Response, g, jsonify, request
+from .metrics import Metrics, CONTENT_TYPE
 
 app = Flask(__name__)
 app.config['JSON_SORT_KEYS'] = False
 
+# UNIMA Afya | Maceió-AL
+# sul, oeste, norte, leste
+BBOX = [-9.6379, -35.7062, -9.6339, -35.7022]
+# Respostas da Overpass ficam guardadas em disco entre uma execução e outra
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "unima_projeto_ed", "overpass")
+
+# Máximo de pares aceitos em uma requisição de /route/batch
+MAX_BATCH_SIZE = 1000
+# Quantidade máxima de rotas guardadas no cache de resultados
+ROUTE_CACHE_SIZE = 10000
+
+# Garante que o grafo seja carregado uma vez só, mesmo com requisições simultâneas
+_service_lock = threading.Lock()
+
+# Contadores de requisições, latências e buscas, expostos em /metrics
+metrics = Metrics()
+
+# Início de cada requisição, para o histograma de latência
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+# Registra rota (o padrão da URL, não o caminho pedido), método, status e duração
+@app.after_request
+def _record_request(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        metrics.observe_request(route, request.method, response.status_code, time.perf_counter() - started)
+    return response
+
 @app.route("/")
 def home():
     return jsonify(message="Hello, World!")
 
+def load_routing_service():
+    """
+    Carrega o grafo usado pela API.
+    Se a variável de ambiente UNIMA_GRAPH_FILE apontar para um grafo gravado com
+    graph_io.save_graph, ele é mapeado em memória (e compartilhado entre os workers);
+    senão o grafo do BBOX é montado a partir da Overpass (com cache em disco).
+    Com UNIMA_QUERY_WORKERS=n, as buscas rodam em n processos (query_pool.QueryPool).
+    """
+    from .routing import RoutingService
+    from .route_cache import RouteCache
+
+    route_cache = RouteCache(ROUTE_CACHE_SIZE)
+    path = os.environ.get("UNIMA_GRAPH_FILE")
+    if path:
+        service = RoutingService.from_file(path, route_cache=route_cache)
+    else:
+        from .data import OverpassCache
+        service = RoutingService.from_bbox(BBOX, cache=OverpassCache(CACHE_DIR), route_cache=route_cache)
+    service.search_stats = metrics.search_stats
+
+    workers = int(os.environ.get("UNIMA_QUERY_WORKERS", "0"))
+    if workers > 0:
+        from .query_pool import QueryPool
+        service.pool = QueryPool(service.graph, service.coordinates, processes=workers,
+                                 heuristic=service.heuristic)
+        atexit.register(service.pool.close)
+    return service
+
+# Serviço de rotas da aplicação (app.config['ROUTING_SERVICE']), carregado na primeira vez
+def get_routing_service():
+    service = app.config.get('ROUTING_SERVICE')
+    if service is None:
+        with _service_lock:
+            service = app.config.get('ROUTING_SERVICE')
+            if service is None:
+                service = app.config['ROUTING_SERVICE'] = load_routing_service()
+    return service
+
+# Converte "lat,lon" (ou [lat, lon]) em (lat, lon); ValueError se for inválido
+def _parse_point(text):
+    if not text:
+        raise ValueError("missing coordinates")
+    if isinstance(text, str):
+        text = text.split(",")
+    lat, lon = (float(value) for value in text)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("coordinates out of range")
+    return lat, lon
+
+@app.route("/route")
+def route():
+    """
+    Rota entre dois pontos: /route?origin=lat,lon&destination=lat,lon
+    O tempo gasto na consulta vai nos cabeçalhos X-Response-Time-Ms e Server-Timing.
+    """
+    started = time.perf_counter()
+    try:
+        origin = _parse_point(request.args.get("origin"))
+        destination = _parse_point(request.args.get("destination"))
+    except ValueError:
+        return jsonify(error="origin and destination must be given as 'lat,lon'"), 400
+
+    result = get_routing_service().route(origin, destination)
+    response = jsonify(result)
+    response.status_code = 200 if result['distance'] is not None else 404
+    return _with_timing(response, started)
+
+@app.route("/route/batch", methods=["POST"])
+def route_batch():
+    """
+    Várias rotas de uma vez. Corpo JSON:
+    {"pairs": [{"origin": [lat, lon], "destination": [lat, lon]}, ...], "geometry": false}
+    Responde {"routes": [...]} na mesma ordem dos pares; rotas sem caminho têm distance null.
+    """
+    started = time.perf_counter()
+    body = request.get_json(silent=True)
+    pairs = body.get("pairs") if isinstance(body, dict) else None
+    if not isinstance(pairs, list):
+        return jsonify(error="body must be a JSON object with a 'pairs' list"), 400
+    if len(pairs) > MAX_BATCH_SIZE:
+        return jsonify(error=f"at most {MAX_BATCH_SIZE} pairs per request"), 400
+    try:
+        points = [(_parse_point(pair["origin"]), _parse_point(pair["destination"])) for pair in pairs]
+    except (ValueError, TypeError, KeyError):
+        return jsonify(error="each pair needs 'origin' and 'destination' as [lat, lon]"), 400
+
+    routes = get_routing_service().route_batch(points, geometry=bool(body.get("geometry")))
+    return _with_timing(jsonify(routes=routes), started)
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """
+    Métricas no formato de texto do Prometheus: requisições e latência por rota, contadores
+    das buscas e, depois que o grafo foi carregado, tamanho do grafo e cache de rotas.
+    """
+    return Response(metrics.render(app.config.get('ROUTING_SERVICE')), content_type=CONTENT_TYPE)
+
+# Tempo gasto na requisição nos cabeçalhos X-Response-Time-Ms e Server-Timing
+def _with_timing(response, started):
+    elapsed = (time.perf_counter() - started) * 1000
+    response.headers['X-Response-Time-Ms'] = f"{elapsed:.3f}"
+    response.headers['Server-Timing'] = f"route;dur={elapsed:.3f}"
+    return response
+
 def start():
+    # O grafo é carregado antes de o servidor começar a aceitar requisições
+    get_routing_service()
     app.run()
 
 
 if __name__ == "__main__":
-    # UNIMA Afya | Maceió-AL
-    # sul, oeste, norte, leste
-    bbox = [-9.6379, -35.7062, -9.6339, -35.7022]
-
-    nodes, ways = get_osm_data(bbox)
-    print("Nós:", len(nodes), "Ways:", len(ways))
-    G = build_graph(nodes, ways)
-    print("Grafo:", len(G.nodes), "Nós,", len(G.edges), "Arestas")
\ No newline at end of file
+    # Só o script precisa montar o grafo; a API não paga o custo dessas importações
+    from .grafo import build_graph_from_elements
+    from .data import iter_osm_elements, OverpassCache
+
+    cache = OverpassCache(CACHE_DIR)
+    # A resposta é lida em blocos e vai direto para o grafo, sem carregar o JSON inteiro
+    G, nodes = build_graph_from_elements(iter_osm_elements(BBOX, cache=cache))
+    print("Nós:", len(nodes))
+    print("Grafo:", G.vertex_count(), "Nós,", G.edge_count(), "Arestas")
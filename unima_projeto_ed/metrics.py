@@ -0,0 +1,202 @@
+import threading
+import weakref
+from bisect import bisect_left
+from .search_stats import SearchStats
+
+# ---------------------------------------------
+# Métricas da API no formato de texto do Prometheus
+# ---------------------------------------------
+# - Cada thread escreve só nos próprios contadores (um "shard" guardado em threading.local),
+#   então registrar uma requisição não precisa de lock.
+# - Na leitura (/metrics) os shards são copiados e somados. Cópias de dict/list são atômicas
+#   com o GIL; no pior caso uma requisição em andamento aparece só na próxima leitura.
+# - Os shards de threads que já terminaram (o servidor de desenvolvimento cria uma thread por
+#   requisição) são somados a um total acumulado e descartados.
+
+# Limites (segundos) dos buckets do histograma de latência
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Quantidade de shards a partir da qual os de threads encerradas são recolhidos ao criar um novo
+_COLLECT_THRESHOLD = 64
+
+# Contadores somados do SearchStats (max_heap_size é o maior valor, não a soma)
+_SEARCH_COUNTERS = (
+    ('searches', 'unima_search_total', 'Shortest path searches run by the routing service.'),
+    ('pushes', 'unima_search_pushes_total', 'Priority queue pushes.'),
+    ('pops', 'unima_search_pops_total', 'Priority queue pops.'),
+    ('stale_pops', 'unima_search_stale_pops_total', 'Pops of vertices that were already settled.'),
+    ('relaxations', 'unima_search_relaxations_total', 'Edges that improved a tentative distance.'),
+    ('settled', 'unima_search_settled_total', 'Vertices settled.'),
+    ('elapsed', 'unima_search_seconds_total', 'Time spent searching, in seconds.'),
+)
+
+
+class _Shard:
+    # Contadores de uma thread; só ela escreve aqui
+    __slots__ = ('thread', 'requests', 'latency', 'search')
+
+    def __init__(self, thread=None):
+        self.thread = weakref.ref(thread) if thread is not None else None
+        # (rota, método, status) -> quantidade de requisições
+        self.requests = {}
+        # rota -> [quantidade por bucket..., acima do último bucket, soma dos tempos]
+        self.latency = {}
+        # contadores das buscas feitas por esta thread
+        self.search = SearchStats()
+
+    def alive(self):
+        thread = self.thread() if self.thread is not None else None
+        return thread is not None and thread.is_alive()
+
+
+class Metrics:
+    """Contadores de requisições, histogramas de latência e contadores de busca da API."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        # Soma dos shards de threads que já terminaram
+        self._retired = _Shard()
+
+    # Shard da thread atual (criado na primeira vez)
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                if len(self._shards) >= _COLLECT_THRESHOLD:
+                    self._collect()
+                self._shards.append(shard)
+        return shard
+
+    # Soma os shards de threads encerradas ao total acumulado (chamado com o lock)
+    def _collect(self):
+        alive = []
+        for shard in self._shards:
+            if shard.alive():
+                alive.append(shard)
+            else:
+                self._merge(self._retired, shard)
+        self._shards = alive
+
+    @staticmethod
+    def _merge(total, shard):
+        for key, count in shard.requests.copy().items():
+            total.requests[key] = total.requests.get(key, 0) + count
+        for route, histogram in shard.latency.copy().items():
+            histogram = list(histogram)
+            current = total.latency.get(route)
+            if current is None:
+                total.latency[route] = histogram
+            else:
+                total.latency[route] = [a + b for a, b in zip(current, histogram)]
+        for field, _, _ in _SEARCH_COUNTERS:
+            setattr(total.search, field, getattr(total.search, field) + getattr(shard.search, field))
+        total.search.max_heap_size = max(total.search.max_heap_size, shard.search.max_heap_size)
+
+    def observe_request(self, route, method, status, seconds):
+        """Registra uma requisição: rota (padrão da URL), método, status HTTP e duração em segundos."""
+        shard = self._shard()
+        requests = shard.requests
+        key = (route, method, str(status))
+        requests[key] = requests.get(key, 0) + 1
+        histogram = shard.latency.get(route)
+        if histogram is None:
+            histogram = shard.latency[route] = [0] * (len(self.buckets) + 1) + [0.0]
+        histogram[bisect_left(self.buckets, seconds)] += 1
+        histogram[-1] += seconds
+
+    def search_stats(self):
+        """SearchStats da thread atual, para passar às buscas (ex.: RoutingService.search_stats)."""
+        return self._shard().search
+
+    def snapshot(self):
+        """Soma de todas as threads: um _Shard com os totais até agora."""
+        total = _Shard()
+        with self._lock:
+            self._collect()
+            self._merge(total, self._retired)
+            for shard in self._shards:
+                self._merge(total, shard)
+        return total
+
+    def render(self, service=None):
+        """
+        Texto no formato do Prometheus com os contadores da API e, se 'service' (RoutingService)
+        for dado, o tamanho do grafo e os números do cache de rotas.
+        """
+        total = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        metric('unima_http_requests_total', 'counter', 'HTTP requests handled, by route, method and status.',
+               [({'route': route, 'method': method, 'status': status}, count)
+                for (route, method, status), count in sorted(total.requests.items())])
+
+        lines.append("# HELP unima_http_request_duration_seconds HTTP request latency, by route.")
+        lines.append("# TYPE unima_http_request_duration_seconds histogram")
+        for route, histogram in sorted(total.latency.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), histogram):
+                cumulative += count
+                lines.append(f"unima_http_request_duration_seconds_bucket"
+                             f"{_labels({'route': route, 'le': _number(bound)})} {cumulative}")
+            lines.append(f"unima_http_request_duration_seconds_sum{_labels({'route': route})} "
+                         f"{_number(histogram[-1])}")
+            lines.append(f"unima_http_request_duration_seconds_count{_labels({'route': route})} {cumulative}")
+
+        for field, name, help_text in _SEARCH_COUNTERS:
+            metric(name, 'counter', help_text, [({}, getattr(total.search, field))])
+        metric('unima_search_max_heap_size', 'gauge', 'Largest priority queue size seen in a search.',
+               [({}, total.search.max_heap_size)])
+
+        if service is not None:
+            stats = service.stats()
+            metric('unima_graph_vertices', 'gauge', 'Vertices in the routing graph.',
+                   [({'format': stats['format']}, stats['vertices'])])
+            metric('unima_graph_edges', 'gauge', 'Edges in the routing graph.',
+                   [({'format': stats['format']}, stats['edges'])])
+            cache = stats.get('route_cache')
+            if cache is not None:
+                metric('unima_route_cache_hits_total', 'counter', 'Route cache hits.', [({}, cache['hits'])])
+                metric('unima_route_cache_misses_total', 'counter', 'Route cache misses.', [({}, cache['misses'])])
+                metric('unima_route_cache_evictions_total', 'counter', 'Route cache evictions.',
+                       [({}, cache['evictions'])])
+                metric('unima_route_cache_invalidations_total', 'counter',
+                       'Route cache entries dropped because the graph changed.', [({}, cache['invalidations'])])
+                metric('unima_route_cache_hit_ratio', 'gauge', 'Route cache hits / lookups.',
+                       [({}, cache['hit_rate'])])
+                metric('unima_route_cache_entries', 'gauge', 'Routes in the cache.', [({}, cache['entries'])])
+                metric('unima_route_cache_bytes', 'gauge', 'Estimated memory used by the route cache.',
+                       [({}, cache['bytes'])])
+            if 'workers' in stats:
+                metric('unima_query_workers', 'gauge', 'Query worker processes.', [({}, stats['workers'])])
+
+        return "\n".join(lines) + "\n"
+
+
+# Rótulos {nome="valor",...} com \, " e quebras de linha escapados
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Número no formato do Prometheus (infinito vira +Inf)
+def _number(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(value)
@@ -81,4 +81,449 @@ class PriorityQueue:
     
     # Retorna o número de elementos na fila
     def __len__(self):
-        return self.size
\ No newline at end of file
+        return self.size
+
+# Fila de prioridade indexada: além do heap, mantém um mapa item -> posição no heap.
+# Cada item aparece no máximo uma vez, então a fila nunca passa de O(V) elementos
+# e não existem entradas "velhas" para descartar no pop.
+class IndexedPriorityQueue(PriorityQueue):
+    def __init__(self):
+        super().__init__()
+        # Dicionário que guarda a posição atual de cada item dentro do heap
+        self.position = {}
+
+    # Troca dois elementos de posição no heap, atualizando o mapa de posições
+    def _swap(self, i, j):
+        heap = self.heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self.position[heap[i][1]] = i
+        self.position[heap[j][1]] = j
+
+    # Adiciona um item; se ele já estiver na fila, apenas atualiza sua prioridade
+    def push(self, priority, item):
+        if item in self.position:
+            i = self.position[item]
+            old_priority = self.heap[i][0]
+            self.heap[i] = (priority, item)
+            if priority < old_priority:
+                self._heapify_up(i)
+            else:
+                self._heapify_down(i)
+            return
+        self.heap.append((priority, item))
+        self.position[item] = self.size
+        self._heapify_up(self.size)
+        self.size += 1
+
+    # Remove e retorna o elemento com menor prioridade
+    def pop(self):
+        if self.size == 0:
+            raise IndexError("pop from empty priority queue")
+
+        min_item = self.heap[0]
+        del self.position[min_item[1]]
+        self.size -= 1
+        last = self.heap.pop()
+
+        # Move o último elemento para a raiz e reorganiza
+        if self.size > 0:
+            self.heap[0] = last
+            self.position[last[1]] = 0
+            self._heapify_down(0)
+
+        return min_item[1]
+
+    # Diminui a prioridade de um item que já está na fila
+    def decrease_key(self, item, priority):
+        if item not in self.position:
+            raise KeyError(f"{item!r} is not in the priority queue")
+        i = self.position[item]
+        if priority > self.heap[i][0]:
+            raise ValueError("new priority is greater than current priority")
+        self.heap[i] = (priority, item)
+        self._heapify_up(i)
+
+    # Verifica se um item está na fila
+    def contains(self, item):
+        return item in self.position
+
+    def __contains__(self, item):
+        return item in self.position
+
+    # Retorna a prioridade atual de um item (KeyError se não estiver na fila)
+    def priority_of(self, item):
+        return self.heap[self.position[item]][0]
+
+
+# Heap d-ário indexado (por padrão 4-ário).
+# Com mais filhos por nó a árvore fica mais baixa: o push (usado no decrease-key)
+# sobe menos níveis, e o pop compara até d filhos por nível.
+# Prioridades e itens ficam em listas paralelas e os laços não chamam métodos auxiliares.
+class DaryHeap:
+    def __init__(self, d=4):
+        self.d = d
+        # Listas paralelas: priorities[i] é a prioridade de items[i]
+        self.priorities = []
+        self.items = []
+        # Posição atual de cada item no heap
+        self.position = {}
+
+    # Sobe o "buraco" da posição i até o lugar correto de (priority, item)
+    def _sift_up(self, i, priority, item):
+        priorities, items, position, d = self.priorities, self.items, self.position, self.d
+        while i > 0:
+            parent = (i - 1) // d
+            parent_priority = priorities[parent]
+            if parent_priority <= priority:
+                break
+            priorities[i] = parent_priority
+            moved = items[parent]
+            items[i] = moved
+            position[moved] = i
+            i = parent
+        priorities[i] = priority
+        items[i] = item
+        position[item] = i
+
+    # Desce o "buraco" da posição i até o lugar correto de (priority, item)
+    def _sift_down(self, i, priority, item):
+        priorities, items, position, d = self.priorities, self.items, self.position, self.d
+        n = len(priorities)
+        while True:
+            first = d * i + 1
+            if first >= n:
+                break
+            # Encontra o filho com menor prioridade
+            best = first
+            best_priority = priorities[first]
+            for child in range(first + 1, min(first + d, n)):
+                if priorities[child] < best_priority:
+                    best = child
+                    best_priority = priorities[child]
+            if best_priority >= priority:
+                break
+            priorities[i] = best_priority
+            moved = items[best]
+            items[i] = moved
+            position[moved] = i
+            i = best
+        priorities[i] = priority
+        items[i] = item
+        position[item] = i
+
+    # Adiciona um item; se ele já estiver na fila, apenas atualiza sua prioridade
+    def push(self, priority, item):
+        i = self.position.get(item)
+        if i is None:
+            self.priorities.append(priority)
+            self.items.append(item)
+            self._sift_up(len(self.items) - 1, priority, item)
+        elif priority < self.priorities[i]:
+            self._sift_up(i, priority, item)
+        else:
+            self._sift_down(i, priority, item)
+
+    # Remove e retorna o elemento com menor prioridade
+    def pop(self):
+        if not self.items:
+            raise IndexError("pop from empty priority queue")
+        top = self.items[0]
+        del self.position[top]
+        last_priority = self.priorities.pop()
+        last_item = self.items.pop()
+        if self.items:
+            self._sift_down(0, last_priority, last_item)
+        return top
+
+    # Diminui a prioridade de um item que já está na fila
+    def decrease_key(self, item, priority):
+        if item not in self.position:
+            raise KeyError(f"{item!r} is not in the priority queue")
+        i = self.position[item]
+        if priority > self.priorities[i]:
+            raise ValueError("new priority is greater than current priority")
+        self._sift_up(i, priority, item)
+
+    # Retorna o elemento com menor prioridade sem removê-lo
+    def peek(self):
+        if not self.items:
+            raise IndexError("peek from empty priority queue")
+        return self.items[0]
+
+    # Verifica se a fila está vazia
+    def is_empty(self):
+        return not self.items
+
+    # Verifica se um item está na fila
+    def contains(self, item):
+        return item in self.position
+
+    def __contains__(self, item):
+        return item in self.position
+
+    # Retorna a prioridade atual de um item (KeyError se não estiver na fila)
+    def priority_of(self, item):
+        return self.priorities[self.position[item]]
+
+    # Retorna o número de elementos na fila
+    def __len__(self):
+        return len(self.items)
+
+
+# Nó da pairing heap: o primeiro filho aponta (prev) para o pai,
+# os demais apontam para o irmão anterior
+class _PairingNode:
+    __slots__ = ('priority', 'item', 'child', 'sibling', 'prev')
+
+    def __init__(self, priority, item):
+        self.priority = priority
+        self.item = item
+        self.child = None
+        self.sibling = None
+        self.prev = None
+
+
+# Pairing heap: push, meld e decrease-key em O(1); pop em O(log n) amortizado.
+class PairingHeap:
+    def __init__(self):
+        self.root = None
+        # Mapa item -> nó, para decrease-key/contains/priority_of
+        self.nodes = {}
+
+    # Junta duas árvores (raízes sem pai nem irmãos); a de menor prioridade vira a raiz
+    @staticmethod
+    def _meld(a, b):
+        if b.priority < a.priority:
+            a, b = b, a
+        b.sibling = a.child
+        if a.child is not None:
+            a.child.prev = b
+        b.prev = a
+        a.child = b
+        return a
+
+    # Junta uma lista de irmãos em uma única árvore (pairing em duas passadas)
+    def _merge_pairs(self, first):
+        pairs = []
+        while first is not None:
+            a = first
+            b = a.sibling
+            a.prev = None
+            if b is None:
+                pairs.append(a)
+                break
+            first = b.sibling
+            a.sibling = b.sibling = b.prev = None
+            pairs.append(self._meld(a, b))
+        if not pairs:
+            return None
+        root = pairs.pop()
+        while pairs:
+            root = self._meld(pairs.pop(), root)
+        return root
+
+    # Desliga um nó (que não é a raiz) da árvore, junto com sua subárvore
+    @staticmethod
+    def _cut(node):
+        if node.prev.child is node:
+            node.prev.child = node.sibling
+        else:
+            node.prev.sibling = node.sibling
+        if node.sibling is not None:
+            node.sibling.prev = node.prev
+        node.prev = node.sibling = None
+
+    # Adiciona um item; se ele já estiver na fila, apenas atualiza sua prioridade
+    def push(self, priority, item):
+        node = self.nodes.get(item)
+        if node is not None:
+            if priority < node.priority:
+                self.decrease_key(item, priority)
+                return
+            # Aumentar a prioridade: remove o nó e o insere de novo
+            self._remove(node)
+            node.priority = priority
+        else:
+            node = _PairingNode(priority, item)
+            self.nodes[item] = node
+        self.root = node if self.root is None else self._meld(self.root, node)
+
+    # Tira um nó do heap (os filhos dele voltam para o heap)
+    def _remove(self, node):
+        if node is self.root:
+            self.root = self._merge_pairs(node.child)
+        else:
+            self._cut(node)
+            children = self._merge_pairs(node.child)
+            if children is not None:
+                self.root = self._meld(self.root, children)
+        node.child = None
+
+    # Remove e retorna o elemento com menor prioridade
+    def pop(self):
+        root = self.root
+        if root is None:
+            raise IndexError("pop from empty priority queue")
+        del self.nodes[root.item]
+        self.root = self._merge_pairs(root.child)
+        return root.item
+
+    # Diminui a prioridade de um item em O(1): corta a subárvore e junta com a raiz
+    def decrease_key(self, item, priority):
+        if item not in self.nodes:
+            raise KeyError(f"{item!r} is not in the priority queue")
+        node = self.nodes[item]
+        if priority > node.priority:
+            raise ValueError("new priority is greater than current priority")
+        node.priority = priority
+        if node is not self.root:
+            self._cut(node)
+            self.root = self._meld(self.root, node)
+
+    # Retorna o elemento com menor prioridade sem removê-lo
+    def peek(self):
+        if self.root is None:
+            raise IndexError("peek from empty priority queue")
+        return self.root.item
+
+    # Verifica se a fila está vazia
+    def is_empty(self):
+        return self.root is None
+
+    # Verifica se um item está na fila
+    def contains(self, item):
+        return item in self.nodes
+
+    def __contains__(self, item):
+        return item in self.nodes
+
+    # Retorna a prioridade atual de um item (KeyError se não estiver na fila)
+    def priority_of(self, item):
+        return self.nodes[item].priority
+
+    # Retorna o número de elementos na fila
+    def __len__(self):
+        return len(self.nodes)
+
+
+# Radix heap monótona para prioridades não negativas.
+# As prioridades são quantizadas em chaves inteiras (int(prioridade * scale)); com pesos
+# inteiros em metros basta scale=1. Cada chave vai para o balde do bit mais alto em que
+# difere da última chave removida, então cada item muda de balde no máximo ~64 vezes.
+# É feita para chaves que nunca ficam abaixo da última removida (Dijkstra e A* com heurística
+# consistente). Uma chave menor (A* com heurística só admissível, que reabre nós) é elevada
+# até a última removida: vai para o balde 0, onde a comparação usa a prioridade real, e sai
+# na próxima remoção, antes de todas as outras. A ordem de saída continua correta.
+class RadixHeap:
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        # buckets[0] guarda chaves iguais a last; buckets[i] difere de last no bit i-1
+        self.buckets = [[] for _ in range(65)]
+        # Última chave removida (limite inferior de todas as chaves na fila)
+        self.last = 0
+        # Entrada ativa de cada item: [prioridade, chave, item]; entradas antigas ficam
+        # nos baldes e são descartadas quando aparecem (remoção preguiçosa)
+        self.entries = {}
+
+    # Adiciona um item; se ele já estiver na fila, apenas atualiza sua prioridade
+    def push(self, priority, item):
+        key = int(priority * self.scale)
+        if key < self.last:
+            key = self.last
+        entry = [priority, key, item]
+        self.entries[item] = entry
+        self.buckets[(key ^ self.last).bit_length()].append(entry)
+
+    # Redistribui o primeiro balde não vazio para que buckets[0] tenha o mínimo
+    def _refill(self):
+        buckets, entries = self.buckets, self.entries
+        for i in range(1, 65):
+            bucket = buckets[i]
+            # Descarta entradas antigas (itens atualizados ou já removidos)
+            live = [e for e in bucket if entries.get(e[2]) is e]
+            bucket.clear()
+            if live:
+                break
+        else:
+            return
+        last = min(e[1] for e in live)
+        self.last = last
+        for e in live:
+            buckets[(e[1] ^ last).bit_length()].append(e)
+
+    # Encontra a entrada ativa de menor prioridade no balde 0 (todas com chave == last)
+    def _find_min(self):
+        entries = self.entries
+        if not entries:
+            raise IndexError("pop from empty priority queue")
+        bucket = self.buckets[0]
+        bucket[:] = [e for e in bucket if entries.get(e[2]) is e]
+        if not bucket:
+            self._refill()
+            bucket = self.buckets[0]
+        best = 0
+        for i in range(1, len(bucket)):
+            if bucket[i][0] < bucket[best][0]:
+                best = i
+        return best
+
+    # Remove e retorna o elemento com menor prioridade
+    def pop(self):
+        i = self._find_min()
+        bucket = self.buckets[0]
+        entry = bucket[i]
+        bucket[i] = bucket[-1]
+        bucket.pop()
+        del self.entries[entry[2]]
+        return entry[2]
+
+    # Diminui a prioridade de um item que já está na fila
+    def decrease_key(self, item, priority):
+        if item not in self.entries:
+            raise KeyError(f"{item!r} is not in the priority queue")
+        if priority > self.entries[item][0]:
+            raise ValueError("new priority is greater than current priority")
+        self.push(priority, item)
+
+    # Retorna o elemento com menor prioridade sem removê-lo
+    def peek(self):
+        if not self.entries:
+            raise IndexError("peek from empty priority queue")
+        return self.buckets[0][self._find_min()][2]
+
+    # Verifica se a fila está vazia
+    def is_empty(self):
+        return not self.entries
+
+    # Verifica se um item está na fila
+    def contains(self, item):
+        return item in self.entries
+
+    def __contains__(self, item):
+        return item in self.entries
+
+    # Retorna a prioridade atual de um item (KeyError se não estiver na fila)
+    def priority_of(self, item):
+        return self.entries[item][0]
+
+    # Retorna o número de elementos na fila
+    def __len__(self):
+        return len(self.entries)
+
+
+# Implementações de fila disponíveis, selecionáveis pelo nome
+QUEUE_BACKENDS = {
+    'binary': IndexedPriorityQueue,
+    '4-ary': DaryHeap,
+    'pairing': PairingHeap,
+    'radix': RadixHeap,
+}
+
+
+# Cria uma fila de prioridade pelo nome da implementação
+def make_queue(name='binary'):
+    try:
+        factory = QUEUE_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown priority queue backend: {name!r}") from None
+    return factory()
@@ -0,0 +1,126 @@
+import os
+from multiprocessing import get_context, shared_memory
+from .Dijkstra import Dijkstra
+from .a_star import a_star
+from .graph_io import encode_graph, decode_graph
+
+# ---------------------------------------------
+# Consultas de rota em vários processos, com o grafo em memória compartilhada
+# ---------------------------------------------
+# - O grafo é convertido para o formato binário de graph_io (CSR) e copiado uma única vez
+#   para um bloco de multiprocessing.shared_memory.
+# - Cada processo do pool abre o bloco pelo nome e monta um CSRGraph cujos arrays são
+#   memoryviews sobre ele: a memória do grafo é a mesma qualquer que seja o número de
+#   processos. Só o dicionário id -> índice (CSRGraph.index_of) é criado em cada processo.
+# - Cada processo tem o próprio GIL, então as buscas rodam de fato em paralelo.
+
+# Estado de cada processo do pool (preenchido por _attach)
+_worker = {}
+
+
+# Inicializador dos processos: abre o bloco compartilhado e monta o grafo sobre ele
+def _attach(name, heuristic):
+    memory = shared_memory.SharedMemory(name=name)
+    # O bloco precisa continuar aberto enquanto o grafo existir
+    _worker['memory'] = memory
+    _worker['graph'] = decode_graph(memory.buf, name)
+    _worker['heuristic'] = heuristic
+
+
+# Uma consulta: A* quando o grafo tem coordenadas, senão Dijkstra até o destino
+def _route(pair):
+    source, target = pair
+    graph = _worker['graph']
+    if graph.coordinates is None:
+        tree = Dijkstra(graph, source, quiet=True, targets={target})
+        return tree.path_to(target), tree.distance_to(target)
+    path, distance = a_star(graph, source, target, None, heuristic=_worker['heuristic'])
+    if distance == float('inf'):
+        path = []
+    return path, distance
+
+
+# Uma origem e todos os seus destinos: um único Dijkstra um-para-muitos
+def _route_group(group):
+    source, targets = group
+    tree = Dijkstra(_worker['graph'], source, quiet=True, targets=set(targets))
+    return [(tree.path_to(target), tree.distance_to(target)) for target in targets]
+
+
+class QueryPool:
+    """
+    Pool de processos que respondem consultas de rota sobre um grafo em memória compartilhada.
+    O pool usa uma cópia do grafo feita na criação: mudanças posteriores no grafo original
+    não são vistas pelos processos. Use com 'with' ou chame close() no fim.
+    """
+
+    def __init__(self, graph, coordinates=None, processes=None, heuristic='haversine', start_method=None):
+        """
+        graph: CSRGraph ou WeightedDirectedGraph, com ids de vértices inteiros (como em graph_io).
+        coordinates: dicionário nó -> (lat, lon), quando o grafo não tem coordenadas próprias;
+                     sem coordenadas as consultas usam o Dijkstra em vez do A*.
+        processes: número de processos (padrão: número de CPUs).
+        heuristic: métrica da heurística do A* (nome de heuristics.METRICS).
+        start_method: 'fork', 'spawn' ou 'forkserver' (padrão do sistema se None).
+        """
+        blocks = encode_graph(graph, coordinates)
+        size = sum(len(block) for block in blocks)
+        self.memory = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            position = 0
+            for block in blocks:
+                self.memory.buf[position:position + len(block)] = block
+                position += len(block)
+            del blocks
+            self.processes = processes or os.cpu_count() or 1
+            self._pool = get_context(start_method).Pool(
+                self.processes, initializer=_attach, initargs=(self.memory.name, heuristic))
+        except BaseException:
+            self.memory.close()
+            self.memory.unlink()
+            raise
+
+    # Bytes do grafo em memória compartilhada (os mesmos para qualquer número de processos)
+    @property
+    def nbytes(self):
+        return self.memory.size
+
+    def route(self, source, target):
+        """Caminho mínimo entre dois vértices, calculado por um dos processos: (caminho, distância)."""
+        return self._pool.apply(_route, ((source, target),))
+
+    def route_batch(self, pairs):
+        """
+        Caminhos mínimos para vários pares (origem, destino), distribuídos entre os processos.
+        Os pares são agrupados pela origem, como em routing.shortest_paths_batch.
+        Retorna [(caminho, distância)] na mesma ordem de 'pairs'; sem caminho: ([], infinito).
+        """
+        pairs = list(pairs)
+        by_source = {}
+        for source, target in pairs:
+            by_source.setdefault(source, {})[target] = None
+        groups = [(source, list(targets)) for source, targets in by_source.items()]
+
+        # Alguns grupos por tarefa diminuem a troca de mensagens sem desequilibrar os processos
+        chunksize = max(1, len(groups) // (4 * self.processes))
+        results = {}
+        for (source, targets), paths in zip(groups, self._pool.imap(_route_group, groups, chunksize)):
+            for target, result in zip(targets, paths):
+                results[(source, target)] = result
+        return [results[pair] for pair in pairs]
+
+    # Encerra os processos e libera a memória compartilhada
+    def close(self):
+        if self._pool is None:
+            return
+        self._pool.terminate()
+        self._pool.join()
+        self._pool = None
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
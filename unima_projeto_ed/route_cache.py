@@ -0,0 +1,105 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+class RouteCache:
+    """
+    Cache LRU de resultados de consultas de rota, limitado por quantidade de entradas
+    e/ou por memória estimada (bytes).
+    Chave típica: (origem, destino, algoritmo), com origem/destino já ajustados ao grafo.
+    Cada operação recebe a versão atual do grafo (WeightedDirectedGraph.version); quando
+    ela muda, todas as entradas são descartadas, porque qualquer aresta alterada pode
+    mudar qualquer rota.
+    Seguro para uso por várias threads (ex.: requisições simultâneas da API).
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # chave -> (valor, bytes estimados); o fim do OrderedDict é o mais recente
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    # Estimativa da memória de uma entrada: a chave, a tupla do valor e a lista do caminho
+    # (os vértices em si são os mesmos objetos do grafo e não são contados)
+    @staticmethod
+    def _estimate_size(key, value):
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        for item in value if isinstance(value, tuple) else ():
+            size += sys.getsizeof(item)
+        return size
+
+    # Descarta tudo se o grafo mudou desde a última operação (chamado com o lock)
+    def _check_version(self, version):
+        if version != self._version:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self.bytes = 0
+            self._version = version
+
+    def get(self, key, version=0, default=None):
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, version=0):
+        size = self._estimate_size(key, value)
+        with self._lock:
+            self._check_version(version)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            # Remove as entradas usadas há mais tempo até caber nos limites
+            while self._entries and (
+                    (self.max_entries is not None and len(self._entries) > self.max_entries)
+                    or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    # Valor guardado ou, se não houver, calculado por compute() e guardado
+    def get_or_compute(self, key, compute, version=0):
+        missing = object()
+        value = self.get(key, version, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value, version)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
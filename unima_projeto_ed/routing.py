@@ -0,0 +1,194 @@
+import time
+from .Dijkstra import Dijkstra
+from .a_star import a_star
+from .csr_graph import CSRGraph
+from .spatial_index import SpatialIndex
+
+
+def shortest_paths_batch(graph, pairs, queue="heapq", stats=None):
+    """
+    Caminhos mínimos para vários pares (origem, destino) de vértices.
+    Os pares são agrupados pela origem: cada origem distinta roda um único Dijkstra
+    um-para-muitos, que para assim que todos os destinos dela são finalizados.
+    Retorna [(caminho, distância)] na mesma ordem de 'pairs'; sem caminho: ([], infinito).
+    stats: SearchStats opcional, repassado a cada Dijkstra.
+    """
+    pairs = list(pairs)
+    by_source = {}
+    for source, target in pairs:
+        by_source.setdefault(source, set()).add(target)
+
+    results = {}
+    for source, targets in by_source.items():
+        tree = Dijkstra(graph, source, queue=queue, quiet=True, targets=targets, stats=stats)
+        for target in targets:
+            results[(source, target)] = (tree.path_to(target), tree.distance_to(target))
+    return [results[pair] for pair in pairs]
+
+
+class RoutingService:
+    """
+    Grafo, coordenadas e índice espacial carregados uma única vez e compartilhados entre as
+    consultas (ex.: todas as requisições da API). As consultas não alteram nada, então o
+    mesmo serviço pode ser usado por várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, graph, coordinates=None, index=None, heuristic='haversine', route_cache=None,
+                 pool=None):
+        # graph: WeightedDirectedGraph ou CSRGraph
+        self.graph = graph
+        # coordinates: nó -> (lat, lon); um CSRGraph pode usar as próprias coordenadas
+        self.coordinates = coordinates
+        # index: SpatialIndex usado para transformar (lat, lon) em vértice
+        self.index = index if index is not None else SpatialIndex(coordinates, graph)
+        # heuristic: heurística do A* (nome de métrica ou função, como em a_star)
+        self.heuristic = heuristic
+        # route_cache: RouteCache opcional com os caminhos já calculados, por (origem, destino, algoritmo)
+        self.route_cache = route_cache
+        # pool: QueryPool opcional; as buscas passam a rodar nos processos dele
+        self.pool = pool
+        # search_stats: função opcional que devolve o SearchStats da thread atual
+        # (ex.: metrics.Metrics.search_stats); as buscas feitas no pool não são contadas
+        self.search_stats = None
+
+    # Abre um grafo gravado por graph_io.save_graph (mapeado em memória)
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        from .graph_io import load_graph
+        return cls(load_graph(path), **kwargs)
+
+    # Baixa (ou lê do cache) as ruas do bbox e monta o grafo
+    @classmethod
+    def from_bbox(cls, bbox, cache=None, offline=False, simplify=True, **kwargs):
+        from .data import iter_osm_elements
+        from .grafo import build_graph_from_elements, simplify_graph
+
+        graph, nodes = build_graph_from_elements(iter_osm_elements(bbox, cache, offline))
+        if simplify:
+            graph = simplify_graph(graph)
+        return cls(graph, nodes, **kwargs)
+
+    # Coordenadas (lat, lon) de um vértice
+    def coordinates_of(self, node):
+        if self.coordinates is not None:
+            return self.coordinates[node]
+        return self.graph.coordinates_at(self.graph.index_of(node))
+
+    # Vértice mais próximo de (lat, lon) e a distância até ele, em metros
+    def snap(self, lat, lon):
+        return self.index.nearest(lat, lon)
+
+    # Versão do grafo para o cache (um CSRGraph não muda, fica sempre 0)
+    def _graph_version(self):
+        return getattr(self.graph, 'version', 0)
+
+    # Caminho e distância entre dois vértices pelo A*, passando pelo cache quando houver
+    def _shortest_path(self, source, target):
+        def compute():
+            if self.pool is not None:
+                path, distance = self.pool.route(source, target)
+            else:
+                stats = self.search_stats() if self.search_stats is not None else None
+                path, distance = a_star(self.graph, source, target, self.coordinates,
+                                        heuristic=self.heuristic, stats=stats)
+            return tuple(path), distance
+        if self.route_cache is None:
+            path, distance = compute()
+        else:
+            path, distance = self.route_cache.get_or_compute(
+                (source, target, 'a_star'), compute, self._graph_version())
+        return list(path), distance
+
+    def route(self, origin, destination):
+        """
+        Rota entre dois pontos (lat, lon): cada um é ligado ao vértice mais próximo e o
+        caminho é calculado com o A*.
+        Retorna um dicionário com a distância (metros, None se não houver caminho), os
+        vértices do caminho, as coordenadas do trajeto completo e o tempo da busca.
+        """
+        started = time.perf_counter()
+        source, source_offset = self.snap(*origin)
+        target, target_offset = self.snap(*destination)
+
+        path, distance = self._shortest_path(source, target)
+        found = distance != float('inf')
+        if not found:
+            path = []
+
+        # Grafo simplificado: recoloca os nós intermediários para desenhar a rota
+        expand = getattr(self.graph, 'expand_path', None)
+        full_path = expand(path) if expand is not None else path
+
+        return {
+            'distance': distance if found else None,
+            'path': path,
+            'coordinates': [list(self.coordinates_of(node)) for node in full_path],
+            'origin': {'node': source, 'snap_distance': source_offset},
+            'destination': {'node': target, 'snap_distance': target_offset},
+            'elapsed_ms': (time.perf_counter() - started) * 1000,
+        }
+
+    def route_batch(self, pairs, geometry=False):
+        """
+        Rotas para vários pares (origem, destino) de pontos (lat, lon), na ordem de entrada.
+        Pares com a mesma origem compartilham uma única busca (shortest_paths_batch).
+        geometry: inclui as coordenadas do trajeto de cada rota.
+        """
+        # Pontos repetidos são ajustados ao grafo uma vez só
+        snapped = {}
+        for origin, destination in pairs:
+            for point in (origin, destination):
+                if point not in snapped:
+                    snapped[point] = self.snap(*point)
+
+        vertex_pairs = [(snapped[origin][0], snapped[destination][0]) for origin, destination in pairs]
+        expand = getattr(self.graph, 'expand_path', None)
+        routes = []
+        for (origin, destination), (path, distance) in zip(pairs, self._batch_paths(vertex_pairs)):
+            found = distance != float('inf')
+            route = {
+                'distance': distance if found else None,
+                'path': path,
+                'origin': {'node': snapped[origin][0], 'snap_distance': snapped[origin][1]},
+                'destination': {'node': snapped[destination][0], 'snap_distance': snapped[destination][1]},
+            }
+            if geometry:
+                full_path = expand(path) if expand is not None else path
+                route['coordinates'] = [list(self.coordinates_of(node)) for node in full_path]
+            routes.append(route)
+        return routes
+
+    # Caminhos de vários pares de vértices: os que estão no cache não são recalculados
+    def _batch_paths(self, vertex_pairs):
+        if self.pool is not None:
+            solve = self.pool.route_batch
+        else:
+            stats = self.search_stats() if self.search_stats is not None else None
+            solve = lambda pairs: shortest_paths_batch(self.graph, pairs, stats=stats)
+        if self.route_cache is None:
+            return solve(vertex_pairs)
+        version = self._graph_version()
+        missing = object()
+        results = {}
+        for pair in vertex_pairs:
+            if pair not in results:
+                results[pair] = self.route_cache.get((*pair, 'dijkstra'), version, missing)
+        pending = [pair for pair, result in results.items() if result is missing]
+        for pair, (path, distance) in zip(pending, solve(pending)):
+            results[pair] = (tuple(path), distance)
+            self.route_cache.put((*pair, 'dijkstra'), results[pair], version)
+        return [(list(results[pair][0]), results[pair][1]) for pair in vertex_pairs]
+
+    # Tamanho do grafo carregado (e números do cache de rotas e do pool, se houver)
+    def stats(self):
+        stats = {
+            'vertices': self.graph.vertex_count(),
+            'edges': self.graph.edge_count(),
+            'format': 'csr' if isinstance(self.graph, CSRGraph) else 'weighted',
+        }
+        if self.route_cache is not None:
+            stats['route_cache'] = self.route_cache.stats()
+        if self.pool is not None:
+            stats['workers'] = self.pool.processes
+            stats['shared_memory_bytes'] = self.pool.nbytes
+        return stats
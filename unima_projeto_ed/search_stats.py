@@ -0,0 +1,101 @@
+import time
+
+
+class SearchStats:
+    """
+    Coletor opcional do trabalho feito pelas buscas (Dijkstra, a_star e as bidirecionais).
+    Uso: stats = SearchStats(); a_star(..., stats=stats); stats.as_dict()
+    Os contadores se acumulam entre buscas até reset():
+      searches       buscas feitas
+      pushes         inserções na fila (incluindo atualizações de prioridade)
+      pops           retiradas da fila
+      stale_pops     retiradas de vértices já finalizados e não reabertos desde então
+                     (entradas velhas das filas sem decrease-key; as filas indexadas não geram
+                     entradas velhas)
+      relaxations    arestas que melhoraram a distância de um vizinho
+      settled        vértices finalizados; um vértice reaberto (o A* com heurística
+                     inconsistente coloca de novo na fila um vértice já finalizado) conta de
+                     novo quando é expandido outra vez
+      max_heap_size  maior tamanho da fila durante uma busca
+      elapsed        tempo total das buscas, em segundos
+    Ganchos (opcionais), para acompanhar a busca passo a passo:
+      on_settle(vértice, distância)        quando um vértice é finalizado
+      on_relax(origem, destino, distância) quando uma aresta melhora a distância do destino
+    Sem stats (o padrão) as buscas não mudam em nada: a instrumentação troca o push/pop da
+    fila uma vez no início da busca, sem nenhum teste a mais dentro do laço.
+    """
+
+    FIELDS = ('searches', 'pushes', 'pops', 'stale_pops', 'relaxations', 'settled',
+              'max_heap_size', 'elapsed')
+
+    def __init__(self, on_settle=None, on_relax=None):
+        self.on_settle = on_settle
+        self.on_relax = on_relax
+        self.reset()
+
+    # Zera os contadores (os ganchos continuam)
+    def reset(self):
+        self.searches = 0
+        self.pushes = 0
+        self.pops = 0
+        self.stale_pops = 0
+        self.relaxations = 0
+        self.settled = 0
+        self.max_heap_size = 0
+        self.elapsed = 0.0
+
+    # Início de uma busca: devolve o instante que deve ser passado para finish()
+    def start(self):
+        self.searches += 1
+        return time.perf_counter()
+
+    def finish(self, started):
+        self.elapsed += time.perf_counter() - started
+
+    def instrument(self, push, pop, size, distance, label=None):
+        """
+        Versões de push/pop de uma fila que atualizam os contadores e chamam os ganchos.
+        size(): tamanho atual da fila; distance(v): distância atual de v na busca;
+        label(v): id original de v (ex.: node_ids de um CSRGraph), para os ganchos.
+        Cada push depois do primeiro pop é uma relaxação a partir do último vértice finalizado.
+        Um push de um vértice já finalizado o reabre: o próximo pop dele é uma nova expansão,
+        não uma entrada velha.
+        """
+        settled = set()
+        last = []  # último vértice finalizado (origem das próximas relaxações)
+        on_settle, on_relax = self.on_settle, self.on_relax
+
+        def counted_push(priority, item):
+            push(priority, item)
+            self.pushes += 1
+            settled.discard(item)
+            n = size()
+            if n > self.max_heap_size:
+                self.max_heap_size = n
+            if last:
+                self.relaxations += 1
+                if on_relax is not None:
+                    source = last[0]
+                    on_relax(label(source) if label else source, label(item) if label else item,
+                             distance(item))
+
+        def counted_pop():
+            item = pop()
+            self.pops += 1
+            if item in settled:
+                self.stale_pops += 1
+                return item
+            settled.add(item)
+            self.settled += 1
+            last[:] = [item]
+            if on_settle is not None:
+                on_settle(label(item) if label else item, distance(item))
+            return item
+
+        return counted_push, counted_pop
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return "SearchStats(" + ", ".join(f"{k}={v!r}" for k, v in self.as_dict().items()) + ")"
@@ -0,0 +1,226 @@
+from array import array
+from heapq import heappush, heapreplace
+from math import radians, cos, sqrt
+from .csr_graph import CSRGraph
+from .heuristics import EARTH_RADIUS
+
+# ---------------------------------------------
+# Índice espacial (KD-tree) para encontrar o vértice mais próximo de um ponto (lat, lon)
+# ---------------------------------------------
+# - As coordenadas são projetadas (equiretangular, em torno da latitude média) em metros:
+#   x = R * lon * cos(lat0), y = R * lat. Na escala de uma cidade o erro é desprezível.
+# - A árvore é implícita: os pontos ficam num array reordenado de modo que, em cada intervalo
+#   [lo, hi), o ponto do meio separa o intervalo pelo eixo x (profundidade par) ou y (ímpar).
+#   Cada consulta desce pela árvore e só visita o outro lado de uma divisão quando ele pode
+#   ter um ponto mais perto que o melhor já encontrado: O(log n) em média.
+# - Para ajustar o ponto à aresta mais próxima, cada trecho reto das arestas (entre dois nós
+#   do OSM) entra numa segunda árvore, pelo ponto médio. Todo ponto de um trecho está a no
+#   máximo metade do comprimento dele do ponto médio, então o trecho mais próximo tem o ponto
+#   médio a até d + (maior trecho) / 2, onde d é a distância ao ponto médio mais próximo.
+
+
+class _KDTree:
+    # KD-tree implícita sobre pontos (x, y); items[i] é o objeto associado ao ponto i
+    def __init__(self, xs, ys, items):
+        order = list(range(len(xs)))
+        stack = [(0, len(order), 0)]
+        # Ordena cada intervalo pelo eixo da sua profundidade, deixando a mediana no meio
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= 1:
+                continue
+            axis = xs if depth % 2 == 0 else ys
+            order[lo:hi] = sorted(order[lo:hi], key=axis.__getitem__)
+            mid = (lo + hi) // 2
+            stack.append((lo, mid, depth + 1))
+            stack.append((mid + 1, hi, depth + 1))
+        self.xs = array('d', (xs[i] for i in order))
+        self.ys = array('d', (ys[i] for i in order))
+        self.items = [items[i] for i in order]
+
+    def __len__(self):
+        return len(self.items)
+
+    # Até k pontos (k=None: todos) a no máximo 'radius' de (x, y).
+    # Retorna [(distância², item)] em ordem crescente de distância.
+    def search(self, x, y, k=None, radius=float('inf')):
+        xs, ys = self.xs, self.ys
+        bound = radius * radius
+        found = []  # heap de máximo (-d², posição) com os melhores até agora
+        stack = [(0, len(xs), 0, 0.0)]
+        while stack:
+            lo, hi, depth, plane = stack.pop()
+            # plane: distância² até a divisão que separa este intervalo da consulta
+            if lo >= hi or plane > bound:
+                continue
+            mid = (lo + hi) // 2
+            dx, dy = x - xs[mid], y - ys[mid]
+            d2 = dx * dx + dy * dy
+            if d2 <= bound:
+                if k is None or len(found) < k:
+                    heappush(found, (-d2, mid))
+                elif d2 < -found[0][0]:
+                    heapreplace(found, (-d2, mid))
+                if k is not None and len(found) == k:
+                    bound = min(bound, -found[0][0])
+            diff = dx if depth % 2 == 0 else dy
+            if diff < 0:
+                near, far = (lo, mid), (mid + 1, hi)
+            else:
+                near, far = (mid + 1, hi), (lo, mid)
+            # O lado mais distante fica na pilha e só é visitado se ainda puder ter algo melhor
+            stack.append((far[0], far[1], depth + 1, diff * diff))
+            stack.append((near[0], near[1], depth + 1, 0.0))
+        items = self.items
+        return [(d2, items[pos]) for d2, pos in sorted((-d2, pos) for d2, pos in found)]
+
+
+class EdgeSnap:
+    # Ponto de uma aresta mais próximo de uma consulta
+    __slots__ = ('source', 'target', 'point', 'distance', 'fraction')
+
+    def __init__(self, source, target, point, distance, fraction):
+        # source -> target: aresta do grafo (no sentido em que ela existe)
+        self.source = source
+        self.target = target
+        # point: (lat, lon) do ponto projetado sobre a aresta
+        self.point = point
+        # distance: distância (metros) da consulta até point
+        self.distance = distance
+        # fraction: posição de point ao longo da aresta (0 = source, 1 = target), pelo comprimento
+        self.fraction = fraction
+
+    def __repr__(self):
+        return (f"EdgeSnap(source={self.source!r}, target={self.target!r}, point={self.point!r}, "
+                f"distance={self.distance:.2f}, fraction={self.fraction:.3f})")
+
+
+class SpatialIndex:
+    def __init__(self, coordinates=None, graph=None):
+        """
+        coordinates: dicionário nó -> (lat, lon). Pode ser omitido para um CSRGraph com coordenadas.
+        graph: WeightedDirectedGraph ou CSRGraph; quando dado, só os vértices do grafo são
+               indexados e nearest_edge fica disponível.
+        """
+        if coordinates is None:
+            if not isinstance(graph, CSRGraph) or graph.coordinates is None:
+                raise ValueError("coordinates are required unless graph is a CSRGraph with coordinates")
+            coordinates = {node: graph.coordinates_at(i) for i, node in enumerate(graph.node_ids)}
+        self.coordinates = coordinates
+        self.graph = graph
+
+        nodes = list(graph.get_vertices()) if graph is not None else list(coordinates)
+        nodes = [node for node in nodes if node in coordinates]
+        # Latitude de referência da projeção: a média dos pontos
+        self.lat0 = sum(coordinates[node][0] for node in nodes) / len(nodes) if nodes else 0.0
+        self._kx = radians(1) * EARTH_RADIUS * cos(radians(self.lat0))
+        self._ky = radians(1) * EARTH_RADIUS
+
+        xs = array('d', (self._kx * coordinates[node][1] for node in nodes))
+        ys = array('d', (self._ky * coordinates[node][0] for node in nodes))
+        self._vertices = _KDTree(xs, ys, nodes)
+
+        # Árvore dos trechos das arestas, montada no primeiro nearest_edge
+        self._pieces = None
+        self._max_half_piece = 0.0
+
+    def __len__(self):
+        return len(self._vertices)
+
+    # Projeção (lat, lon) -> (x, y) em metros e a inversa
+    def _project(self, lat, lon):
+        return self._kx * lon, self._ky * lat
+
+    def _unproject(self, x, y):
+        return y / self._ky, x / self._kx
+
+    def nearest(self, lat, lon):
+        """Vértice mais próximo de (lat, lon): retorna (nó, distância em metros); IndexError se vazio."""
+        result = self.k_nearest(lat, lon, 1)
+        if not result:
+            raise IndexError("nearest on empty spatial index")
+        return result[0]
+
+    def k_nearest(self, lat, lon, k):
+        """Os k vértices mais próximos de (lat, lon): lista de (nó, distância em metros), do mais perto ao mais longe."""
+        if k <= 0:
+            return []
+        x, y = self._project(lat, lon)
+        return [(node, sqrt(d2)) for d2, node in self._vertices.search(x, y, k)]
+
+    def within(self, lat, lon, radius):
+        """Vértices a até 'radius' metros de (lat, lon): lista de (nó, distância), do mais perto ao mais longe."""
+        x, y = self._project(lat, lon)
+        return [(node, sqrt(d2)) for d2, node in self._vertices.search(x, y, radius=radius)]
+
+    # ---------------------------------------------
+    # Ajuste à aresta mais próxima
+    # ---------------------------------------------
+
+    # Pontos (x, y) da aresta u -> v, incluindo os nós intermediários de um grafo simplificado
+    def _polyline(self, u, v):
+        geometry = getattr(self.graph, 'geometry', None) or {}
+        if (u, v) in geometry:
+            inner = geometry[(u, v)]
+        else:
+            inner = geometry.get((v, u), ())[::-1]
+        coordinates = self.coordinates
+        return [self._project(*coordinates[node]) for node in (u, *inner, v)]
+
+    # Quebra cada aresta (uma vez por par de vértices, nos dois sentidos) em trechos retos
+    # (u, v, ax, ay, bx, by, início do trecho na aresta, comprimento do trecho, comprimento da aresta)
+    def _prepare_pieces(self):
+        xs, ys, pieces = array('d'), array('d'), []
+        seen = set()
+        longest = 0.0
+        for u in self._vertices.items:
+            for v, _ in self.graph.get_neighbors_with_weights(u):
+                if v == u or (v, u) in seen or v not in self.coordinates:
+                    continue
+                seen.add((u, v))
+                points = self._polyline(u, v)
+                lengths = [sqrt((bx - ax)**2 + (by - ay)**2) for (ax, ay), (bx, by) in zip(points, points[1:])]
+                total = sum(lengths)
+                start = 0.0
+                for ((ax, ay), (bx, by)), length in zip(zip(points, points[1:]), lengths):
+                    xs.append((ax + bx) / 2)
+                    ys.append((ay + by) / 2)
+                    pieces.append((u, v, ax, ay, bx, by, start, length, total))
+                    longest = max(longest, length)
+                    start += length
+        self._pieces = _KDTree(xs, ys, pieces)
+        self._max_half_piece = longest / 2
+
+    def nearest_edge(self, lat, lon):
+        """
+        Aresta mais próxima de (lat, lon) e o ponto dela mais perto da consulta (EdgeSnap).
+        Requer o índice construído com graph. Retorna None se o grafo não tiver arestas.
+        """
+        if self.graph is None:
+            raise ValueError("nearest_edge requires a SpatialIndex built with a graph")
+        if self._pieces is None:
+            self._prepare_pieces()
+        if not len(self._pieces):
+            return None
+
+        x, y = self._project(lat, lon)
+        [(d2, _)] = self._pieces.search(x, y, 1)
+        radius = sqrt(d2) + self._max_half_piece
+        best = None
+        for _, (u, v, ax, ay, bx, by, start, length, total) in self._pieces.search(
+                x, y, radius=radius * (1 + 1e-9) + 1e-6):
+            # Projeção de (x, y) no trecho, limitada às pontas
+            t = 0.0
+            if length > 0:
+                t = max(0.0, min(1.0, ((x - ax) * (bx - ax) + (y - ay) * (by - ay)) / (length * length)))
+            px, py = ax + t * (bx - ax), ay + t * (by - ay)
+            d2 = (x - px)**2 + (y - py)**2
+            if best is None or d2 < best[0]:
+                fraction = (start + t * length) / total if total > 0 else 0.0
+                best = (d2, u, v, px, py, fraction)
+
+        d2, u, v, px, py, fraction = best
+        # Devolve a aresta no sentido em que ela existe no grafo
+        if not self.graph.has_edge(u, v):
+            u, v, fraction = v, u, 1 - fraction
+        return EdgeSnap(u, v, self._unproject(px, py), sqrt(d2), fraction)
@@ -8,6 +8,15 @@ class WeightedDirectedGraph:
         self.vertices = set()
         # Dicionário que armazena as arestas: {origem: {destino: peso}}
         self.edges = {}
+        # Adjacência reversa (arestas que chegam): {destino: {origem: peso}}
+        # Usada pelas buscas bidirecionais para andar no grafo "de trás pra frente"
+        self.reverse_edges = {}
+        # Nós intermediários das arestas que resumem uma cadeia de ruas (grafo simplificado):
+        # {(origem, destino): [nós entre origem e destino, em ordem]}
+        self.geometry = {}
+        # Versão do grafo: aumenta a cada aresta adicionada ou removida, para que caches de
+        # rotas saibam que os resultados guardados podem ter ficado velhos
+        self.version = 0
     
     # Adiciona um novo vértice ao grafo
     def add_vertex(self, vertex):
@@ -15,6 +24,7 @@ class WeightedDirectedGraph:
         # Inicializa lista de vizinhos vazia se não existir
         if vertex not in self.edges:
             self.edges[vertex] = {}
+            self.reverse_edges[vertex] = {}
     
     # Adiciona uma aresta com peso específico
     def add_edge(self, source, target, weight):
@@ -23,6 +33,25 @@ class WeightedDirectedGraph:
         self.add_vertex(target)
         # Cria a conexão direcionada com o peso
         self.edges[source][target] = weight
+        self.reverse_edges[target][source] = weight
+        self.version += 1
+        # Uma aresta nova substitui a antiga, inclusive a geometria dela
+        if self.geometry:
+            self.geometry.pop((source, target), None)
+    
+    # Adiciona várias arestas de uma vez a partir de tuplas (origem, destino, peso)
+    def add_edges_from(self, edges):
+        out_edges, in_edges, geometry = self.edges, self.reverse_edges, self.geometry
+        for source, target, weight in edges:
+            if source not in out_edges:
+                self.add_vertex(source)
+            if target not in out_edges:
+                self.add_vertex(target)
+            out_edges[source][target] = weight
+            in_edges[target][source] = weight
+            if geometry:
+                geometry.pop((source, target), None)
+        self.version += 1
     
     # Adiciona uma aresta não-direcionada (bidirecional)
     def add_undirected_edge(self, source, target, weight):
@@ -53,6 +82,10 @@ class WeightedDirectedGraph:
     # Retorna vizinhos com seus respectivos pesos
     def get_neighbors_with_weights(self, vertex):
         return list(self.edges.get(vertex, {}).items())
+
+    # Retorna os vértices que têm aresta chegando em 'vertex', com os pesos
+    def get_predecessors_with_weights(self, vertex):
+        return list(self.reverse_edges.get(vertex, {}).items())
     
     # Verifica se um vértice existe no grafo
     def has_vertex(self, vertex):
@@ -66,12 +99,25 @@ class WeightedDirectedGraph:
     def remove_edge(self, source, target):
         if source in self.edges and target in self.edges[source]:
             del self.edges[source][target]
+            del self.reverse_edges[target][source]
+            self.geometry.pop((source, target), None)
+            self.version += 1
     
     # Remove uma aresta não-direcionada (ambas as direções)
     def remove_undirected_edge(self, source, target):
         self.remove_edge(source, target)
         self.remove_edge(target, source)
     
+    # Reconstrói o caminho completo, recolocando os nós intermediários das arestas simplificadas
+    def expand_path(self, path):
+        if not path:
+            return []
+        expanded = [path[0]]
+        for source, target in zip(path, path[1:]):
+            expanded.extend(self.geometry.get((source, target), ()))
+            expanded.append(target)
+        return expanded
+    
     # Retorna lista de todos os vértices
     def get_vertices(self):
         return list(self.vertices)